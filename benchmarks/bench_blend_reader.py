@@ -0,0 +1,65 @@
+"""
+Compares the native .blend reader against the Blender subprocess path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_blend_reader [extra.blend ...]
+
+Generated fixtures are always measured with the native reader. The Blender
+path is only measured when BLENDER_EXE points at a working Blender.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.blend_fixtures import ensure_fixtures
+from blender_utils.blend_file import BlendFileError, read_blend_info
+from blender_utils.blend_reader import BLENDER_EXE, get_blend_info_from_blender
+
+
+def time_call(func, path, repeat):
+    """Returns the median wall time of func(path) in seconds, or None if it fails."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = func(path)
+        except (BlendFileError, OSError):
+            return None
+        timings.append(time.perf_counter() - start)
+        if result is None:
+            return None
+    return statistics.median(timings)
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "n/a"
+    if seconds < 1:
+        return f"{seconds * 1000:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv):
+    fixture_dir = os.path.join(tempfile.gettempdir(), "bender_blend_fixtures")
+    paths = ensure_fixtures(fixture_dir)
+    for extra in argv:
+        paths[os.path.basename(extra)] = extra
+
+    have_blender = os.path.exists(BLENDER_EXE)
+    if not have_blender:
+        print(f"ℹ️ Blender not found at {BLENDER_EXE}, only the native reader is measured")
+
+    print(f"{'file':<24}{'size':>12}{'native':>14}{'blender':>14}{'speedup':>10}")
+    for name, path in paths.items():
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        native = time_call(read_blend_info, path, repeat=20)
+        blender = time_call(get_blend_info_from_blender, path, repeat=1) if have_blender else None
+        speedup = f"{blender / native:.0f}x" if native and blender else "-"
+        print(f"{name:<24}{size_mb:>10.1f}MB{format_seconds(native):>14}{format_seconds(blender):>14}{speedup:>10}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
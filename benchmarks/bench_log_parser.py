@@ -0,0 +1,73 @@
+"""
+Measures how many Blender log lines per second the log parser handles.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_log_parser [extra.log ...]
+
+Each log is replayed through a fresh BlenderLogParser enough times to get a
+stable number, next to the old 'Fra:' split that only found frame numbers.
+"""
+import os
+import statistics
+import sys
+import time
+
+from blender_utils.log_parser import BlenderLogParser, FrameSaved
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+MIN_LINES = 200_000
+
+
+def legacy_parse(lines):
+    """The frame detection ParallelRender used before the log parser."""
+    frames = set()
+    for line in lines:
+        if "Fra:" not in line:
+            continue
+        try:
+            frames.add(int(line.split("Fra:")[1].split()[0]))
+        except (IndexError, ValueError):
+            continue
+    return len(frames)
+
+
+def structured_parse(lines):
+    parser = BlenderLogParser()
+    events = 0
+    for line in lines:
+        events += len(parser.feed(line))
+    return events
+
+
+def lines_per_second(func, lines, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        timings.append(time.perf_counter() - start)
+    return len(lines) / statistics.median(timings)
+
+
+def main(argv):
+    paths = sorted(os.path.join(LOG_DIR, name) for name in os.listdir(LOG_DIR) if name.endswith(".log"))
+    paths += argv
+
+    print(f"{'log':<22}{'lines':>8}{'events':>8}{'saved':>7}{'parser':>16}{'legacy split':>16}")
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            log_lines = f.read().splitlines()
+        lines = log_lines * max(1, MIN_LINES // len(log_lines))
+
+        parser = BlenderLogParser()
+        events = [event for line in log_lines for event in parser.feed(line)]
+        saved = sum(isinstance(event, FrameSaved) for event in events)
+
+        parsed = lines_per_second(structured_parse, lines)
+        legacy = lines_per_second(legacy_parse, lines)
+        print(f"{os.path.basename(path):<22}{len(log_lines):>8}{len(events):>8}{saved:>7}"
+              f"{parsed / 1e6:>12.2f} M/s{legacy / 1e6:>12.2f} M/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,276 @@
+"""
+Generates synthetic .blend files for benchmarks.
+
+The files carry a small but valid SDNA with the structs the native reader
+needs (Scene, RenderData, ImageFormatData, FileGlobal, plus the collections,
+objects, view layers and ID properties behind the scene inventory) and
+optional padding blocks so that file size and block count resemble
+production files.
+"""
+import gzip
+import os
+import struct
+
+from blender_utils.blend_file import SDNA
+
+# Primitive DNA types and their sizes
+PRIMITIVES = [("char", 1), ("uchar", 1), ("short", 2), ("int", 4), ("float", 4), ("void", 0)]
+
+# Struct layouts, written in DNA member notation
+STRUCTS = [
+    ("ID", [("void", "*next"), ("void", "*prev"), ("char", "name[66]"), ("char", "_pad[6]"), ("void", "*properties")]),
+    ("ListBase", [("void", "*first"), ("void", "*last")]),
+    ("IDPropertyData", [("void", "*pointer"), ("ListBase", "group"), ("int", "val"), ("int", "val2")]),
+    ("IDProperty", [
+        ("void", "*next"), ("void", "*prev"), ("char", "type"), ("char", "subtype"), ("short", "flag"),
+        ("char", "name[64]"), ("int", "_pad0"), ("IDPropertyData", "data"), ("int", "len"), ("int", "totallen"),
+    ]),
+    ("ImageFormatData", [
+        ("char", "depth"), ("char", "planes"), ("short", "flag"), ("char", "quality"),
+        ("char", "compress"), ("char", "exr_codec"), ("char", "imtype"),
+    ]),
+    ("RenderData", [
+        ("int", "sfra"), ("int", "efra"), ("int", "cfra"), ("int", "frame_step"),
+        ("short", "size"), ("short", "_pad0"), ("int", "xsch"), ("int", "ysch"),
+        ("ImageFormatData", "im_format"), ("char", "pic[1024]"), ("char", "engine[32]"),
+    ]),
+    ("SceneEEVEE", [("int", "taa_samples"), ("int", "taa_render_samples")]),
+    ("Scene", [
+        ("ID", "id"), ("void", "*camera"), ("void", "*master_collection"), ("RenderData", "r"),
+        ("SceneEEVEE", "eevee"), ("ListBase", "view_layers"),
+    ]),
+    ("ViewLayer", [("void", "*next"), ("void", "*prev"), ("char", "name[64]"), ("short", "flag"), ("short", "_pad[3]")]),
+    ("Collection", [("ID", "id"), ("ListBase", "gobject"), ("ListBase", "children")]),
+    ("CollectionObject", [("void", "*next"), ("void", "*prev"), ("void", "*ob")]),
+    ("CollectionChild", [("void", "*next"), ("void", "*prev"), ("void", "*collection")]),
+    ("Object", [("ID", "id"), ("short", "type"), ("short", "_pad[3]")]),
+    ("FileGlobal", [("void", "*curscreen"), ("void", "*curscene"), ("int", "fileflags"), ("int", "globalf")]),
+]
+
+# Fake memory addresses for pointers between blocks
+_BASE_ADDRESS = 0x7F0000000000
+
+
+def _align4(data):
+    data.extend(b"\0" * (-len(data) % 4))
+
+
+def build_dna(pointer_size=8):
+    """Encodes STRUCTS as a DNA1 block payload."""
+    names = []
+    types = [name for name, _ in PRIMITIVES] + [name for name, _ in STRUCTS]
+    lengths = {name: size for name, size in PRIMITIVES}
+
+    for struct_name, members in STRUCTS:
+        size = 0
+        for member_type, member_name in members:
+            if member_name not in names:
+                names.append(member_name)
+            count = 1
+            if "[" in member_name:
+                for dim in member_name[member_name.index("[") + 1:].rstrip("]").split("]["):
+                    count *= int(dim)
+            size += (pointer_size if "*" in member_name else lengths[member_type]) * count
+        lengths[struct_name] = size
+
+    data = bytearray(b"SDNA")
+    for tag, strings in ((b"NAME", names), (b"TYPE", types)):
+        _align4(data)
+        data += tag + struct.pack("<i", len(strings))
+        for string in strings:
+            data += string.encode("latin-1") + b"\0"
+    _align4(data)
+    data += b"TLEN" + struct.pack(f"<{len(types)}H", *(lengths[name] for name in types))
+    _align4(data)
+    data += b"STRC" + struct.pack("<i", len(STRUCTS))
+    for struct_name, members in STRUCTS:
+        data += struct.pack("<2H", types.index(struct_name), len(members))
+        for member_type, member_name in members:
+            data += struct.pack("<2H", types.index(member_type), names.index(member_name))
+    return bytes(data)
+
+
+def _pack_fields(sdna, struct_name, values):
+    """Builds a struct instance from {'dotted.path': value}."""
+    dna_struct = sdna.struct(struct_name)
+    data = bytearray(dna_struct.size)
+    for path, value in values.items():
+        current = dna_struct
+        offset = 0
+        for part in path.split("."):
+            field = current.field(part)
+            offset += field.offset
+            if sdna.has_struct(field.type_name) and not field.is_pointer:
+                current = sdna.struct(field.type_name)
+        if isinstance(value, str):
+            encoded = value.encode("utf-8")[:field.size - 1]
+            data[offset:offset + len(encoded)] = encoded
+        elif field.is_pointer:
+            struct.pack_into("<Q", data, offset, value)
+        else:
+            fmt = {"char": "b", "uchar": "B", "short": "h", "int": "i", "float": "f"}[field.type_name]
+            struct.pack_into("<" + fmt, data, offset, value)
+    return bytes(data)
+
+
+def _block(code, data, old_address, sdna_index, count=1):
+    return struct.pack("<4siQii", code, len(data), old_address, sdna_index, count) + data
+
+
+class _Addresses:
+    """Hands out fake memory addresses for blocks."""
+
+    def __init__(self, start):
+        self.next = start
+
+    def __call__(self):
+        self.next += 0x1000
+        return self.next
+
+
+def _linked_list(sdna, struct_name, items, new_address):
+    """Builds a ListBase of struct_name blocks from [(address, {field: value}), ...]; returns (ListBase values, blocks)."""
+    blocks = bytearray()
+    for i, (address, values) in enumerate(items):
+        values = dict(values)
+        if i > 0:
+            values["prev"] = items[i - 1][0]
+        if i + 1 < len(items):
+            values["next"] = items[i + 1][0]
+        blocks += _block(b"DATA", _pack_fields(sdna, struct_name, values), address, sdna.struct_index[struct_name])
+    if not items:
+        return {}, bytes(blocks)
+    return {"first": items[0][0], "last": items[-1][0]}, bytes(blocks)
+
+
+def _scene_data_blocks(sdna, scene, new_address):
+    """
+    Writes the blocks a scene points to: view layers, the master collection with its camera and mesh
+    objects, and a Cycles ID property group. Returns ({Scene field: value}, blocks).
+    """
+    values = {}
+    out = bytearray()
+
+    layers = scene.get("view_layers", ["ViewLayer"])
+    layer_items = []
+    for layer in layers:
+        name, use = (layer, True) if isinstance(layer, str) else layer
+        layer_items.append((new_address(), {"name": name, "flag": 1 if use else 0}))
+    listbase, blocks = _linked_list(sdna, "ViewLayer", layer_items, new_address)
+    values.update({f"view_layers.{key}": value for key, value in listbase.items()})
+    out += blocks
+
+    cameras = scene.get("cameras", ["Camera"])
+    objects = [(name, 11) for name in cameras] + [("Cube", 1)]
+    object_addresses = {}
+    for name, object_type in objects:
+        address = object_addresses[name] = new_address()
+        out += _block(b"OB\0\0", _pack_fields(sdna, "Object", {"id.name": "OB" + name, "type": object_type}),
+                      address, sdna.struct_index["Object"])
+    listbase, blocks = _linked_list(sdna, "CollectionObject",
+                                    [(new_address(), {"ob": object_addresses[name]}) for name, _ in objects],
+                                    new_address)
+    out += blocks
+    collection_address = new_address()
+    out += _block(b"DATA", _pack_fields(sdna, "Collection", dict(
+        {"id.name": "GRScene Collection"}, **{f"gobject.{key}": value for key, value in listbase.items()})),
+        collection_address, sdna.struct_index["Collection"])
+    values["master_collection"] = collection_address
+    active_camera = scene.get("camera", cameras[0] if cameras else None)
+    if active_camera:
+        values["camera"] = object_addresses[active_camera]
+
+    if "samples" in scene:
+        samples_address, group_address = new_address(), new_address()
+        out += _block(b"DATA", _pack_fields(sdna, "IDProperty", {"type": 1, "name": "samples",
+                                                                 "data.val": scene["samples"]}),
+                      samples_address, sdna.struct_index["IDProperty"])
+        out += _block(b"DATA", _pack_fields(sdna, "IDProperty", {
+            "type": 6, "name": "cycles", "data.group.first": samples_address, "data.group.last": samples_address}),
+            group_address, sdna.struct_index["IDProperty"])
+        properties_address = new_address()
+        out += _block(b"DATA", _pack_fields(sdna, "IDProperty", {
+            "type": 6, "name": "", "data.group.first": group_address, "data.group.last": group_address}),
+            properties_address, sdna.struct_index["IDProperty"])
+        values["id.properties"] = properties_address
+    return values, bytes(out)
+
+
+def write_blend_fixture(path, scenes=None, active_scene=0, padding_blocks=0, padding_block_size=4096, compress=None):
+    """
+    Writes a synthetic .blend file and returns its path.
+
+    :param scenes: List of dicts with 'name', any Scene field paths ('r.sfra', 'r.pic', 'eevee.taa_render_samples', ...)
+                   and optionally 'cameras' (names), 'camera', 'view_layers' (names or (name, use)) and 'samples' (Cycles).
+    :param padding_blocks: Number of filler DATA blocks written before the scenes.
+    :param compress: None or "gzip".
+    """
+    if scenes is None:
+        scenes = [{"name": "Scene"}]
+
+    dna = build_dna()
+    sdna = SDNA(dna, "<", 8)
+    struct_index = sdna.struct_index
+
+    out = bytearray(b"BLENDER-v405")
+    out += _block(b"REND", b"\0" * 72, 0, 0)
+
+    scene_addresses = [_BASE_ADDRESS + 0x1000 * (i + 1) for i in range(len(scenes))]
+    out += _block(b"GLOB", _pack_fields(sdna, "FileGlobal", {"curscene": scene_addresses[active_scene]}),
+                  _BASE_ADDRESS, struct_index["FileGlobal"])
+
+    filler = bytes(range(256)) * (padding_block_size // 256 + 1)
+    for i in range(padding_blocks):
+        out += _block(b"DATA", filler[:padding_block_size], _BASE_ADDRESS + 0x10000000 + i * padding_block_size, 0)
+
+    new_address = _Addresses(_BASE_ADDRESS + 0x100000)
+    for address, scene in zip(scene_addresses, scenes):
+        values = {
+            "id.name": "SC" + scene.get("name", "Scene"),
+            "r.sfra": 1, "r.efra": 250, "r.cfra": 1, "r.frame_step": 1,
+            "r.size": 100, "r.xsch": 1920, "r.ysch": 1080,
+            "r.pic": "//render/frame_####", "r.engine": "CYCLES",
+            "r.im_format.imtype": 28, "r.im_format.depth": 16,
+            "r.im_format.compress": 15, "r.im_format.exr_codec": 2,
+            "eevee.taa_render_samples": 64,
+        }
+        pointers, data_blocks = _scene_data_blocks(sdna, scene, new_address)
+        values.update(pointers)
+        values.update({key: value for key, value in scene.items()
+                       if key not in ("name", "cameras", "camera", "view_layers", "samples")})
+        out += _block(b"SC\0\0", _pack_fields(sdna, "Scene", values), address, struct_index["Scene"])
+        out += data_blocks
+
+    out += _block(b"DNA1", dna, 0, 0)
+    out += _block(b"ENDB", b"", 0, 0)
+
+    if compress == "gzip":
+        with gzip.open(path, "wb", compresslevel=1) as f:
+            f.write(out)
+    else:
+        with open(path, "wb") as f:
+            f.write(out)
+    return path
+
+
+def ensure_fixtures(directory):
+    """Creates the standard small/large/gzip fixtures used by the benchmarks."""
+    os.makedirs(directory, exist_ok=True)
+    fixtures = {
+        "small": dict(padding_blocks=0),
+        "large": dict(padding_blocks=20000, padding_block_size=8192),
+        "large_gzip": dict(padding_blocks=20000, padding_block_size=8192, compress="gzip"),
+    }
+    paths = {}
+    for name, options in fixtures.items():
+        path = os.path.join(directory, f"fixture_{name}.blend")
+        paths[name] = write_blend_fixture(path, scenes=[{"name": "Shot", "r.sfra": 101, "r.efra": 348}], **options)
+    paths["multi_scene"] = write_blend_fixture(os.path.join(directory, "fixture_multi_scene.blend"), scenes=[
+        {"name": "Main", "r.sfra": 1, "r.efra": 120, "samples": 256, "cameras": ["CamA", "CamB"], "camera": "CamB",
+         "view_layers": ["Beauty", ("Holdout", False)]},
+        {"name": "Insert", "r.sfra": 10, "r.efra": 40, "r.engine": "BLENDER_EEVEE_NEXT", "r.xsch": 3840,
+         "r.ysch": 2160, "r.size": 50, "r.pic": "//render/insert/insert_####", "cameras": ["InsertCam"]},
+        {"name": "Previz", "r.sfra": 1, "r.efra": 60, "r.engine": "BLENDER_WORKBENCH", "r.im_format.imtype": 17,
+         "r.im_format.depth": 2, "cameras": []},
+    ], active_scene=1)
+    return paths
@@ -0,0 +1,64 @@
+"""
+Generates small OpenEXR files for benchmarks and the fake Blender.
+
+The files are single-part, uncompressed scanline images with Blender's
+multilayer channel names ('ViewLayer.Combined.R', ...) and its render stamp
+metadata, which is all the output verification reads. Pixels are zeros.
+"""
+import struct
+
+from blender_utils.exr_file import MAGIC
+
+DEFAULT_CHANNELS = ("ViewLayer.Combined.A", "ViewLayer.Combined.B", "ViewLayer.Combined.G",
+                    "ViewLayer.Combined.R", "ViewLayer.Depth.Z")
+HALF = 1
+
+
+def _attribute(name, type_name, data):
+    return name.encode() + b"\0" + type_name.encode() + b"\0" + struct.pack("<i", len(data)) + data
+
+
+def _channel_list(channels):
+    data = b"".join(name.encode() + b"\0" + struct.pack("<iB3xii", HALF, 0, 1, 1) for name in sorted(channels))
+    return data + b"\0"
+
+
+def exr_height_for_size(size, width=64, channels=DEFAULT_CHANNELS):
+    """Number of scanlines that makes a fixture roughly size bytes."""
+    line_bytes = 8 + 8 + width * 2 * len(channels)  # Offset table entry, chunk header, pixels
+    return max(1, size // line_bytes)
+
+
+def write_exr_fixture(path, width=64, height=64, channels=DEFAULT_CHANNELS, metadata=None, truncate=None):
+    """
+    Writes an uncompressed scanline EXR and returns its path.
+
+    :param metadata: Extra string attributes, e.g. {"RenderTime": "00:01.25"} like Blender's stamp.
+    :param truncate: Cut the file to this fraction of its size, like a copy that was interrupted.
+    """
+    header = bytearray(struct.pack("<ii", MAGIC, 2))
+    header += _attribute("channels", "chlist", _channel_list(channels))
+    header += _attribute("compression", "compression", b"\0")
+    header += _attribute("dataWindow", "box2i", struct.pack("<4i", 0, 0, width - 1, height - 1))
+    header += _attribute("displayWindow", "box2i", struct.pack("<4i", 0, 0, width - 1, height - 1))
+    header += _attribute("lineOrder", "lineOrder", b"\0")
+    header += _attribute("pixelAspectRatio", "float", struct.pack("<f", 1.0))
+    header += _attribute("screenWindowCenter", "v2f", struct.pack("<2f", 0.0, 0.0))
+    header += _attribute("screenWindowWidth", "float", struct.pack("<f", 1.0))
+    header += _attribute("BlenderMultiChannel", "string", b"Blender V2.55.1 and newer")
+    for name, value in (metadata or {}).items():
+        header += _attribute(name, "string", str(value).encode())
+    header += b"\0"
+
+    line = bytes(width * 2 * len(channels))
+    chunk_size = 8 + len(line)
+    first_chunk = len(header) + 8 * height
+    offsets = struct.pack(f"<{height}Q", *(first_chunk + y * chunk_size for y in range(height)))
+    chunks = b"".join(struct.pack("<ii", y, len(line)) + line for y in range(height))
+
+    data = bytes(header) + offsets + chunks
+    if truncate is not None:
+        data = data[:int(len(data) * truncate)]
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Blender executable, for benchmarks and local testing.
+
+Point BLENDER_EXE at this file. It understands the command lines the app
+builds (-b, -S, -F, -x, -t, -o, -s/-e/-a, -f, --python, --python-expr) and prints a
+Cycles-style render log, or replays a recorded one. As in Blender, arguments
+apply in order: files are written in the format of -F or of a --python-expr
+profile script, whichever comes later, else in the scene's format; the script's resolution_percentage scales the frame time by the pixel count. Behaviour is configured through
+environment variables, since the command line has to look like Blender's:
+
+    FAKE_BLENDER_LOG             Recorded log to replay for every frame (frame numbers and paths are rewritten)
+    FAKE_BLENDER_FRAME_SECONDS   Time each frame takes at 100% resolution (default 0.05)
+    FAKE_BLENDER_HEAVY_FRAMES    Frames that take longer, as START-END:FACTOR (e.g. 400-450:20)
+    FAKE_BLENDER_SAMPLES         Progress lines per frame for synthetic logs (default 16)
+    FAKE_BLENDER_LINE_RATE       Progress lines per second, overrides FAKE_BLENDER_SAMPLES
+    FAKE_BLENDER_STDERR_BYTES    Bytes of stderr noise per frame (default 0)
+    FAKE_BLENDER_CRASH_FRAME     Frame on which to crash
+    FAKE_BLENDER_CRASH_MODE      "segfault" (default, dies from SIGSEGV), "oom" (out-of-memory error, then
+                                 SIGKILL) or "error" (exits with code 1)
+    FAKE_BLENDER_CRASH_TIMES     Only crash this many times per parent process, so retries can succeed
+    FAKE_BLENDER_WRITE_OUTPUT    Set to 1 to write a file for every frame to the -o pattern (a valid EXR
+                                 with a RenderTime stamp for the OPEN_EXR formats, zeros otherwise)
+    FAKE_BLENDER_OUTPUT_BYTES    Size of those files (default 4096)
+    FAKE_BLENDER_CORRUPT_FRAME   Frame whose output file is written truncated
+    FAKE_BLENDER_CORRUPT_TIMES   Only truncate it this many times per parent process
+    FAKE_BLENDER_STARTUP_SECONDS Startup delay before running a --python script (default 0)
+    FAKE_BLENDER_OPEN_SECONDS    Time to open each file in --python batch or serve mode (default 0)
+
+With --python it prints the scene settings the way blend_reader.py does in
+real Blender (one file, one JSON record per file with -- --batch LIST, or
+every scene with -- --inventory), read with the native .blend reader. With -- --serve it runs the query
+daemon's server (blender_utils/query_daemon.py) on the same reader.
+"""
+import os
+import re
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VERSION_BANNER = "Blender 4.2.3 LTS (hash 3e8a1e3a0f09 built 2024-10-15 01:28:45)"
+
+
+def env_float(name, default):
+    return float(os.environ.get(name) or default)
+
+
+def parse_frames(text):
+    """Parses Blender's -f syntax: '1..5,8,10..12'."""
+    frames = []
+    for part in text.split(","):
+        if ".." in part:
+            start, end = part.split("..")
+            frames.extend(range(int(start), int(end) + 1))
+        else:
+            frames.append(int(part))
+    return frames
+
+
+def parse_args(argv):
+    args = {"blend_file": None, "format": None, "extension": False, "output": None, "start": None, "end": None,
+            "frames": None, "animation": False, "python": None, "threads": None, "scene": None,
+            "python_expr": None, "script_args": []}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        value = argv[i + 1] if i + 1 < len(argv) else None
+        if arg == "--":
+            args["script_args"] = argv[i + 1:]
+            break
+        if arg.endswith(".blend"):
+            args["blend_file"] = arg
+        elif arg == "-S":
+            args["scene"], i = value, i + 1
+        elif arg == "-F":
+            args["format"], i = value, i + 1
+        elif arg == "-x":
+            args["extension"], i = value == "1", i + 1
+        elif arg == "-t":
+            args["threads"], i = value, i + 1
+        elif arg == "-o":
+            args["output"], i = value, i + 1
+        elif arg == "-s":
+            args["start"], i = int(value), i + 1
+        elif arg == "-e":
+            args["end"], i = int(value), i + 1
+        elif arg == "-f":
+            args["frames"], i = parse_frames(value), i + 1
+        elif arg == "-a":
+            args["animation"] = True
+        elif arg == "--python":
+            args["python"], i = value, i + 1
+        elif arg == "--python-expr":
+            args["python_expr"], i = value, i + 1
+            args["format"] = expr_setting(value, "file_format") or args["format"]  # Runs after an earlier -F
+        i += 1
+    return args
+
+
+def print_scene_info(blend_file):
+    """Prints what blend_reader.py prints when real Blender runs it."""
+    from blender_utils.blend_file import BlendFileError, read_blend_info
+    try:
+        info = read_blend_info(blend_file)
+    except (BlendFileError, OSError) as e:
+        print(f"Error: Cannot read file '{blend_file}': {e}")
+        return 1
+    print(f"Frame Range: {info['start_frame']}-{info['end_frame']}")
+    print(f"Output Path: {os.path.join(info['output_path'], info['render_filename'])}")
+    print(f"Frame Filename: {info['render_filename']}")
+    print(f"Image Format: {info['image_format']}")
+    print(f"Compression: {info['compression']}")
+    print(f"Compression Codec: {info['compression_codec']}")
+    print(f"Color Depth: {info['color_depth']}")
+    return 0
+
+
+def print_batch_records(list_file):
+    """Prints what blend_reader.py prints in batch mode: one JSON record per listed file."""
+    import json
+    from blender_utils.blend_file import BlendFileError, read_blend_info
+    from blender_utils.blend_reader import BATCH_RECORD_PREFIX
+
+    with open(list_file, encoding="utf-8") as f:
+        files = [line.strip() for line in f if line.strip()]
+    for path in files:
+        time.sleep(env_float("FAKE_BLENDER_OPEN_SECONDS", 0))
+        try:
+            record = {"file": path, "blend_info": read_blend_info(path)}
+        except (BlendFileError, OSError) as e:
+            record = {"file": path, "error": f"Cannot read file '{path}': {e}"}
+        print(BATCH_RECORD_PREFIX + json.dumps(record), flush=True)
+    return 0
+
+
+def print_inventory(blend_file):
+    """Prints what blend_reader.py prints in inventory mode."""
+    import json
+    from blender_utils.blend_file import BlendFileError, read_scene_inventory
+    from blender_utils.blend_reader import INVENTORY_PREFIX
+    try:
+        inventory = read_scene_inventory(blend_file)
+    except (BlendFileError, OSError) as e:
+        print(f"Error: Cannot read file '{blend_file}': {e}")
+        return 1
+    print(INVENTORY_PREFIX + json.dumps(inventory), flush=True)
+    return 0
+
+
+def serve_queries(script_args):
+    """Runs the query daemon's server with the native reader, taking FAKE_BLENDER_OPEN_SECONDS per file load."""
+    from blender_utils.blend_file import read_blend_info
+    from blender_utils.query_daemon import serve_main
+
+    loaded = None
+
+    def read(path):
+        nonlocal loaded
+        current = (path, os.stat(path).st_mtime_ns)
+        if current != loaded:
+            time.sleep(env_float("FAKE_BLENDER_OPEN_SECONDS", 0))
+            loaded = current
+        return read_blend_info(path)
+    return serve_main(script_args, read)
+
+
+def load_template(path):
+    """Splits a recorded log into its header and the lines of its first frame."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    first = next((i for i, line in enumerate(lines) if line.startswith("Fra:")), len(lines))
+    end = first
+    while end < len(lines) and not lines[end].startswith("Saved:"):
+        end += 1
+    if end + 1 < len(lines) and lines[end + 1].startswith(" Time:"):
+        end += 1
+    return lines[:first], lines[first:end + 1]
+
+
+def synthetic_frame(samples):
+    lines = []
+    for sample in range(1, samples + 1):
+        lines.append(f"Fra:{{frame}} Mem:{120 + sample * 0.01:.2f}M (Peak {180 + sample * 0.01:.2f}M) | "
+                     f"Time:00:{sample * 0.05:05.2f} | Remaining:00:{(samples - sample) * 0.05:05.2f} | "
+                     f"Mem:40.00M, Peak:40.00M | Scene, ViewLayer | Sample {sample}/{samples}")
+    lines.append("Saved: '{path}'")
+    lines.append(" Time: 00:01.00 (Saving: 00:00.02)")
+    return lines
+
+
+def should_crash(frame, kind="crashes"):
+    """Counts crashes (or corrupt files) in a file per parent process when FAKE_BLENDER_*_TIMES limits them."""
+    times = os.environ.get(f"FAKE_BLENDER_{'CRASH' if kind == 'crashes' else 'CORRUPT'}_TIMES")
+    if not times:
+        return True
+    import tempfile
+    counter = os.path.join(tempfile.gettempdir(), f"fake_blender_{kind}_{os.getppid()}_{frame}")
+    try:
+        with open(counter) as f:
+            crashes = int(f.read() or 0)
+    except OSError:
+        crashes = 0
+    if crashes >= int(times):
+        return False
+    with open(counter, "w") as f:
+        f.write(str(crashes + 1))
+    return True
+
+
+def crash(frame):
+    mode = os.environ.get("FAKE_BLENDER_CRASH_MODE", "segfault")
+    # Blender dies mid-frame, after reporting progress on it
+    print(f"Fra:{frame} Mem:40.00M (Peak 40.00M) | Time:00:00.01 | Mem:40.00M, Peak:40.00M | Scene, ViewLayer | "
+          f"Synchronizing object", flush=True)
+    if mode == "oom":
+        print("Error: System is out of GPU and shared host memory", flush=True)
+        os.kill(os.getpid(), getattr(signal, "SIGKILL", signal.SIGTERM))
+    if mode == "error":
+        print(f"Error: Fake render failure on frame {frame}", flush=True)
+        sys.exit(1)
+    print("Segmentation fault", flush=True)
+    print(f"Writing: /tmp/fake_blender_{os.getpid()}.crash.txt", flush=True)
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    except (ImportError, ValueError, OSError):
+        pass
+    signal.signal(signal.SIGSEGV, signal.SIG_DFL)
+    os.kill(os.getpid(), signal.SIGSEGV)
+    sys.exit(139)  # Platforms without SIGSEGV delivery
+
+
+def write_frame(path, file_format, size, seconds, corrupt):
+    """Writes one output file, an EXR stamped with its render time for the OpenEXR formats."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    truncate = 0.5 if corrupt else None
+    if file_format.startswith("OPEN_EXR"):
+        from benchmarks.exr_fixtures import exr_height_for_size, write_exr_fixture
+        stamp = f"{int(seconds // 60):02d}:{seconds % 60:05.2f}"
+        write_exr_fixture(path, height=exr_height_for_size(size), metadata={"RenderTime": stamp}, truncate=truncate)
+        return
+    with open(path, "wb") as f:
+        f.write(b"\0" * int(size * (truncate or 1)))
+
+
+def frame_factor(frame):
+    """Cost multiplier of a frame from FAKE_BLENDER_HEAVY_FRAMES."""
+    heavy = os.environ.get("FAKE_BLENDER_HEAVY_FRAMES")
+    if not heavy:
+        return 1.0
+    frames, _, factor = heavy.partition(":")
+    start, _, end = frames.partition("-")
+    return float(factor or 1) if int(start) <= frame <= int(end or start) else 1.0
+
+
+def expr_setting(expr, name):
+    """Value a --python-expr script assigns to a setting, e.g. 'resolution_percentage', or None."""
+    import ast
+    match = re.search(rf"\.{name} = (.+)$", expr or "", re.MULTILINE)
+    return ast.literal_eval(match.group(1)) if match else None
+
+
+def scene_format(blend_file):
+    from blender_utils.blend_file import BlendFileError, read_blend_info
+    try:
+        return read_blend_info(blend_file)["image_format"]
+    except (BlendFileError, OSError, KeyError):
+        return "OPEN_EXR_MULTILAYER"
+
+
+def render(args):
+    from blender_utils.frame_scan import FORMAT_EXTENSIONS, frame_path
+
+    file_format = args["format"] or scene_format(args["blend_file"])
+
+    if args["frames"] is not None:
+        frames = args["frames"]
+    elif args["animation"]:
+        frames = list(range(args["start"] or 1, (args["end"] or 250) + 1))
+    else:
+        frames = [args["start"] or 1]
+
+    frame_seconds = env_float("FAKE_BLENDER_FRAME_SECONDS", 0.05)
+    resolution = expr_setting(args["python_expr"], "resolution_percentage")
+    if resolution is not None:
+        frame_seconds *= (resolution / 100) ** 2
+    samples = int(env_float("FAKE_BLENDER_SAMPLES", 16))
+    line_rate = env_float("FAKE_BLENDER_LINE_RATE", 0)
+    if line_rate:
+        samples = max(1, int(line_rate * frame_seconds))
+    noise = b"x" * 99 + b"\n"
+    noise_lines = int(env_float("FAKE_BLENDER_STDERR_BYTES", 0)) // len(noise)
+    crash_frame = os.environ.get("FAKE_BLENDER_CRASH_FRAME")
+    corrupt_frame = os.environ.get("FAKE_BLENDER_CORRUPT_FRAME")
+    write_output = os.environ.get("FAKE_BLENDER_WRITE_OUTPUT") == "1" and args["output"]
+    output_bytes = int(env_float("FAKE_BLENDER_OUTPUT_BYTES", 4096))
+    extension = FORMAT_EXTENSIONS.get(file_format, "") if args["extension"] else ""
+    pattern = args["output"] or "/tmp/fake_render_####"
+
+    if os.environ.get("FAKE_BLENDER_LOG"):
+        header, template = load_template(os.environ["FAKE_BLENDER_LOG"])
+    else:
+        header, template = [], synthetic_frame(samples)
+    delay = frame_seconds / max(1, len(template))
+
+    out = sys.stdout
+    out.write("\n".join(header or [VERSION_BANNER, f'Read blend: "{args["blend_file"]}"']) + "\n")
+    for frame in frames:
+        if crash_frame is not None and frame == int(crash_frame) and should_crash(frame):
+            crash(frame)
+        path = frame_path(pattern, frame, extension)
+        factor = frame_factor(frame)
+        for line in template:
+            if line.startswith("Fra:"):
+                line = re.sub(r"^Fra:\d+", f"Fra:{frame}", line)
+            elif line.startswith("Saved:"):
+                if write_output:
+                    corrupt = (corrupt_frame is not None and frame == int(corrupt_frame)
+                               and should_crash(frame, "corrupt"))
+                    write_frame(path, file_format, output_bytes, frame_seconds * factor, corrupt)
+                line = f"Saved: '{path}'"
+            out.write(line.replace("{frame}", str(frame)) + "\n")
+            out.flush()
+            if delay:
+                time.sleep(delay * factor)
+        for _ in range(noise_lines):
+            sys.stderr.buffer.write(noise)
+        sys.stderr.flush()
+    out.write("\nBlender quit\n")
+    return 0
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args["python"]:
+        print(VERSION_BANNER)
+        time.sleep(env_float("FAKE_BLENDER_STARTUP_SECONDS", 0))
+        if args["script_args"][:1] == ["--batch"]:
+            return print_batch_records(args["script_args"][1])
+        if args["script_args"][:1] == ["--serve"]:
+            return serve_queries(args["script_args"])
+        if args["script_args"][:1] == ["--inventory"]:
+            return print_inventory(args["blend_file"])
+        return print_scene_info(args["blend_file"])
+    return render(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
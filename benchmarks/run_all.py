@@ -0,0 +1,408 @@
+"""
+Benchmark suite for the render pipeline, runnable without Blender.
+
+Run from the repository root:
+
+    python -m benchmarks.run_all                  # run and compare against benchmarks/baseline.json
+    python -m benchmarks.run_all --save-baseline  # run and store the results as the new baseline
+    python -m benchmarks.run_all --only pipeline
+
+Blender is replaced by benchmarks/fake_blender.py for the whole run. Results
+are compared metric by metric with the stored baseline; anything more than
+REGRESSION_TOLERANCE worse is flagged and makes the run exit with status 1.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_blender.py")
+os.environ["BLENDER_EXE"] = FAKE_BLENDER  # Read when blender_utils is imported
+
+from benchmarks.bench_log_parser import LOG_DIR, structured_parse
+from benchmarks.blend_fixtures import ensure_fixtures
+from benchmarks.exr_fixtures import write_exr_fixture
+from blender_utils.blend_cache import BlendInfoCache
+from blender_utils.blend_file import read_blend_info, read_scene_inventory
+from blender_utils.blend_reader import get_blend_info_from_blender, get_blend_infos_from_blender
+from blender_utils.exr_verify import verify_frame
+from blender_utils.farm import FarmConnection, FarmCoordinator, FarmWorker
+from blender_utils.governor import ResourceGovernor, check_admission
+from blender_utils.log_parser import SampleProgress
+from blender_utils.partition import plan_chunks, plan_job
+from blender_utils.query_daemon import BlendQueryDaemon
+from blender_utils.progress_bus import ProgressBus
+from blender_utils.render_history import RenderHistory
+from blender_utils.render_engine import (FrameRendered, FrameRenderStarted, RenderEngine, RenderJob,
+                                         RenderLogEvent, RenderOutput, RenderStarted)
+from blender_utils.settings_store import SettingsStore
+from blender_utils.staging import copy_verified
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+REGRESSION_TOLERANCE = 0.25
+UI_REFRESH_SECONDS = 0.1  # Same rate as the GUI's progress refresh loop
+
+# Metric name suffix -> whether bigger numbers are better
+HIGHER_IS_BETTER = {"_per_s": True, "_ms": False, "_mb": False, "_writes": False}
+
+
+def higher_is_better(metric):
+    for suffix, higher in HIGHER_IS_BETTER.items():
+        if metric.endswith(suffix):
+            return higher
+    return True
+
+
+def bench_log_parser():
+    results = {}
+    for name in ("cycles_sample", "eevee_sample"):
+        with open(os.path.join(LOG_DIR, f"{name}.log"), encoding="utf-8") as f:
+            lines = f.read().splitlines() * 200
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            structured_parse(lines)
+            timings.append(time.perf_counter() - start)
+        results[f"{name}_lines_per_s"] = len(lines) / min(timings)
+    return results
+
+
+def run_fake_render(blend_file, frames, workers, env):
+    """Renders with the fake Blender while a poller reads the progress bus like the GUI does."""
+    os.environ.update(env)
+    engine = RenderEngine()
+    bus = ProgressBus()
+    engine.subscribe(bus.publish)
+
+    lines = 0
+    rendered_at = {}  # frames_done -> when the FrameRendered event was published
+
+    def count(event):
+        nonlocal lines
+        if isinstance(event, RenderOutput):
+            lines += 1
+        elif isinstance(event, FrameRendered):
+            rendered_at[event.frames_done] = time.perf_counter()
+    engine.subscribe(count)
+
+    latencies = []
+
+    def poll():
+        shown = 0
+        while True:
+            state = bus.snapshot()
+            now = time.perf_counter()
+            for done in range(shown + 1, state.frames_done + 1):
+                if done in rendered_at:
+                    latencies.append(now - rendered_at[done])
+            shown = state.frames_done
+            if state.finished:
+                return
+            time.sleep(UI_REFRESH_SECONDS)
+
+    start = time.perf_counter()
+    engine.start(RenderJob(blend_file, 1, frames, output_file=os.path.join(tempfile.gettempdir(), "bench_####"),
+                           workers=workers))
+    poller = threading.Thread(target=poll)
+    poller.start()
+    engine.wait()
+    elapsed = time.perf_counter() - start
+    poller.join()
+    return lines, elapsed, latencies
+
+
+def bench_pipeline(blend_file):
+    env = {"FAKE_BLENDER_FRAME_SECONDS": "0", "FAKE_BLENDER_SAMPLES": "2000", "FAKE_BLENDER_STDERR_BYTES": "100000"}
+    lines, elapsed, latencies = run_fake_render(blend_file, frames=20, workers=2, env=env)
+    results = {
+        "engine_lines_per_s": lines / elapsed,
+        "ui_flush_latency_p50_ms": statistics.median(latencies) * 1000,
+        "ui_flush_latency_max_ms": max(latencies) * 1000,
+    }
+
+    # Memory is measured in a separate, shorter run since tracemalloc slows everything down
+    tracemalloc.start()
+    run_fake_render(blend_file, frames=4, workers=2, env=env)
+    results["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return results
+
+
+def bench_progress_bus():
+    """How many engine events per second the progress bus can fold into its state."""
+    job = RenderJob("bench.blend", 1, 1000)
+    bus = ProgressBus()
+    events = [RenderStarted(job, 1000, time.time())]
+    for frame in range(1, 1001):
+        events.append(FrameRenderStarted(job, 0, frame, time.time()))
+        events.extend(RenderLogEvent(job, 0, SampleProgress(frame, sample, 64)) for sample in range(1, 65))
+        events.extend(RenderOutput(job, 0, "noise", "stderr", time.time()) for _ in range(16))
+        events.append(FrameRendered(job, 0, frame, 1.0, frame, 1000, float(frame)))
+    start = time.perf_counter()
+    for event in events:
+        bus.publish(event)
+    return {"events_per_s": len(events) / (time.perf_counter() - start)}
+
+
+def bench_settings(directory):
+    path = os.path.join(directory, "bench_settings.json")
+    store = SettingsStore(path, debounce=0.05, max_delay=0.5)
+    updates = 5000
+    start = time.perf_counter()
+    for i in range(updates):
+        store.update(f"/projects/shot_{i % 200:03d}.blend", user_settings={"start_frame": i, "end_frame": i + 100})
+    update_seconds = time.perf_counter() - start
+    store.close()
+    disk_writes = store.save_count
+
+    # A single fsync is noisy, so time a few flushes of the same data
+    flushes = []
+    for i in range(7):
+        store.update("/projects/shot_000.blend", user_settings={"start_frame": i})
+        start = time.perf_counter()
+        store.flush()
+        flushes.append(time.perf_counter() - start)
+    store.close()
+    return {"updates_per_s": updates / update_seconds, "flush_ms": statistics.median(flushes) * 1000,
+            "disk_writes": disk_writes}
+
+
+def bench_blend_info(fixtures, directory):
+    results = {}
+    for name in ("small", "large"):
+        timings = []
+        for _ in range(10):
+            start = time.perf_counter()
+            read_blend_info(fixtures[name])
+            timings.append(time.perf_counter() - start)
+        results[f"native_{name}_ms"] = statistics.median(timings) * 1000
+
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        read_scene_inventory(fixtures["multi_scene"])
+        timings.append(time.perf_counter() - start)
+    results["native_inventory_ms"] = statistics.median(timings) * 1000
+
+    cache = BlendInfoCache(os.path.join(directory, "bench_cache.json"))
+    cache.get_or_load(fixtures["large"], read_blend_info)
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(200):
+            cache.get_or_load(fixtures["large"], read_blend_info)
+        rounds.append((time.perf_counter() - start) / 200)
+    results["cache_hit_ms"] = min(rounds) * 1000
+
+    start = time.perf_counter()
+    get_blend_info_from_blender(fixtures["small"])
+    results["subprocess_ms"] = (time.perf_counter() - start) * 1000
+
+    # One Blender session reading many files, per file, against one Blender per file above
+    files = [fixtures["small"], fixtures["large"]] * 4
+    start = time.perf_counter()
+    get_blend_infos_from_blender(files)
+    results["batch_subprocess_per_file_ms"] = (time.perf_counter() - start) / len(files) * 1000
+
+    # Re-reading a file through the warm query daemon
+    daemon = BlendQueryDaemon()
+    daemon.read(fixtures["small"])
+    timings = []
+    for _ in range(20):
+        start = time.perf_counter()
+        daemon.read(fixtures["small"])
+        timings.append(time.perf_counter() - start)
+    daemon.stop()
+    results["daemon_read_ms"] = statistics.median(timings) * 1000
+    return results
+
+
+def bench_farm(blend_file):
+    """A coordinator and three localhost workers rendering with the fake Blender."""
+    os.environ.update({"FAKE_BLENDER_FRAME_SECONDS": "0.02", "FAKE_BLENDER_SAMPLES": "16", "FAKE_BLENDER_STDERR_BYTES": "0"})
+    coordinator = FarmCoordinator("127.0.0.1", 0, token="", chunk_size=5)
+    job = RenderJob(blend_file, 1, 60, output_file=os.path.join(tempfile.gettempdir(), "bench_farm_####"))
+    coordinator.start(job)
+    workers = [FarmWorker("127.0.0.1", coordinator.port, name=f"bench-{i}", token="") for i in range(3)]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    coordinator.wait()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+
+    # Protocol overhead alone: heartbeats against a lease that doesn't exist
+    connection = FarmConnection("127.0.0.1", coordinator.port, "bench-probe")
+    timings = []
+    for _ in range(200):
+        begin = time.perf_counter()
+        connection.request("heartbeat", lease="none")
+        timings.append(time.perf_counter() - begin)
+    connection.close()
+    coordinator.stop()
+    return {"frames_per_s": coordinator.frames_done / elapsed,
+            "request_roundtrip_ms": statistics.median(timings) * 1000}
+
+
+def bench_exr_verify(directory):
+    """Checking one saved frame: a 1080p-tall multilayer EXR (2160 chunks) and a truncated copy."""
+    path = write_exr_fixture(os.path.join(directory, "bench_frame.exr"), width=16, height=2160,
+                             metadata={"RenderTime": "01:02.50"})
+    truncated = write_exr_fixture(os.path.join(directory, "bench_truncated.exr"), width=16, height=2160, truncate=0.9)
+    results = {}
+    for name, frame in (("frame", path), ("truncated", truncated)):
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            verify_frame(1, frame)
+            timings.append(time.perf_counter() - start)
+        results[f"{name}_ms"] = statistics.median(timings) * 1000
+    return results
+
+
+def bench_staging(directory):
+    """Moving a 64 MB frame from scratch to the output folder: copy, fsync and checksum read-back."""
+    source = os.path.join(directory, "bench_scratch_frame.exr")
+    with open(source, "wb") as f:
+        f.write(os.urandom(64 * 1024 * 1024))
+    target = os.path.join(directory, "bench_staged", "frame.exr")
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        copy_verified(source, target)
+        timings.append(time.perf_counter() - start)
+    return {"copy_mb_per_s": 64 / statistics.median(timings)}
+
+
+def bench_partition(blend_file, directory):
+    """
+    96 frames on 4 workers where frames 40-50 cost 20x: split by frame count, then by the cost each
+    frame had in that first run. Also the time to plan 10000 frames with a 20x heavy stretch.
+    """
+    os.environ.update({"FAKE_BLENDER_FRAME_SECONDS": "0.02", "FAKE_BLENDER_SAMPLES": "16",
+                       "FAKE_BLENDER_STDERR_BYTES": "0", "FAKE_BLENDER_HEAVY_FRAMES": "40-50:20"})
+    history_file = os.path.join(directory, "bench_partition_history.json")
+    if os.path.exists(history_file):
+        os.remove(history_file)
+    history = RenderHistory(history_file)
+    job = RenderJob(blend_file, 1, 96, output_file=os.path.join(directory, "bench_partition_####"), workers=4)
+    try:
+        engine = RenderEngine()
+        history.attach(engine)
+        count_split = engine.run(job).elapsed
+        planned, _ = plan_job(job, history)
+        cost_split = RenderEngine().run(planned).elapsed
+    finally:
+        os.environ.pop("FAKE_BLENDER_HEAVY_FRAMES", None)
+
+    frames = list(range(1, 10001))
+    costs = {frame: 20.0 if 4000 <= frame <= 4500 else 1.0 for frame in frames}
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        plan_chunks(frames, costs, 8)
+        timings.append(time.perf_counter() - start)
+    return {"count_split_ms": count_split * 1000, "cost_split_ms": cost_split * 1000,
+            "plan_10k_frames_ms": statistics.median(timings) * 1000}
+
+
+def bench_governor(blend_file, directory):
+    """The checks before a job and before each Blender launch, for a file with a known peak RAM and frame size."""
+    history = RenderHistory(os.path.join(directory, "bench_governor_history.json"))
+    history.record_peak(blend_file, 64 * 1024 ** 2)
+    history.record_size(blend_file, 4096)
+    job = RenderJob(blend_file, 1, 250, output_file=os.path.join(directory, "bench_governor_####"), workers=2)
+    engine = RenderEngine()
+    governor = ResourceGovernor(engine, history)
+    engine.emit(RenderStarted(job, job.total_frames, time.time()))
+    results = {}
+    for name, check in (("admission", lambda: check_admission(job, history)), ("gate", lambda: governor._gate(0))):
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            check()
+            timings.append(time.perf_counter() - start)
+        results[f"{name}_ms"] = statistics.median(timings) * 1000
+    return results
+
+
+def run(only=None):
+    directory = os.path.join(tempfile.gettempdir(), "bender_benchmarks")
+    fixtures = ensure_fixtures(os.path.join(tempfile.gettempdir(), "bender_blend_fixtures"))
+    os.makedirs(directory, exist_ok=True)
+
+    suites = {
+        "log_parser": bench_log_parser,
+        "pipeline": lambda: bench_pipeline(fixtures["small"]),
+        "progress_bus": bench_progress_bus,
+        "settings": lambda: bench_settings(directory),
+        "blend_info": lambda: bench_blend_info(fixtures, directory),
+        "farm": lambda: bench_farm(fixtures["small"]),
+        "exr_verify": lambda: bench_exr_verify(directory),
+        "staging": lambda: bench_staging(directory),
+        "partition": lambda: bench_partition(fixtures["small"], directory),
+        "governor": lambda: bench_governor(fixtures["small"], directory),
+    }
+    results = {}
+    for name, suite in suites.items():
+        if only and name not in only:
+            continue
+        print(f"⏱️ {name}...", flush=True)
+        for metric, value in suite().items():
+            results[f"{name}.{metric}"] = value
+    return results
+
+
+def compare(results, baseline):
+    """Prints results next to the baseline and returns the names of regressed metrics."""
+    regressions = []
+    print(f"\n{'metric':<44}{'result':>14}{'baseline':>14}{'change':>10}")
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if not base:
+            print(f"{metric:<44}{value:>14.2f}{'-':>14}{'':>10}")
+            continue
+        change = (value - base) / base
+        worse = -change if higher_is_better(metric) else change
+        flag = ""
+        if worse > REGRESSION_TOLERANCE:
+            flag = " ❌"
+            regressions.append(metric)
+        print(f"{metric:<44}{value:>14.2f}{base:>14.2f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Render pipeline benchmarks")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--only", nargs="+", help="Only run these suites")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump({metric: round(value, 3) for metric, value in sorted(baseline.items())}, f, indent=4)
+        print(f"💾 Baseline saved to {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"⚠️ {len(regressions)} metrics regressed by more than {REGRESSION_TOLERANCE:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,5 @@
+import sys
+
+from blender_utils.cli import main
+
+sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Reads the scene settings of every .blend file in a project folder at once.
+
+Files whose blend info cache entry still matches their contents are skipped.
+The rest are read with the native .blend reader, and whatever it can't decode
+is opened in one Blender session (or a small pool of them) instead of one
+Blender startup per file. The results go into the blend info cache and the
+settings store in bulk, so dropping any of those files in the GUI afterwards
+is instant.
+"""
+import dataclasses
+import logging
+import os
+
+from blender_utils.blend_cache import file_key, get_default_cache
+from blender_utils.blend_file import BlendFileError, read_blend_info
+from blender_utils.blend_reader import get_blend_infos_from_blender
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ScanReport:
+    results: dict = dataclasses.field(default_factory=dict)  # blend file -> blend_info, or None if unreadable
+    cached: int = 0
+    native: int = 0
+    blender: int = 0
+    failed: list = dataclasses.field(default_factory=list)
+
+
+def find_blend_files(directory, recursive=True):
+    """Returns the .blend files under directory as sorted absolute paths (backups like .blend1 are skipped)."""
+    directory = os.path.abspath(directory)
+    if not recursive:
+        return sorted(entry.path for entry in os.scandir(directory)
+                      if entry.is_file() and entry.name.endswith(".blend"))
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        found.extend(os.path.join(root, name) for name in files if name.endswith(".blend"))
+    return sorted(found)
+
+
+def default_user_settings(blend_info):
+    """User settings for a file that was never opened: everything as the scene has it."""
+    return {
+        "start_frame": blend_info["start_frame"],
+        "end_frame": blend_info["end_frame"],
+        "output_path": blend_info["output_path"],
+        "render_filename": blend_info["render_filename"],
+        "override_output": False
+    }
+
+
+def scan_folder(directory, cache=None, settings=None, processes=1, native=True, recursive=True):
+    """
+    Reads the scene settings of all .blend files in a folder and stores them in bulk.
+
+    :param directory: Project folder to scan.
+    :param cache: BlendInfoCache to check and fill; defaults to the process-wide cache.
+    :param settings: Optional SettingsStore; files not in it yet get an entry with default user settings.
+    :param processes: Blender instances to spread the files across when Blender has to read them.
+    :param native: Try the native .blend reader before Blender.
+    :param recursive: Include subfolders.
+    """
+    cache = cache or get_default_cache()
+    report = ScanReport()
+    keys = {}
+    pending = []
+    for blend_file in find_blend_files(directory, recursive):
+        try:
+            keys[blend_file] = key = file_key(blend_file)
+        except OSError as e:
+            logger.warning(f"⚠️ Skipping {blend_file}: {e}")
+            report.failed.append(blend_file)
+            continue
+        blend_info = cache.get(blend_file, key)
+        if blend_info is not None:
+            report.results[blend_file] = blend_info
+            report.cached += 1
+        else:
+            pending.append(blend_file)
+
+    new_entries = {}
+    remaining = []
+    for blend_file in pending:
+        if not native:
+            remaining.append(blend_file)
+            continue
+        try:
+            new_entries[blend_file] = read_blend_info(blend_file)
+            report.native += 1
+        except (BlendFileError, OSError) as e:
+            logger.debug(f"Native read of {blend_file} failed: {e}")
+            remaining.append(blend_file)
+
+    if remaining:
+        logger.info(f"🔄 Opening {len(remaining)} files in {min(processes, len(remaining))} Blender session(s)...")
+        for blend_file, blend_info in get_blend_infos_from_blender(remaining, processes).items():
+            if blend_info is None:
+                report.failed.append(blend_file)
+            else:
+                new_entries[blend_file] = blend_info
+                report.blender += 1
+
+    report.results.update(new_entries)
+    if new_entries:
+        cache.put_many({keys[blend_file]: blend_info for blend_file, blend_info in new_entries.items()})
+    if settings is not None:
+        # Files already in the store keep their entry, so the GUI still notices when they changed
+        for blend_file, blend_info in report.results.items():
+            if blend_file not in settings:
+                settings.update(blend_file, blend_info=blend_info, user_settings=default_user_settings(blend_info),
+                                file_key=keys[blend_file])
+    for blend_file in report.failed:
+        report.results.setdefault(blend_file, None)
+
+    logger.info(f"📂 Scanned {len(report.results)} files: {report.cached} cached, {report.native} read natively, "
+                f"{report.blender} read by Blender, {len(report.failed)} failed")
+    return report
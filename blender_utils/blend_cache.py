@@ -0,0 +1,203 @@
+"""
+Content-addressed cache for blend_info dictionaries.
+
+Entries are keyed by (size, mtime_ns, partial content hash) rather than by
+path, so moved files still hit, while touched or re-saved files miss. The
+cache is bounded and evicts the least recently used entry first. With a
+debounce, changes are written from a timer thread like the SettingsStore does,
+so a UI callback that caches a file never waits for the disk.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from blender_utils.json_io import atomic_write_json, read_json
+from blender_utils.log import timed
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed from the start, middle and end of the file
+SAMPLE_SIZE = 64 * 1024
+
+
+def file_key(blend_file):
+    """Returns the cache key for a file: 'size:mtime_ns:partial_hash'."""
+    st = os.stat(blend_file)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(blend_file, "rb") as f:
+        if st.st_size <= 3 * SAMPLE_SIZE:
+            digest.update(f.read())
+        else:
+            for offset in (0, st.st_size // 2, st.st_size - SAMPLE_SIZE):
+                f.seek(offset)
+                digest.update(f.read(SAMPLE_SIZE))
+    return f"{st.st_size}:{st.st_mtime_ns}:{digest.hexdigest()}"
+
+
+class BlendInfoCache:
+    """LRU cache of blend_info dictionaries, optionally persisted to a JSON file."""
+
+    def __init__(self, path=None, max_entries=256, debounce=None, max_delay=5.0):
+        """
+        :param path: JSON file the cache is persisted to, None to keep it in memory only.
+        :param max_entries: Number of entries kept, least recently used are dropped first.
+        :param debounce: Seconds of quiet after the last change before writing; None writes on every change.
+        :param max_delay: Upper bound on how long a change can stay unsaved while changes keep coming.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Keeps snapshots hitting the disk in order
+        self._timer = None
+        self._dirty_since = None
+
+        if path:
+            stored = read_json(path, default={})
+            for key, blend_info in stored.get("entries", {}).items():
+                self._entries[key] = blend_info
+            self._evict()
+
+    def get(self, blend_file, key=None):
+        """Returns the cached blend_info for the file's current contents, or None."""
+        key = key or file_key(blend_file)
+        with self._lock:
+            blend_info = self._entries.get(key)
+            if blend_info is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(blend_info)
+
+    def put(self, blend_file, blend_info, key=None):
+        """Stores blend_info under the file's current key."""
+        key = key or file_key(blend_file)
+        with self._lock:
+            self._entries[key] = dict(blend_info)
+            self._entries.move_to_end(key)
+            self._evict()
+        self._changed()
+
+    def put_many(self, entries):
+        """Stores {file key: blend_info} pairs and saves once."""
+        with self._lock:
+            for key, blend_info in entries.items():
+                self._entries[key] = dict(blend_info)
+                self._entries.move_to_end(key)
+            self._evict()
+        self._changed()
+
+    def get_or_load(self, blend_file, loader):
+        """Returns cached info or calls loader(blend_file) and caches a non-None result; None if the file can't be read."""
+        try:
+            key = file_key(blend_file)
+        except OSError as e:
+            logger.warning(f"⚠️ Can't read {blend_file}: {e}")
+            return None
+        blend_info = self.get(blend_file, key)
+        if blend_info is None:
+            blend_info = loader(blend_file)
+            if blend_info is not None:
+                self.put(blend_file, blend_info, key)
+        return blend_info
+
+    def invalidate(self, blend_file):
+        try:
+            key = file_key(blend_file)
+        except OSError:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+        self._changed()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _changed(self):
+        if not self.path:
+            return
+        if self.debounce is None:
+            self.save()
+        else:
+            self.schedule_save()
+
+    def schedule_save(self):
+        """Arms (or re-arms) the debounce timer."""
+        with self._lock:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            if self._timer is not None:
+                if now - self._dirty_since >= self.max_delay:
+                    return  # Let the pending timer fire instead of postponing it again
+                self._timer.cancel()
+            delay = min(self.debounce, max(0.0, self._dirty_since + self.max_delay - now))
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes pending changes to disk now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty_since is None:
+                return
+            self._dirty_since = None
+        self.save()
+
+    def close(self):
+        """Flushes pending changes; call before the application exits."""
+        self.flush()
+
+    @timed("blend_cache.save")
+    def save(self):
+        if not self.path:
+            return
+        with self._write_lock:
+            with self._lock:
+                data = {"entries": dict(self._entries)}
+            try:
+                atomic_write_json(self.path, data, indent=None)
+            except OSError as e:
+                logger.error(f"Error saving blend info cache: {e}")
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache = None
+
+
+def configure_default_cache(path=None, max_entries=256, debounce=None):
+    """Replaces the process-wide cache used by get_blend_info."""
+    global _default_cache
+    _default_cache = BlendInfoCache(path, max_entries, debounce)
+    return _default_cache
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BlendInfoCache()
+    return _default_cache
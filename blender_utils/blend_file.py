@@ -0,0 +1,558 @@
+"""
+Pure-Python reader for the .blend file format.
+
+Parses the file header, the file-block index and the SDNA (struct DNA) so that
+scene and render settings can be read straight from disk without starting
+Blender. Uncompressed files are memory-mapped and only the blocks that are
+actually needed are decoded; gzip and zstd compressed files are decompressed
+into memory first.
+"""
+import gzip
+import mmap
+import os
+import struct
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Python enum names used by bpy for ImageFormatData.imtype
+IMAGE_TYPES = {
+    0: "TARGA", 1: "IRIS", 4: "JPEG", 14: "TARGA_RAW", 15: "AVI_RAW", 16: "AVI_JPEG",
+    17: "PNG", 20: "BMP", 21: "HDR", 22: "TIFF", 23: "OPEN_EXR", 24: "FFMPEG",
+    26: "CINEON", 27: "DPX", 28: "OPEN_EXR_MULTILAYER", 29: "DDS", 30: "JPEG2000",
+    31: "H264", 32: "XVID", 33: "THEORA", 34: "PSD", 35: "WEBP",
+}
+
+# ImageFormatData.depth is a bit flag, bpy exposes it as a string
+COLOR_DEPTHS = {1: "1", 2: "8", 4: "10", 8: "12", 16: "16", 32: "24", 64: "32"}
+
+EXR_CODECS = ["NONE", "PXR24", "ZIP", "PIZ", "RLE", "ZIPS", "B44", "B44A", "DWAA", "DWAB"]
+
+OB_CAMERA = 11  # Object.type of camera objects
+VIEW_LAYER_RENDER = 1  # ViewLayer.flag bit behind ViewLayer.use
+IDP_INT = 1
+IDP_GROUP = 6
+
+# Cycles keeps its settings in an ID property group that only stores values changed from the default
+CYCLES_DEFAULT_SAMPLES = 4096
+
+# DNA primitive types that can be decoded with the struct module
+_PRIMITIVE_FORMATS = {
+    "char": "b", "uchar": "B", "int8_t": "b", "uint8_t": "B", "bool": "?",
+    "short": "h", "ushort": "H", "int16_t": "h", "uint16_t": "H",
+    "int": "i", "uint": "I", "int32_t": "i", "uint32_t": "I",
+    "float": "f", "double": "d",
+    "int64_t": "q", "uint64_t": "Q",
+}
+
+
+class BlendFileError(Exception):
+    """Raised when a file cannot be read as a .blend file."""
+
+
+class BlendBlock:
+    """A file-block header together with the offset of its data."""
+
+    __slots__ = ("code", "size", "old_address", "sdna_index", "count", "data_offset")
+
+    def __init__(self, code, size, old_address, sdna_index, count, data_offset):
+        self.code = code
+        self.size = size
+        self.old_address = old_address
+        self.sdna_index = sdna_index
+        self.count = count
+        self.data_offset = data_offset
+
+    def __repr__(self):
+        return f"BlendBlock({self.code!r}, size={self.size}, sdna={self.sdna_index}, count={self.count})"
+
+
+class DNAField:
+    """A single member of a DNA struct."""
+
+    __slots__ = ("name", "type_name", "offset", "size", "array_length", "is_pointer")
+
+    def __init__(self, name, type_name, offset, size, array_length, is_pointer):
+        self.name = name
+        self.type_name = type_name
+        self.offset = offset
+        self.size = size
+        self.array_length = array_length
+        self.is_pointer = is_pointer
+
+
+class DNAStruct:
+    """Field layout of a DNA struct."""
+
+    def __init__(self, name, size, fields):
+        self.name = name
+        self.size = size
+        self.fields = {field.name: field for field in fields}
+
+    def field(self, name):
+        try:
+            return self.fields[name]
+        except KeyError:
+            raise BlendFileError(f"DNA struct {self.name} has no field '{name}'") from None
+
+
+def parse_field_name(raw_name):
+    """Splits a DNA member name like '*next', 'mat[4][4]' or '(*func)()' into (name, array_length, is_pointer)."""
+    is_pointer = "*" in raw_name
+    array_length = 1
+    name = raw_name
+    if name.startswith("(*"):  # Function pointer
+        name = name[2:name.index(")")]
+    else:
+        name = name.lstrip("*")
+    if "[" in name:
+        base, _, dims = name.partition("[")
+        for dim in dims.rstrip("]").split("]["):
+            array_length *= int(dim)
+        name = base
+    return name, array_length, is_pointer
+
+
+def _align4(offset):
+    return (offset + 3) & ~3
+
+
+class SDNA:
+    """Decoded 'DNA1' block: names, types, type lengths and struct layouts."""
+
+    def __init__(self, data, endian, pointer_size):
+        self.endian = endian
+        self.pointer_size = pointer_size
+        if data[:4] != b"SDNA":
+            raise BlendFileError("DNA1 block does not start with SDNA")
+
+        offset = 4
+        self.names, offset = self._read_string_table(data, offset, b"NAME")
+        self.types, offset = self._read_string_table(data, offset, b"TYPE")
+
+        offset = _align4(offset)
+        if data[offset:offset + 4] != b"TLEN":
+            raise BlendFileError("SDNA is missing the TLEN section")
+        offset += 4
+        self.type_lengths = list(struct.unpack_from(f"{endian}{len(self.types)}H", data, offset))
+        offset = _align4(offset + 2 * len(self.types))
+
+        if data[offset:offset + 4] != b"STRC":
+            raise BlendFileError("SDNA is missing the STRC section")
+        struct_count = struct.unpack_from(f"{endian}i", data, offset + 4)[0]
+        offset += 8
+
+        self._raw_structs = []
+        self.struct_index = {}
+        for index in range(struct_count):
+            type_index, field_count = struct.unpack_from(f"{endian}2H", data, offset)
+            offset += 4
+            members = struct.unpack_from(f"{endian}{2 * field_count}H", data, offset)
+            offset += 4 * field_count
+            self._raw_structs.append((type_index, members))
+            self.struct_index[self.types[type_index]] = index
+
+        self._structs = {}
+
+    def _read_string_table(self, data, offset, tag):
+        offset = _align4(offset)
+        if data[offset:offset + 4] != tag:
+            raise BlendFileError(f"SDNA is missing the {tag.decode()} section")
+        count = struct.unpack_from(f"{self.endian}i", data, offset + 4)[0]
+        offset += 8
+        strings = []
+        for _ in range(count):
+            end = data.index(b"\0", offset)
+            strings.append(bytes(data[offset:end]).decode("latin-1"))
+            offset = end + 1
+        return strings, offset
+
+    def struct(self, key):
+        """Returns the DNAStruct for a struct index or struct type name."""
+        index = self.struct_index[key] if isinstance(key, str) else key
+        cached = self._structs.get(index)
+        if cached is not None:
+            return cached
+
+        type_index, members = self._raw_structs[index]
+        fields = []
+        offset = 0
+        for i in range(0, len(members), 2):
+            field_type = self.types[members[i]]
+            name, array_length, is_pointer = parse_field_name(self.names[members[i + 1]])
+            if is_pointer:
+                size = self.pointer_size * array_length
+            else:
+                size = self.type_lengths[members[i]] * array_length
+            fields.append(DNAField(name, field_type, offset, size, array_length, is_pointer))
+            offset += size
+
+        dna_struct = DNAStruct(self.types[type_index], self.type_lengths[type_index], fields)
+        self._structs[index] = dna_struct
+        return dna_struct
+
+    def has_struct(self, name):
+        return name in self.struct_index
+
+
+class BlendFile:
+    """
+    Read-only view of a .blend file.
+
+    Use as a context manager so the memory map is released:
+
+        with BlendFile(path) as blend:
+            scene = blend.active_scene()
+            start = blend.get(scene, "r.sfra")
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._mmap = None
+        self._blocks_by_address = None
+        self.compression = None
+        self.buffer = None
+        try:
+            self.buffer = self._open(path)
+            self._read_header()
+            self.blocks = self._index_blocks()
+            dna_block = self.find_block(b"DNA1")
+            if dna_block is None:
+                raise BlendFileError("File has no DNA1 block")
+            self.dna = SDNA(bytes(self.block_data(dna_block)), self.endian, self.pointer_size)
+        except (struct.error, ValueError, IndexError) as e:
+            self.close()
+            raise BlendFileError(f"Corrupt .blend file: {e}") from e
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, path):
+        with open(path, "rb") as f:
+            magic = f.read(4)
+            if magic[:2] == GZIP_MAGIC:
+                self.compression = "gzip"
+                f.seek(0)
+                with gzip.GzipFile(fileobj=f) as gz:
+                    return gz.read()
+            if magic == ZSTD_MAGIC:
+                self.compression = "zstd"
+                f.seek(0)
+                return _zstd_decompress(f)
+
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            raise BlendFileError("File is empty")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _read_header(self):
+        header = bytes(self.buffer[:17])
+        if header[:7] != b"BLENDER":
+            raise BlendFileError("Not a .blend file (missing BLENDER magic)")
+
+        if header[7:9].isdigit():
+            # Blender 4.2+ header: BLENDER17-01v0405
+            self.header_size = int(header[7:9])
+            if header[9:10] != b"-":
+                raise BlendFileError("Unsupported pointer size in .blend header")
+            self.pointer_size = 8
+            self.file_format_version = int(header[10:12])
+            endian_code = header[12:13]
+            self.version = int(header[13:17])
+        else:
+            # Legacy header: BLENDER-v293
+            self.header_size = 12
+            self.pointer_size = 8 if header[7:8] == b"-" else 4
+            self.file_format_version = 0
+            endian_code = header[8:9]
+            self.version = int(header[9:12])
+
+        self.endian = "<" if endian_code == b"v" else ">"
+        if self.file_format_version == 1:
+            # LargeBHead8: code, SDNAnr, old, len, nr
+            self._bhead = struct.Struct(f"{self.endian}4siQqq")
+        elif self.pointer_size == 8:
+            self._bhead = struct.Struct(f"{self.endian}4siQii")
+        else:
+            self._bhead = struct.Struct(f"{self.endian}4siIii")
+
+    def _index_blocks(self):
+        """Walks the file-block headers only, skipping over block data."""
+        blocks = []
+        offset = self.header_size
+        end = len(self.buffer)
+        bhead = self._bhead
+        large = self.file_format_version == 1
+        while offset + bhead.size <= end:
+            if large:
+                code, sdna_index, old, size, count = bhead.unpack_from(self.buffer, offset)
+            else:
+                code, size, old, sdna_index, count = bhead.unpack_from(self.buffer, offset)
+            offset += bhead.size
+            if code == b"ENDB":
+                break
+            if size < 0 or offset + size > end:
+                raise BlendFileError(f"Truncated block {code!r} at offset {offset}")
+            blocks.append(BlendBlock(code, size, old, sdna_index, count, offset))
+            offset += size
+        return blocks
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def find_block(self, code):
+        for block in self.blocks:
+            if block.code == code:
+                return block
+        return None
+
+    def find_blocks(self, code):
+        return [block for block in self.blocks if block.code == code]
+
+    def block_at(self, address):
+        """Returns the block whose old memory address matches a stored pointer."""
+        if not address:
+            return None
+        if self._blocks_by_address is None:
+            self._blocks_by_address = {block.old_address: block for block in self.blocks}
+        return self._blocks_by_address.get(address)
+
+    def block_data(self, block):
+        return memoryview(self.buffer)[block.data_offset:block.data_offset + block.size]
+
+    def block_struct(self, block):
+        return self.dna.struct(block.sdna_index)
+
+    def resolve(self, block, path, index=0):
+        """Resolves a dotted field path ('r.im_format.imtype') to (field, absolute offset)."""
+        dna_struct = self.block_struct(block)
+        offset = block.data_offset + index * dna_struct.size
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            field = dna_struct.field(part)
+            offset += field.offset
+            if i < len(parts) - 1:
+                if field.is_pointer or not self.dna.has_struct(field.type_name):
+                    raise BlendFileError(f"Field '{part}' in {dna_struct.name} is not an embedded struct")
+                dna_struct = self.dna.struct(field.type_name)
+        return field, offset
+
+    def get(self, block, path, index=0):
+        """Decodes a primitive, pointer or char-array field of a block."""
+        field, offset = self.resolve(block, path, index)
+        if field.is_pointer:
+            fmt = "Q" if self.pointer_size == 8 else "I"
+            if field.array_length == 1:
+                return struct.unpack_from(self.endian + fmt, self.buffer, offset)[0]
+            return list(struct.unpack_from(f"{self.endian}{field.array_length}{fmt}", self.buffer, offset))
+
+        if field.type_name == "char" and field.array_length > 1:
+            raw = bytes(self.buffer[offset:offset + field.size])
+            return raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+        fmt = _PRIMITIVE_FORMATS.get(field.type_name)
+        if fmt is None:
+            raise BlendFileError(f"Cannot decode field '{path}' of type {field.type_name}")
+        if field.array_length == 1:
+            return struct.unpack_from(self.endian + fmt, self.buffer, offset)[0]
+        return list(struct.unpack_from(f"{self.endian}{field.array_length}{fmt}", self.buffer, offset))
+
+    def id_name(self, block):
+        """Returns an ID block's name without its two-letter type prefix."""
+        return self.get(block, "id.name")[2:]
+
+    def iter_list(self, block, path):
+        """Yields the blocks of a ListBase field ('view_layers', 'data.group', ...) in order."""
+        address = self.get(block, path + ".first")
+        seen = set()
+        while address and address not in seen:
+            seen.add(address)
+            item = self.block_at(address)
+            if item is None:
+                return
+            yield item
+            address = self.get(item, "next")
+
+    def id_property(self, block, *names):
+        """Follows ID properties by name ('cycles', 'samples') and returns the IDProperty block, or None."""
+        for field in ("id.system_properties", "id.properties"):
+            try:
+                prop = self.block_at(self.get(block, field))
+            except BlendFileError:
+                continue
+            for name in names:
+                if prop is None or self.get(prop, "type") != IDP_GROUP:
+                    prop = None
+                    break
+                prop = next((child for child in self.iter_list(prop, "data.group")
+                             if self.get(child, "name") == name), None)
+            if prop is not None:
+                return prop
+        return None
+
+    def active_scene(self):
+        """Returns the scene Blender would use as bpy.context.scene in background mode."""
+        glob = self.find_block(b"GLOB")
+        if glob is not None:
+            try:
+                scene = self.block_at(self.get(glob, "curscene"))
+            except BlendFileError:
+                scene = None
+            if scene is not None:
+                return scene
+        scene = self.find_block(b"SC\0\0")
+        if scene is None:
+            raise BlendFileError("File contains no scene")
+        return scene
+
+
+def _zstd_decompress(fileobj):
+    """Decompresses a (possibly multi-frame) zstd stream with whichever zstd binding is available."""
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.decompress(fileobj.read())
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise BlendFileError("zstd-compressed .blend files need the 'zstandard' package") from None
+    with zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True) as reader:
+        return reader.read()
+
+
+def blender_abspath(path, blend_file):
+    """Mirrors bpy.path.abspath for '//' relative paths."""
+    if path.startswith("//"):
+        return os.path.join(os.path.dirname(os.path.abspath(blend_file)), path[2:])
+    return path
+
+
+def scene_render_settings(blend, scene, blend_file):
+    """Returns the blend_info dictionary (frame range and output settings) of one scene block."""
+    start_frame = blend.get(scene, "r.sfra")
+    end_frame = blend.get(scene, "r.efra")
+    frame_filepath = blender_abspath(blend.get(scene, "r.pic"), blend_file)
+    imtype = blend.get(scene, "r.im_format.imtype")
+    depth = blend.get(scene, "r.im_format.depth")
+    compression = blend.get(scene, "r.im_format.compress")
+    exr_codec = blend.get(scene, "r.im_format.exr_codec")
+
+    image_format = IMAGE_TYPES.get(imtype, str(imtype))
+    compression_codec = "N/A"
+    if image_format in ["OPEN_EXR", "OPEN_EXR_MULTILAYER"]:
+        compression_codec = EXR_CODECS[exr_codec] if 0 <= exr_codec < len(EXR_CODECS) else str(exr_codec)
+
+    frame_directory, frame_filename = os.path.split(frame_filepath)
+    return {
+        "start_frame": start_frame,
+        "end_frame": end_frame,
+        "output_path": frame_directory,
+        "render_filename": frame_filename,
+        "image_format": image_format,
+        "compression": compression,
+        "compression_codec": compression_codec,
+        "color_depth": COLOR_DEPTHS.get(depth, str(depth)),
+    }
+
+
+def read_blend_info(blend_file):
+    """
+    Reads the active scene's render settings directly from a .blend file.
+
+    Returns the same dictionary as get_blend_info. Raises BlendFileError if the
+    file cannot be decoded.
+    """
+    with BlendFile(blend_file) as blend:
+        return scene_render_settings(blend, blend.active_scene(), blend_file)
+
+
+def _scene_samples(blend, scene, engine):
+    if engine.startswith("BLENDER_EEVEE"):
+        return blend.get(scene, "eevee.taa_render_samples")
+    if engine == "CYCLES":
+        prop = blend.id_property(scene, "cycles", "samples")
+        if prop is not None and blend.get(prop, "type") == IDP_INT:
+            return blend.get(prop, "data.val")
+        return CYCLES_DEFAULT_SAMPLES
+    return None  # Workbench and third-party engines
+
+
+def _scene_cameras(blend, scene):
+    """Names of the camera objects in a scene's collection hierarchy, sorted."""
+    cameras = set()
+    pending = [blend.block_at(blend.get(scene, "master_collection"))]
+    seen = set()
+    while pending:
+        collection = pending.pop()
+        if collection is None or collection.old_address in seen:
+            continue
+        seen.add(collection.old_address)
+        for item in blend.iter_list(collection, "gobject"):
+            obj = blend.block_at(blend.get(item, "ob"))
+            if obj is not None and blend.get(obj, "type") == OB_CAMERA:
+                cameras.add(blend.id_name(obj))
+        pending.extend(blend.block_at(blend.get(child, "collection"))
+                       for child in blend.iter_list(collection, "children"))
+    return sorted(cameras)
+
+
+def read_scene_inventory(blend_file):
+    """
+    Reads every scene of a .blend file in one pass.
+
+    Returns {"active_scene": name, "scenes": [scene dict, ...]} where each scene
+    dict holds the blend_info keys plus name, frame_step, resolution, engine,
+    samples, camera, cameras and view_layers. Parts that older files don't
+    store are left empty. Raises BlendFileError if the file cannot be decoded.
+    """
+    with BlendFile(blend_file) as blend:
+        active = blend.active_scene()
+        scenes = []
+        for scene in blend.find_blocks(b"SC\0\0"):
+            info = scene_render_settings(blend, scene, blend_file)
+            engine = blend.get(scene, "r.engine")
+            info.update({
+                "name": blend.id_name(scene),
+                "frame_step": blend.get(scene, "r.frame_step"),
+                "resolution_x": blend.get(scene, "r.xsch"),
+                "resolution_y": blend.get(scene, "r.ysch"),
+                "resolution_percentage": blend.get(scene, "r.size"),
+                "engine": engine,
+                "samples": None,
+                "camera": None,
+                "cameras": [],
+                "view_layers": [],
+            })
+            try:
+                info["samples"] = _scene_samples(blend, scene, engine)
+            except BlendFileError:
+                pass
+            try:
+                camera = blend.block_at(blend.get(scene, "camera"))
+                info["camera"] = blend.id_name(camera) if camera is not None else None
+                info["cameras"] = _scene_cameras(blend, scene)
+            except BlendFileError:
+                pass
+            try:
+                info["view_layers"] = [{"name": blend.get(layer, "name"),
+                                        "use": bool(blend.get(layer, "flag") & VIEW_LAYER_RENDER)}
+                                       for layer in blend.iter_list(scene, "view_layers")]
+            except BlendFileError:
+                pass
+            scenes.append(info)
+        return {"active_scene": blend.id_name(active), "scenes": scenes}
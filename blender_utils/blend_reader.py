@@ -1,24 +1,75 @@
+import logging
 import subprocess
 import os
 
+logger = logging.getLogger(__name__)
 
-def get_blend_info(blend_file):
+# Can be pointed at another Blender build (or a stand-in) through the environment
+BLENDER_EXE = os.environ.get("BLENDER_EXE", "/Applications/Blender.app/Contents/MacOS/Blender")
+
+# Marks the per-file JSON lines this script prints in batch mode
+BATCH_RECORD_PREFIX = "BLEND_INFO_JSON: "
+# Marks the JSON line this script prints in inventory mode
+INVENTORY_PREFIX = "SCENE_INVENTORY_JSON: "
+
+_query_daemon = None
+
+
+def set_query_daemon(daemon):
+    """Sends reads the native reader can't handle to a warm BlendQueryDaemon instead of a new Blender (None to stop)."""
+    global _query_daemon
+    _query_daemon = daemon
+
+
+def get_blend_info(blend_file, use_cache=True):
+    """Returns the scene render settings, from the blend info cache when the file is unchanged."""
+    # Imported here because Blender executes this file as a standalone script
+    from blender_utils.blend_cache import get_default_cache
+    from blender_utils.log import span
+
+    with span("get_blend_info"):
+        if not use_cache:
+            return read_blend_info_uncached(blend_file)
+
+        cache = get_default_cache()
+        blend_info = cache.get_or_load(blend_file, read_blend_info_uncached)
+    stats = cache.stats()
+    logger.debug(f"📦 Blend info cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    return blend_info
+
+
+def read_blend_info_uncached(blend_file):
+    """Reads the scene render settings from disk, falling back to Blender if the file can't be decoded."""
+    from blender_utils.blend_file import BlendFileError, read_blend_info
+
+    try:
+        blend_info = read_blend_info(blend_file)
+        logger.info(f"⚡ Read scene settings natively from {os.path.basename(blend_file)}")
+        return blend_info
+    except (BlendFileError, OSError) as e:
+        logger.warning(f"⚠️ Native .blend read failed ({e}), falling back to Blender...")
+
+    if _query_daemon is not None:
+        blend_info = _query_daemon.read(blend_file)
+        if blend_info is not None:
+            return blend_info
+    return get_blend_info_from_blender(blend_file)
+
+
+def get_blend_info_from_blender(blend_file):
     """Runs Blender in background mode to extract scene frame range."""
 
-    blender_exe = "/Applications/Blender.app/Contents/MacOS/Blender"
     script_path = os.path.abspath(__file__)  # Get the full path to this script
 
     command = [
-        blender_exe, "-b", blend_file, "--python", script_path
+        BLENDER_EXE, "-b", blend_file, "--python", script_path
     ]
 
     # Run Blender and capture output
     result = subprocess.run(command, capture_output=True, text=True)
 
     # Print Blender's output for debugging
-    print("Blender Output:")
-    print(result.stdout)
-    print(result.stderr)
+    logger.debug(f"Blender Output:\n{result.stdout}\n{result.stderr}")
 
     # Extract render details from Blender's output
     frame_range = None
@@ -48,14 +99,14 @@ def get_blend_info(blend_file):
 
 
     # Print extracted values summary
-    print("\n📜 **Extraction Summary:**")
-    print(f"✅ Frame Range: {frame_range}" if frame_range else "❌ Frame Range: MISSING")
-    print(f"✅ Output Path: {output_path}" if output_path else "❌ Output Path: MISSING")
-    print(f"✅ Frame Filename: {frame_filename}" if frame_filename else "❌ Frame Filename: MISSING")
-    print(f"✅ Image Format: {image_format}" if image_format else "❌ Image Format: MISSING")
-    print(f"✅ Compression: {compression}" if compression else "❌ Compression: MISSING")
-    print(f"✅ Compression Codec: {compression_codec}" if compression else "❌ Compression Codec: MISSING")
-    print(f"✅ Color Depth: {color_depth}" if color_depth else "❌ Color Depth: MISSING")
+    logger.info("📜 **Extraction Summary:**")
+    logger.info(f"✅ Frame Range: {frame_range}" if frame_range else "❌ Frame Range: MISSING")
+    logger.info(f"✅ Output Path: {output_path}" if output_path else "❌ Output Path: MISSING")
+    logger.info(f"✅ Frame Filename: {frame_filename}" if frame_filename else "❌ Frame Filename: MISSING")
+    logger.info(f"✅ Image Format: {image_format}" if image_format else "❌ Image Format: MISSING")
+    logger.info(f"✅ Compression: {compression}" if compression else "❌ Compression: MISSING")
+    logger.info(f"✅ Compression Codec: {compression_codec}" if compression else "❌ Compression Codec: MISSING")
+    logger.info(f"✅ Color Depth: {color_depth}" if color_depth else "❌ Color Depth: MISSING")
 
     # # Print final success or failure message
     # if missing_fields:
@@ -76,16 +127,158 @@ def get_blend_info(blend_file):
             "color_depth": color_depth
         }
     else:
-        print("Error: Could not extract all render information.")
+        logger.error("Error: Could not extract all render information.")
         return None
 
 
+def get_blend_infos_from_blender(blend_files, processes=1):
+    """
+    Reads many files in as few Blender sessions as possible.
+
+    The files are split across up to `processes` Blender instances running side by side; each
+    opens its share of the files one after the other and prints a JSON record per file.
+    Returns {blend_file: blend_info or None}.
+    """
+    import json
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    blend_files = list(blend_files)
+    if not blend_files:
+        return {}
+    processes = max(1, min(processes, len(blend_files)))
+    groups = [blend_files[i::processes] for i in range(processes)]
+    script_path = os.path.abspath(__file__)
+
+    def run_group(files):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("\n".join(os.path.abspath(path) for path in files))
+            list_file = f.name
+        try:
+            command = [BLENDER_EXE, "-b", "--factory-startup", "--python", script_path, "--", "--batch", list_file]
+            result = subprocess.run(command, capture_output=True, text=True)
+        finally:
+            os.remove(list_file)
+        logger.debug(f"Blender Output:\n{result.stdout}\n{result.stderr}")
+
+        infos = {}
+        for line in result.stdout.splitlines():
+            if not line.startswith(BATCH_RECORD_PREFIX):
+                continue
+            record = json.loads(line[len(BATCH_RECORD_PREFIX):])
+            if "error" in record:
+                logger.warning(f"⚠️ Blender could not read {record['file']}: {record['error']}")
+            infos[record["file"]] = record.get("blend_info")
+        # Files Blender never reported on (e.g. it crashed halfway) map to None
+        return {path: infos.get(os.path.abspath(path)) for path in files}
+
+    results = {}
+    with ThreadPoolExecutor(processes) as pool:
+        for group_results in pool.map(run_group, groups):
+            results.update(group_results)
+    return results
+
+
+def get_inventory_from_blender(blend_file):
+    """Runs Blender in background mode to list every scene of a file. Returns the inventory dictionary or None."""
+    import json
+
+    command = [BLENDER_EXE, "-b", blend_file, "--python", os.path.abspath(__file__), "--", "--inventory"]
+    result = subprocess.run(command, capture_output=True, text=True)
+    logger.debug(f"Blender Output:\n{result.stdout}\n{result.stderr}")
+    for line in result.stdout.splitlines():
+        if line.startswith(INVENTORY_PREFIX):
+            return json.loads(line[len(INVENTORY_PREFIX):])
+    logger.error("Error: Blender did not report the scene inventory.")
+    return None
+
+
+def read_scene_info(scene=None):
+    """Reads the render settings of a scene (the active one by default) of the file open in Blender (only works inside Blender)."""
+    import bpy
+
+    scene = scene or bpy.context.scene
+    render = scene.render
+
+    # Get the full filepath (includes frame number), made absolute
+    frame_filepath = bpy.path.abspath(render.filepath)
+
+    # Extract the directory and full filename
+    frame_directory, frame_filename = os.path.split(frame_filepath)
+
+    # Get frame format settings
+    image_format = render.image_settings.file_format
+    compression_codec = "N/A"
+    if image_format in ["OPEN_EXR", "OPEN_EXR_MULTILAYER"]:
+        compression_codec = render.image_settings.exr_codec
+
+    return {
+        "start_frame": scene.frame_start,
+        "end_frame": scene.frame_end,
+        "output_path": frame_directory,
+        "render_filename": frame_filename,
+        "image_format": image_format,
+        "compression": render.image_settings.compression,
+        "compression_codec": compression_codec,
+        "color_depth": render.image_settings.color_depth
+    }
+
+
+def read_scene_inventory():
+    """Lists every scene of the file open in Blender in the format of blend_file.read_scene_inventory (only works inside Blender)."""
+    import bpy
+
+    scenes = []
+    for scene in bpy.data.scenes:
+        render = scene.render
+        samples = None
+        if render.engine == "CYCLES":
+            samples = scene.cycles.samples
+        elif render.engine.startswith("BLENDER_EEVEE"):
+            samples = scene.eevee.taa_render_samples
+        info = read_scene_info(scene)
+        info.update({
+            "name": scene.name,
+            "frame_step": scene.frame_step,
+            "resolution_x": render.resolution_x,
+            "resolution_y": render.resolution_y,
+            "resolution_percentage": render.resolution_percentage,
+            "engine": render.engine,
+            "samples": samples,
+            "camera": scene.camera.name if scene.camera else None,
+            "cameras": sorted({obj.name for obj in scene.objects if obj.type == "CAMERA"}),
+            "view_layers": [{"name": layer.name, "use": layer.use} for layer in scene.view_layers],
+        })
+        scenes.append(info)
+    return {"active_scene": bpy.context.scene.name, "scenes": scenes}
+
+
 # If Blender is running this script, extract and print the frame range
 if __name__ == "__main__":
     import bpy
+    import json
     import sys
 
     print("Received arguments:", sys.argv)
+    script_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    # Batch mode: open every file listed in a text file and print one JSON record per file
+    if script_args[:1] == ["--batch"]:
+        with open(script_args[1], encoding="utf-8") as f:
+            batch_files = [line.strip() for line in f if line.strip()]
+        for path in batch_files:
+            try:
+                bpy.ops.wm.open_mainfile(filepath=path, load_ui=False)
+                record = {"file": path, "blend_info": read_scene_info()}
+            except Exception as e:
+                record = {"file": path, "error": str(e)}
+            print(BATCH_RECORD_PREFIX + json.dumps(record), flush=True)
+        sys.exit(0)
+
+    # Inventory mode: every scene of the file in one JSON line
+    if script_args[:1] == ["--inventory"]:
+        print(INVENTORY_PREFIX + json.dumps(read_scene_inventory()), flush=True)
+        sys.exit(0)
 
     # Find the .blend file argument
     blend_file = None
@@ -98,37 +291,13 @@ if __name__ == "__main__":
         print("Error: No .blend file found in arguments.")
         sys.exit(1)
 
-
-    # Get the scene frame range
-    start_frame = bpy.context.scene.frame_start
-    end_frame = bpy.context.scene.frame_end
-
-    # Get the render settings
-    scene = bpy.context.scene
-    render = scene.render
-
-    # Get the full filepath (includes frame number)
-    frame_filepath = render.filepath
-
-    # Ensure the path is absolute
-    frame_filepath = bpy.path.abspath(frame_filepath)
-
-    # Extract the directory and full filename
-    frame_directory, frame_filename = os.path.split(frame_filepath)
-
-    # Get frame format settings
-    image_format = render.image_settings.file_format
-    compression = render.image_settings.compression
-    compression_codec = "N/A"
-    if image_format in ["OPEN_EXR", "OPEN_EXR_MULTILAYER"]:
-        compression_codec = render.image_settings.exr_codec
-    color_depth = render.image_settings.color_depth
+    scene_info = read_scene_info()
 
     # Print or store the values
-    print(f"Frame Range: {start_frame}-{end_frame}")
-    print(f"Output Path: {frame_filepath}")
-    print(f"Frame Filename: {frame_filename}")
-    print(f"Image Format: {image_format}")
-    print(f"Compression: {compression}")
-    print(f"Compression Codec: {compression_codec}")
-    print(f"Color Depth: {color_depth}")
\ No newline at end of file
+    print(f"Frame Range: {scene_info['start_frame']}-{scene_info['end_frame']}")
+    print(f"Output Path: {os.path.join(scene_info['output_path'], scene_info['render_filename'])}")
+    print(f"Frame Filename: {scene_info['render_filename']}")
+    print(f"Image Format: {scene_info['image_format']}")
+    print(f"Compression: {scene_info['compression']}")
+    print(f"Compression Codec: {scene_info['compression_codec']}")
+    print(f"Color Depth: {scene_info['color_depth']}")
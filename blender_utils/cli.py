@@ -0,0 +1,429 @@
+"""
+Command line front end for the render engine, usable without a display.
+
+    python -m blender_utils info shot.blend --scenes
+    python -m blender_utils scan /projects/show --processes 4
+    python -m blender_utils render shot.blend -s 1 -e 250 -o /renders/shot_#### --workers 2
+    python -m blender_utils render shot.blend -S Main -S Insert
+    python -m blender_utils farm-coordinator /shared/shot.blend -o /shared/renders/shot_#### --port 7878
+    python -m blender_utils farm-worker render-host:7878 --workers 2
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import time
+from dataclasses import replace
+
+from blender_utils.blend_batch import scan_folder
+from blender_utils.blend_cache import configure_default_cache
+from blender_utils.blend_reader import get_blend_info
+from blender_utils.exr_verify import FrameVerifier
+from blender_utils.farm import DEFAULT_PORT, FarmCoordinator, FarmWorker
+from blender_utils.frame_scan import plan_resume
+from blender_utils.governor import NICE, REFUSE, THROTTLE, ResourceGovernor, check_admission
+from blender_utils.json_io import read_json
+from blender_utils.log import setup_logging
+from blender_utils.partition import plan_job
+from blender_utils.render_engine import (CANCELED, DONE, FAILED, FrameRendered, RenderEngine, RenderFinished, RenderJob,
+                                         RenderStarted)
+from blender_utils.render_failures import RetryPolicy
+from blender_utils.render_history import RenderHistory, history_profile
+from blender_utils.render_profiles import RenderProfile, apply_profile, blend_profiles, parse_value, save_blend_profile
+from blender_utils.scene_inventory import get_scene_inventory, scene_blend_info
+from blender_utils.settings_store import SettingsStore
+from blender_utils.staging import FrameStager
+from blender_utils.telemetry import ResourceSampler
+
+logger = logging.getLogger(__name__)
+
+
+def format_duration(seconds):
+    return time.strftime("%H:%M:%S", time.gmtime(int(seconds)))
+
+
+def cmd_info(args):
+    if args.scenes:
+        inventory = get_scene_inventory(args.blend_file)
+        if not inventory:
+            logger.error(f"Error: Could not read the scenes of {args.blend_file}")
+            return 1
+        print(json.dumps(inventory.to_dict(), indent=4))
+        return 0
+    blend_info = get_blend_info(args.blend_file)
+    if not blend_info:
+        logger.error(f"Error: Could not read scene settings from {args.blend_file}")
+        return 1
+    print(json.dumps(blend_info, indent=4))
+    return 0
+
+
+def cmd_scan(args):
+    cache = configure_default_cache(args.cache, args.cache_size)
+    settings = SettingsStore(args.settings) if args.settings else None
+    try:
+        report = scan_folder(args.directory, cache=cache, settings=settings, processes=args.processes,
+                             native=not args.no_native, recursive=not args.no_recursive)
+    finally:
+        if settings is not None:
+            settings.close()
+    for blend_file in report.failed:
+        logger.warning(f"⚠️ Could not read {blend_file}")
+    return 1 if report.failed else 0
+
+
+def cmd_profiles(args):
+    blend_file = os.path.abspath(args.blend_file)
+    settings = SettingsStore(args.settings)
+    try:
+        if args.set:
+            name, assignments = args.set[0], args.set[1:]
+            changes = {}
+            for assignment in assignments:
+                key, _, value = assignment.partition("=")
+                try:
+                    changes[key] = parse_value(key, value)
+                except ValueError as e:
+                    logger.error(f"Error: {e}")
+                    return 1
+            profile = replace(blend_profiles(settings, blend_file).get(name, RenderProfile(name)), **changes)
+            save_blend_profile(settings, blend_file, profile)
+            logger.info(f"💾 Saved render profile {name} for {os.path.basename(blend_file)}")
+        profiles = blend_profiles(settings, blend_file)
+    finally:
+        settings.close()
+    print(json.dumps({name: profile.overrides() for name, profile in profiles.items()}, indent=4))
+    return 0
+
+
+def load_render_profile(args):
+    """Returns the RenderProfile picked with --render-profile, None without one; KeyError for unknown names."""
+    if not args.render_profile:
+        return None
+    settings = read_json(args.settings, {}) if args.settings else None
+    profiles = blend_profiles(settings, os.path.abspath(args.blend_file))
+    if args.render_profile not in profiles:
+        raise KeyError(f"No render profile named {args.render_profile} (profiles: {', '.join(profiles)})")
+    profile = profiles[args.render_profile]
+    overrides = ", ".join(f"{key}={value}" for key, value in profile.overrides().items()) or "scene settings"
+    logger.info(f"🎛️ Render profile {profile.name}: {overrides}")
+    return profile
+
+
+def log_event(event):
+    """Logs engine events as plain progress lines; Blender's own output is logged by the engine."""
+    if isinstance(event, RenderStarted):
+        scene = f" scene {event.job.scene}" if event.job.scene else ""
+        logger.info(f"🚀 Rendering {event.job.blend_file}{scene} frames {event.job.start_frame}-{event.job.end_frame}")
+    elif isinstance(event, FrameRendered):
+        eta = event.elapsed / event.frames_done * (event.total_frames - event.frames_done)
+        logger.info(f"✅ Frame {event.frame} in {event.seconds:.2f}s "
+                    f"[{event.frames_done}/{event.total_frames}, ETA {format_duration(eta)}]")
+    elif isinstance(event, RenderFinished):
+        logger.info(f"🏁 Render {event.status}: {event.frames_done}/{event.total_frames} frames "
+                    f"in {format_duration(event.elapsed)}")
+        for failure in event.failures:
+            logger.error(f"Error: Skipped {failure.describe()} after {failure.attempt} attempts")
+
+
+def cmd_render(args):
+    scenes = [None]
+    if args.scene or args.all_scenes:
+        inventory = get_scene_inventory(args.blend_file)
+        if not inventory:
+            logger.error(f"Error: Could not read the scenes of {args.blend_file}")
+            return 1
+        scenes = inventory.names() if args.all_scenes else args.scene
+        unknown = [scene for scene in scenes if inventory.scene(scene) is None]
+        if unknown:
+            logger.error(f"Error: No scene named {', '.join(unknown)} (scenes: {', '.join(inventory.names())})")
+            return 1
+
+    try:
+        profile = load_render_profile(args)
+    except KeyError as e:
+        logger.error(f"Error: {e.args[0]}")
+        return 1
+
+    status = 0
+    for scene in scenes:
+        output_file = args.output
+        if output_file and len(scenes) > 1:
+            # Keep the scenes from overwriting each other
+            output_file = os.path.join(os.path.dirname(output_file), scene, os.path.basename(output_file))
+        result = render_scene(args, scene, output_file, profile)
+        if result == CANCELED:
+            return 1
+        if result == FAILED:
+            status = 1
+    return status
+
+
+def render_scene(args, scene, output_file, profile=None):
+    """Renders one scene of the file (None for the active one) and returns the final status."""
+    start_frame, end_frame = args.start, args.end
+    if start_frame is None or end_frame is None:
+        blend_info = scene_blend_info(args.blend_file, scene)
+        if not blend_info:
+            logger.error("Error: No frame range given and none could be read from the file")
+            return FAILED
+        start_frame = blend_info["start_frame"] if start_frame is None else start_frame
+        end_frame = blend_info["end_frame"] if end_frame is None else end_frame
+
+    job = RenderJob(args.blend_file, start_frame, end_frame, output_file=output_file, file_format=args.format,
+                    workers=args.workers, threads=args.threads, pin_cpus=args.pin_cpus, chunk_size=args.chunk_size,
+                    scene=scene, progressive=args.progressive, nice=args.nice or None,
+                    retry=RetryPolicy(max(1, args.max_attempts), args.retry_backoff,
+                                      fewer_threads=args.retry_fewer_threads))
+    job = apply_profile(job, profile)
+    if args.resume:
+        job = plan_resume(job)
+        if job is None:
+            logger.info("✅ All frames are already rendered")
+            return DONE
+
+    engine = RenderEngine()
+    engine.subscribe(log_event)
+    history = RenderHistory(args.history)
+    history.attach(engine)
+    # Always sampled: the peak RAM goes into the history for the governor; exported only with --telemetry
+    ResourceSampler(engine, args.sample_interval, args.telemetry)
+    if not args.no_governor:
+        # Checked against the real output folder, before staging points the job at scratch
+        admission = check_admission(job, history)
+        if admission.action == REFUSE:
+            logger.error(f"Error: Not starting the render: {admission.reason}")
+            return FAILED
+        if admission.action == THROTTLE:
+            logger.warning(f"⚠️ {admission.reason}")
+        job = admission.job
+    job, plan = plan_job(job, history, probe=args.probe)
+    stager = None
+    if args.scratch:
+        stager = FrameStager(engine, args.scratch, workers=args.transfer_workers,
+                             bandwidth=args.transfer_limit and args.transfer_limit * 1024 * 1024,
+                             after_verification=args.verify or bool(args.manifest_dir))
+        try:
+            job = stager.prepare(job)
+        except ValueError as e:
+            logger.error(f"Error: {e}")
+            return FAILED
+    if args.verify or args.manifest_dir:
+        # Scratch folders are removed once empty, so the manifest goes next to the final frames
+        FrameVerifier(engine, args.manifest_dir or (stager and stager.final_dir))
+    governor = None if args.no_governor else ResourceGovernor(engine, history, stager and stager.final_dir)
+    predicted = history.estimate(job.blend_file, job.frames(), workers=job.workers, scene=scene,
+                                 profile=history_profile(job.profile))
+    if plan is not None and plan.makespan is not None:
+        predicted = plan.makespan
+    if predicted is not None:
+        logger.info(f"⏱️ Expected render time from history: {format_duration(predicted)}")
+
+    # Ctrl-C and SIGTERM tear down the Blender processes instead of orphaning them
+    def on_signal(signum, frame):
+        logger.warning("⛔ Canceling render...")
+        engine.cancel()
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    engine.start(job)
+    while not engine.wait(timeout=0.5):
+        pass
+    if plan is not None:
+        logger.info(f"📐 {plan.report(engine.result.elapsed)}")
+    if stager is not None:
+        logger.info(f"📦 {stager.landed} frames ({stager.bytes_landed / 1024 ** 2:.1f} MB) moved to {stager.final_dir}")
+    if governor is not None and governor.stopped:
+        return FAILED  # Stopped for disk space, not by the user
+    return engine.result.status
+
+
+def cmd_farm_coordinator(args):
+    start_frame, end_frame = args.start, args.end
+    if start_frame is None or end_frame is None:
+        blend_info = scene_blend_info(args.blend_file, args.scene)
+        if not blend_info:
+            logger.error("Error: No frame range given and none could be read from the file")
+            return 1
+        start_frame = blend_info["start_frame"] if start_frame is None else start_frame
+        end_frame = blend_info["end_frame"] if end_frame is None else end_frame
+
+    # Workers open the paths as given, so they must be absolute paths on shared storage
+    output_file = os.path.abspath(args.output) if args.output else None
+    try:
+        profile = load_render_profile(args)
+    except KeyError as e:
+        logger.error(f"Error: {e.args[0]}")
+        return 1
+    job = RenderJob(os.path.abspath(args.blend_file), start_frame, end_frame, output_file=output_file,
+                    file_format=args.format, chunk_size=args.chunk_size, scene=args.scene,
+                    progressive=args.progressive)
+    job = apply_profile(job, profile)
+    if args.resume:
+        job = plan_resume(job)
+        if job is None:
+            logger.info("✅ All frames are already rendered")
+            return 0
+
+    coordinator = FarmCoordinator(args.host, args.port, token=args.token, lease_timeout=args.lease_timeout)
+    coordinator.subscribe(log_event)
+    history = RenderHistory(args.history)
+    history.attach(coordinator)
+
+    def on_signal(signum, frame):
+        logger.warning("⛔ Canceling farm render...")
+        coordinator.cancel()
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    coordinator.start(job)
+    while not coordinator.wait(timeout=0.5):
+        pass
+    coordinator.stop(grace=args.grace)
+
+    for stats in coordinator.worker_stats():
+        avg = f"{stats.avg_frame_time:.2f}s/frame" if stats.avg_frame_time is not None else "no frames"
+        logger.info(f"👷 {stats.name} ({stats.address}): {stats.frames_done} frames, {avg}, "
+                    f"{stats.frames_per_minute:.1f} frames/min, {stats.leases} leases, "
+                    f"{stats.expired_leases} expired, {stats.failed_leases} failed")
+    return 0 if coordinator.result.status == DONE else 1
+
+
+def cmd_farm_worker(args):
+    host, _, port = args.coordinator.rpartition(":")
+    if not host:
+        host, port = args.coordinator, DEFAULT_PORT
+    worker = FarmWorker(host, int(port), name=args.name, token=args.token, workers=args.workers,
+                        threads=args.threads, persistent=args.persistent)
+
+    def on_signal(signum, frame):
+        logger.warning("⛔ Stopping farm worker...")
+        worker.stop()
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    return worker.run()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m blender_utils", description="Headless Blender render launcher")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Console log level (DEBUG also echoes Blender's output)")
+    parser.add_argument("--log-file", help="Also write every log record, including Blender's output, to this file")
+    parser.add_argument("--profile", action="store_true", help="Time internal spans and print a report at exit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info = commands.add_parser("info", help="Print the scene render settings of a .blend file as JSON")
+    info.add_argument("blend_file")
+    info.add_argument("--scenes", action="store_true",
+                      help="List every scene with its frame range, resolution, samples, cameras and view layers")
+    info.set_defaults(func=cmd_info)
+
+    scan = commands.add_parser("scan", help="Read the scene settings of every .blend file in a folder in bulk")
+    scan.add_argument("directory")
+    scan.add_argument("--processes", type=int, default=1, help="Blender instances for files that need Blender")
+    scan.add_argument("--no-native", action="store_true", help="Read every uncached file with Blender")
+    scan.add_argument("--no-recursive", action="store_true", help="Don't descend into subfolders")
+    scan.add_argument("--cache", default="blend_info_cache.json", help="Blend info cache file")
+    scan.add_argument("--cache-size", type=int, default=1024, help="Max number of files kept in the cache")
+    scan.add_argument("--settings", default="blend_settings.json",
+                      help="Settings file to add new files to (empty string to skip)")
+    scan.set_defaults(func=cmd_scan)
+
+    profiles = commands.add_parser("profiles", help="List or edit the render profiles of a .blend file")
+    profiles.add_argument("blend_file")
+    profiles.add_argument("--set", nargs="+", metavar=("NAME", "SETTING=VALUE"),
+                          help="Create or change a profile for this file, e.g. --set draft samples=8 "
+                               "resolution_percentage=25 (settings: samples, resolution_percentage, denoise, "
+                               "persistent_data, threads, file_format, exr_codec, color_depth; 'none' clears one)")
+    profiles.add_argument("--settings", default="blend_settings.json", help="Settings file the profiles are kept in")
+    profiles.set_defaults(func=cmd_profiles)
+
+    render = commands.add_parser("render", help="Render a frame range")
+    render.add_argument("blend_file")
+    render.add_argument("-S", "--scene", action="append",
+                        help="Scene to render; repeat to render several scenes as separate jobs")
+    render.add_argument("--all-scenes", action="store_true", help="Render every scene as a separate job")
+    render.add_argument("-s", "--start", type=int, help="Start frame (default: scene start)")
+    render.add_argument("-e", "--end", type=int, help="End frame (default: scene end)")
+    render.add_argument("-o", "--output", help="Output path override, e.g. /renders/shot_####")
+    render.add_argument("-F", "--format", help="Output file format (default: the scene's or the profile's)")
+    render.add_argument("-P", "--render-profile", metavar="NAME",
+                        help="Render profile to apply, e.g. draft, preview or final (see the profiles command)")
+    render.add_argument("--settings", default="blend_settings.json", help="Settings file with per-file render profiles")
+    render.add_argument("--workers", type=int, default=1, help="Number of parallel Blender processes")
+    render.add_argument("-t", "--threads", type=int, help="Render threads per Blender process")
+    render.add_argument("--chunk-size", type=int, help="Frames per chunk when rendering in parallel")
+    render.add_argument("--pin-cpus", action="store_true", help="Give each worker its own CPU cores")
+    render.add_argument("--probe", action="store_true",
+                        help="Without render history for the file, time a few frames at low samples first so "
+                             "parallel chunks can be balanced by cost")
+    render.add_argument("--resume", action="store_true", help="Only render frames missing from the output folder")
+    render.add_argument("--progressive", action="store_true",
+                        help="Render coarse-to-fine: every 16th frame first, then every 8th, ... for an early preview")
+    render.add_argument("--max-attempts", type=int, default=3,
+                        help="Tries per frame when Blender crashes or fails before a frame is skipped")
+    render.add_argument("--retry-backoff", type=float, default=5.0,
+                        help="Seconds before the first retry of a failed frame, doubling with every further retry")
+    render.add_argument("--retry-fewer-threads", action="store_true",
+                        help="Retry frames that crashed or ran out of memory with half the render threads")
+    render.add_argument("--history", default="render_history.json", help="Render time history file")
+    render.add_argument("--nice", type=int, default=NICE,
+                        help="Niceness for Blender, which also gets the lowest best-effort I/O priority (0 to leave it)")
+    render.add_argument("--no-governor", action="store_true",
+                        help="Start Blender without checking free RAM, CPU load and disk space against the history")
+    render.add_argument("--telemetry", metavar="DIR", help="Export CPU/RAM/disk samples of Blender to DIR as CSV and JSON")
+    render.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between telemetry samples")
+    render.add_argument("--verify", action="store_true",
+                        help="Check every saved frame (EXR headers and offset tables) and re-render bad ones")
+    render.add_argument("--manifest-dir", metavar="DIR",
+                        help="Write the verification manifest to DIR instead of the output folder (implies --verify)")
+    render.add_argument("--scratch", metavar="DIR",
+                        help="Render to this fast local folder and move each frame to the output path in the background")
+    render.add_argument("--transfer-workers", type=int, default=2, help="Frames moved from scratch at the same time")
+    render.add_argument("--transfer-limit", type=float, metavar="MB_PER_S",
+                        help="Bandwidth limit for moving frames from scratch, in MB/s")
+    render.add_argument("-v", "--verbose", action="store_true", help="Echo Blender's output (same as --log-level DEBUG)")
+    render.set_defaults(func=cmd_render)
+
+    coordinator = commands.add_parser("farm-coordinator", help="Hand out the frames of a render to farm workers")
+    coordinator.add_argument("blend_file", help="Path every worker can open, e.g. on a network share")
+    coordinator.add_argument("-S", "--scene", help="Scene to render (default: the active one)")
+    coordinator.add_argument("-s", "--start", type=int, help="Start frame (default: scene start)")
+    coordinator.add_argument("-e", "--end", type=int, help="End frame (default: scene end)")
+    coordinator.add_argument("-o", "--output", help="Output path override on shared storage")
+    coordinator.add_argument("-F", "--format", help="Output file format (default: the scene's or the profile's)")
+    coordinator.add_argument("-P", "--render-profile", metavar="NAME", help="Render profile to apply, e.g. draft")
+    coordinator.add_argument("--settings", default="blend_settings.json",
+                             help="Settings file with per-file render profiles")
+    coordinator.add_argument("--chunk-size", type=int, help="Frames per lease (default: 5)")
+    coordinator.add_argument("--resume", action="store_true", help="Only render frames missing from the output folder")
+    coordinator.add_argument("--progressive", action="store_true",
+                             help="Lease frames coarse-to-fine: every 16th frame first, then every 8th, ...")
+    coordinator.add_argument("--host", default="0.0.0.0", help="Interface to listen on")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    coordinator.add_argument("--lease-timeout", type=float, default=30.0,
+                             help="Seconds without a heartbeat before a worker's frames are reassigned")
+    coordinator.add_argument("--grace", type=float, default=5.0,
+                             help="Seconds to wait at the end for workers to hear the job is done")
+    coordinator.add_argument("--token", help="Shared secret workers must present (default: $BENDER_FARM_TOKEN)")
+    coordinator.add_argument("--history", default="render_history.json", help="Render time history file")
+    coordinator.set_defaults(func=cmd_farm_coordinator)
+
+    worker = commands.add_parser("farm-worker", help="Render frames leased by a farm coordinator with local Blender")
+    worker.add_argument("coordinator", help=f"HOST[:PORT] of the coordinator (default port {DEFAULT_PORT})")
+    worker.add_argument("--name", help="Name shown in the coordinator's stats (default: hostname-pid)")
+    worker.add_argument("--workers", type=int, default=1, help="Parallel Blender processes on this machine")
+    worker.add_argument("-t", "--threads", type=int, help="Render threads per Blender process")
+    worker.add_argument("--persistent", action="store_true",
+                        help="Keep waiting for coordinators instead of exiting when the job is done")
+    worker.add_argument("--token", help="Shared secret of the coordinator (default: $BENDER_FARM_TOKEN)")
+    worker.set_defaults(func=cmd_farm_worker)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    level = "DEBUG" if getattr(args, "verbose", False) else args.log_level
+    setup_logging(level, log_file=args.log_file, profile=args.profile or None)
+    return args.func(args)
@@ -0,0 +1,312 @@
+"""
+Pure-Python reader for OpenEXR headers and offset tables.
+
+Reads what is needed to tell whether a rendered EXR is complete without
+decoding any pixels: the version flags, every part's header (channels,
+compression, data window, tiling, string metadata such as Blender's render
+stamp) and the chunk offset table. The table is written last when an EXR is
+closed, so a frame that was cut short by a crash has zero offsets, and a
+truncated copy has offsets or chunk sizes that point past the end of the file.
+"""
+import math
+import os
+import struct
+
+from blender_utils.log_parser import parse_duration
+
+MAGIC = 20000630
+
+# Version field flags
+TILED_FLAG = 0x200
+LONG_NAMES_FLAG = 0x400
+NON_IMAGE_FLAG = 0x800  # Deep data
+MULTIPART_FLAG = 0x1000
+
+# Compression code -> (name, scanlines per chunk)
+COMPRESSIONS = {
+    0: ("NONE", 1), 1: ("RLE", 1), 2: ("ZIPS", 1), 3: ("ZIP", 16), 4: ("PIZ", 32), 5: ("PXR24", 16),
+    6: ("B44", 32), 7: ("B44A", 32), 8: ("DWAA", 32), 9: ("DWAB", 256), 10: ("HTJ2K256", 256), 11: ("HTJ2K32", 32),
+}
+
+PIXEL_TYPES = {0: "UINT", 1: "HALF", 2: "FLOAT"}
+
+# Attributes every part has; everything else of type string is treated as metadata
+STANDARD_ATTRIBUTES = frozenset((
+    "channels", "compression", "dataWindow", "displayWindow", "lineOrder", "pixelAspectRatio",
+    "screenWindowCenter", "screenWindowWidth", "tiles", "name", "type", "version", "chunkCount",
+))
+
+ONE_LEVEL, MIPMAP_LEVELS, RIPMAP_LEVELS = 0, 1, 2
+
+
+class ExrError(Exception):
+    """Raised when a file is not a readable, complete OpenEXR file."""
+
+
+class ExrPart:
+    """Header of one part (single-part files have exactly one)."""
+
+    def __init__(self, attributes):
+        self.attributes = attributes  # name -> decoded value (raw bytes for unknown types)
+        if "channels" not in attributes or "dataWindow" not in attributes or "compression" not in attributes:
+            raise ExrError("Header is missing channels, dataWindow or compression")
+        self.channels = attributes["channels"]  # [(name, pixel type, x sampling, y sampling), ...]
+        self.data_window = attributes["dataWindow"]  # (xmin, ymin, xmax, ymax)
+        code = attributes["compression"]
+        if code not in COMPRESSIONS:
+            raise ExrError(f"Unknown compression {code}")
+        self.compression, self.lines_per_chunk = COMPRESSIONS[code]
+        self.name = attributes.get("name")
+        self.type = attributes.get("type")  # scanlineimage, tiledimage, deepscanline, deeptile (multi-part only)
+        self.tiles = attributes.get("tiles")  # (x size, y size, level mode, rounding mode)
+
+    @property
+    def width(self):
+        return self.data_window[2] - self.data_window[0] + 1
+
+    @property
+    def height(self):
+        return self.data_window[3] - self.data_window[1] + 1
+
+    @property
+    def tiled(self):
+        return self.type in ("tiledimage", "deeptile")
+
+    @property
+    def deep(self):
+        return self.type in ("deepscanline", "deeptile")
+
+    @property
+    def layers(self):
+        """Layer names from 'Layer.Pass.Channel' style channel names ('' for plain R, G, B, A)."""
+        layers = []
+        for name, _, _, _ in self.channels:
+            layer = name.rpartition(".")[0]
+            if layer not in layers:
+                layers.append(layer)
+        return layers
+
+    def chunk_count(self):
+        """Number of entries in this part's offset table."""
+        if "chunkCount" in self.attributes:
+            return self.attributes["chunkCount"]
+        if not self.tiled:
+            return math.ceil(self.height / self.lines_per_chunk)
+        x_size, y_size, mode, rounding = self.tiles
+        x_levels = _level_sizes(self.width, mode, rounding, self.height)
+        y_levels = _level_sizes(self.height, mode, rounding, self.width)
+        if mode == RIPMAP_LEVELS:
+            return sum(math.ceil(w / x_size) * math.ceil(h / y_size) for w in x_levels for h in y_levels)
+        return sum(math.ceil(w / x_size) * math.ceil(h / y_size) for w, h in zip(x_levels, y_levels))
+
+
+def _level_sizes(size, mode, rounding, other_size):
+    """Sizes of one axis at every mip/rip level."""
+    if mode == ONE_LEVEL:
+        return [size]
+    largest = max(size, other_size) if mode == MIPMAP_LEVELS else size
+    log2 = math.log2(largest)
+    count = (math.ceil(log2) if rounding else math.floor(log2)) + 1
+    round_level = math.ceil if rounding else math.floor
+    return [max(1, round_level(size / 2 ** level)) for level in range(count)]
+
+
+class ExrInfo:
+    """Everything read from an EXR file's headers and offset tables."""
+
+    def __init__(self, path, size, version, flags, parts, offsets):
+        self.path = path
+        self.size = size
+        self.version = version
+        self.flags = flags
+        self.parts = parts  # [ExrPart, ...]
+        self.offsets = offsets  # One list of chunk offsets per part
+
+    @property
+    def multipart(self):
+        return bool(self.flags & MULTIPART_FLAG)
+
+    @property
+    def channels(self):
+        return [channel for part in self.parts for channel in part.channels]
+
+    @property
+    def layers(self):
+        return [layer for part in self.parts for layer in part.layers]
+
+    @property
+    def metadata(self):
+        """String attributes of the first part that aren't part of the format, e.g. Blender's stamp fields."""
+        return {name: value for name, value in self.parts[0].attributes.items()
+                if name not in STANDARD_ATTRIBUTES and isinstance(value, str)}
+
+    @property
+    def render_time(self):
+        """Seconds from Blender's 'RenderTime' stamp ('[HH:]MM:SS.hh'), or None if the frame wasn't stamped."""
+        text = self.metadata.get("RenderTime")
+        if not text:
+            return None
+        try:
+            return parse_duration(text.strip())
+        except ValueError:
+            return None
+
+
+class _HeaderReader:
+    def __init__(self, f, long_names):
+        self.f = f
+        self.max_name = 255 if long_names else 31
+
+    def read(self, size):
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ExrError("File ends inside the header")
+        return data
+
+    def cstring(self):
+        chars = bytearray()
+        while True:
+            char = self.read(1)
+            if char == b"\0":
+                break
+            chars += char
+            if len(chars) > self.max_name:
+                raise ExrError("Attribute name too long, header is corrupt")
+        return chars.decode("latin-1")
+
+    def header(self):
+        """Reads attributes up to the terminating null byte; returns None for the empty header ending a multi-part list."""
+        attributes = {}
+        while True:
+            name = self.cstring()
+            if not name:
+                return attributes or None
+            type_name = self.cstring()
+            (size,) = struct.unpack("<i", self.read(4))
+            if size < 0 or size > 1 << 24:
+                raise ExrError(f"Attribute {name} has an invalid size {size}")
+            attributes[name] = _decode_attribute(type_name, self.read(size))
+
+
+def _decode_attribute(type_name, data):
+    try:
+        if type_name == "chlist":
+            return _decode_channels(data)
+        if type_name == "compression" or type_name == "lineOrder":
+            return data[0]
+        if type_name == "box2i":
+            return struct.unpack("<4i", data)
+        if type_name == "int":
+            return struct.unpack("<i", data)[0]
+        if type_name == "float":
+            return struct.unpack("<f", data)[0]
+        if type_name == "double":
+            return struct.unpack("<d", data)[0]
+        if type_name == "v2f":
+            return struct.unpack("<2f", data)
+        if type_name == "tiledesc":
+            x_size, y_size, mode = struct.unpack("<IIB", data)
+            return x_size, y_size, mode & 0x0F, mode >> 4
+        if type_name == "string":
+            return data.decode("utf-8", "replace")
+    except (struct.error, IndexError, ValueError) as e:
+        raise ExrError(f"Malformed {type_name} attribute: {e}")
+    return data
+
+
+def _decode_channels(data):
+    channels = []
+    position = 0
+    while True:
+        end = data.index(b"\0", position)
+        if end == position:
+            return channels
+        name = data[position:end].decode("latin-1")
+        pixel_type, _, x_sampling, y_sampling = struct.unpack_from("<iB3xii", data, end + 1)
+        channels.append((name, PIXEL_TYPES.get(pixel_type, pixel_type), x_sampling, y_sampling))
+        position = end + 1 + 16
+
+
+def read_exr(path, check_chunks=True):
+    """
+    Reads the headers and offset tables of an EXR file and checks they are complete.
+
+    :param check_chunks: Also read every chunk's header and check that its data lies within the file.
+    :raises ExrError: If the file is not an EXR, its header is cut off, an offset is missing
+                      or out of range, or (with check_chunks) a chunk is truncated.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = f.read(8)
+        if len(start) != 8:
+            raise ExrError("File is too small to be an EXR")
+        magic, version_field = struct.unpack("<ii", start)
+        if magic != MAGIC:
+            raise ExrError("Not an OpenEXR file")
+        version, flags = version_field & 0xFF, version_field & ~0xFF
+        if version != 2:
+            raise ExrError(f"Unsupported OpenEXR version {version}")
+
+        reader = _HeaderReader(f, flags & LONG_NAMES_FLAG)
+        parts = []
+        while True:
+            attributes = reader.header()
+            if attributes is None:
+                break
+            if not (flags & MULTIPART_FLAG) and flags & TILED_FLAG and "tiles" not in attributes:
+                raise ExrError("Tiled file without a tiles attribute")
+            if not (flags & MULTIPART_FLAG):
+                kind = "tile" if flags & TILED_FLAG else "scanline"
+                attributes.setdefault("type", f"deep{kind}" if flags & NON_IMAGE_FLAG else f"{kind}image")
+            parts.append(ExrPart(attributes))
+            if not flags & MULTIPART_FLAG:
+                break
+        if not parts:
+            raise ExrError("File has no parts")
+
+        offsets = []
+        for part in parts:
+            count = part.chunk_count()
+            data = f.read(8 * count)
+            if len(data) != 8 * count:
+                raise ExrError("File ends inside the offset table")
+            offsets.append(list(struct.unpack(f"<{count}Q", data)))
+        table_end = f.tell()
+
+        for index, part_offsets in enumerate(offsets):
+            for chunk, offset in enumerate(part_offsets):
+                if offset == 0:
+                    raise ExrError(f"Offset table incomplete: part {index} chunk {chunk} was never written")
+                if offset < table_end or offset >= size:
+                    raise ExrError(f"Part {index} chunk {chunk} points outside the file ({offset} of {size} bytes)")
+        if check_chunks:
+            for index, part_offsets in enumerate(offsets):
+                for offset in part_offsets:
+                    _check_chunk(f, offset, size, parts[index], index if flags & MULTIPART_FLAG else None)
+    return ExrInfo(path, size, version, flags, parts, offsets)
+
+
+def _check_chunk(f, offset, size, part, part_number):
+    """Checks that the chunk at offset belongs to the part and that its data ends inside the file."""
+    f.seek(offset)
+    header_size = (4 if part_number is not None else 0) + (16 if part.tiled else 4)
+    header_size += 24 if part.deep else 4
+    header = f.read(header_size)
+    if len(header) != header_size:
+        raise ExrError(f"Chunk at {offset} is truncated")
+    position = 0
+    if part_number is not None:
+        (number,) = struct.unpack_from("<i", header)
+        if number != part_number:
+            raise ExrError(f"Chunk at {offset} belongs to part {number}, expected {part_number}")
+        position = 4
+    position += 16 if part.tiled else 4
+    if part.deep:
+        table_size, packed_size, _ = struct.unpack_from("<QQQ", header, position)
+        data_size = table_size + packed_size
+    else:
+        (data_size,) = struct.unpack_from("<i", header, position)
+        if data_size < 0:
+            raise ExrError(f"Chunk at {offset} has a negative size")
+    if offset + header_size + data_size > size:
+        raise ExrError(f"Chunk at {offset} is truncated: needs {offset + header_size + data_size} of {size} bytes")
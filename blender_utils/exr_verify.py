@@ -0,0 +1,151 @@
+"""
+Checks every frame Blender reports as saved while the render keeps going.
+
+A 'Saved:' line only means Blender tried to write the file. On a network
+share the write can still fail, be cut short or leave a file of zero bytes,
+and nobody notices until compositing. FrameVerifier hands each saved frame
+to a small thread pool that checks it exists, has a plausible size and, for
+EXR files, that its headers parse and its offset table is complete. Frames
+that fail are taken back and rendered again under the job's retry policy;
+the render only finishes once every check is done. The render time Blender
+stamped into the file is passed on to the render history, and every result
+goes into a per-job manifest.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from blender_utils.exr_file import ExrError, read_exr
+from blender_utils.json_io import atomic_write_json
+from blender_utils.log_parser import FrameSaved
+from blender_utils.render_engine import FrameRendered, RenderFinished, RenderJob, RenderLogEvent, RenderStarted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+
+
+@dataclass
+class FrameCheck:
+    frame: int
+    path: str
+    ok: bool
+    size: int = None
+    error: str = None
+    render_time: float = None  # Seconds from the file's RenderTime stamp
+    layers: list = field(default_factory=list)
+    channels: list = field(default_factory=list)
+    checked_at: float = None
+
+    def to_dict(self):
+        return {"path": self.path, "ok": self.ok, "size": self.size, "error": self.error,
+                "render_time": self.render_time, "layers": self.layers, "channels": self.channels,
+                "checked_at": self.checked_at}
+
+
+def verify_frame(frame, path, min_size=1):
+    """Checks one output file; EXR files also get their headers and offset table read."""
+    check = FrameCheck(frame, path, False, checked_at=time.time())
+    try:
+        check.size = os.path.getsize(path)
+    except OSError as e:
+        check.error = f"Missing: {e.strerror or e}"
+        return check
+    if check.size < min_size:
+        check.error = f"Only {check.size} bytes"
+        return check
+    if path.lower().endswith(".exr"):
+        try:
+            info = read_exr(path)
+        except (ExrError, OSError) as e:
+            check.error = str(e)
+            return check
+        check.layers = info.layers
+        check.channels = [name for name, _, _, _ in info.channels]
+        check.render_time = info.render_time
+    check.ok = True
+    return check
+
+
+@dataclass(frozen=True)
+class FrameVerified:
+    job: RenderJob
+    worker: int
+    frame: int
+    check: FrameCheck
+
+
+class FrameVerifier:
+    def __init__(self, engine, manifest_dir=None, workers=DEFAULT_WORKERS, min_size=1):
+        """
+        :param engine: RenderEngine whose saved frames are checked.
+        :param manifest_dir: Where <blend name>_<time>_manifest.json is written, defaults to the output folder.
+        :param workers: Files checked at the same time.
+        :param min_size: Smallest plausible file size in bytes.
+        """
+        self.engine = engine
+        self.manifest_dir = manifest_dir
+        self.min_size = min_size
+        self.manifest = {}  # frame -> manifest entry of the job being rendered
+        self._saved = {}  # worker -> path of the frame it just saved
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify")
+        engine.subscribe(self._on_event)
+
+    def _on_event(self, event):
+        if isinstance(event, RenderStarted):
+            with self._lock:
+                self.manifest = {}
+                self._saved = {}
+        elif isinstance(event, RenderLogEvent) and isinstance(event.event, FrameSaved):
+            self._saved[event.worker] = event.event.path
+        elif isinstance(event, FrameRendered):
+            path = self._saved.pop(event.worker, None)
+            if path is None or event.frame is None:
+                return  # No 'Saved:' line or no frame number, nothing to check or re-render
+            # Runs on the worker thread before its chunk is done, so the render can't finish first
+            self.engine.hold()
+            self._pool.submit(self._check, event.job, event.worker, event.frame, path)
+        elif isinstance(event, RenderFinished):
+            if self.manifest:
+                self.write_manifest(event)
+
+    def _check(self, job, worker, frame, path):
+        try:
+            check = verify_frame(frame, path, self.min_size)
+            with self._lock:
+                entry = self.manifest.setdefault(frame, {"rejections": 0, "errors": []})
+                entry.update(check.to_dict())
+                if not check.ok:
+                    entry["rejections"] += 1
+                    entry["errors"].append(check.error)
+            self.engine.emit(FrameVerified(job, worker, frame, check))
+            if not check.ok:
+                self.engine.reject_frame(worker, frame, f"{os.path.basename(path)}: {check.error}")
+        except Exception as e:
+            logger.exception(f"Error verifying frame {frame}: {e}")
+        finally:
+            self.engine.release()
+
+    def write_manifest(self, finished):
+        """Writes the manifest of a finished job and returns its path."""
+        job = finished.job
+        directory = self.manifest_dir
+        if directory is None:
+            paths = [entry["path"] for entry in self.manifest.values() if entry.get("path")]
+            directory = os.path.dirname(paths[0]) if paths else os.path.dirname(os.path.abspath(job.blend_file))
+        name = os.path.splitext(os.path.basename(job.blend_file))[0]
+        path = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_manifest.json")
+        with self._lock:
+            frames = {str(frame): entry for frame, entry in sorted(self.manifest.items())}
+        bad = [frame for frame, entry in frames.items() if not entry["ok"]]
+        atomic_write_json(path, {
+            "blend_file": os.path.abspath(job.blend_file), "scene": job.scene, "status": finished.status,
+            "frames_done": finished.frames_done, "total_frames": finished.total_frames,
+            "verified": len(frames) - len(bad), "bad_frames": [int(frame) for frame in bad], "frames": frames,
+        })
+        logger.info(f"🧾 Output manifest written to {path} ({len(frames) - len(bad)} of {len(frames)} frames verified)")
+        return path
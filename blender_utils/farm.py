@@ -0,0 +1,555 @@
+"""
+Distributed rendering over the LAN.
+
+A FarmCoordinator splits a RenderJob into chunks and leases them to worker
+agents over TCP. Each FarmWorker renders its lease with a local RenderEngine
+(so the Blender command line is built exactly as for local renders), reports
+every saved frame, and sends heartbeats while it works. A lease that misses
+its heartbeats for lease_timeout seconds expires and its unfinished frames go
+back to the front of the queue for the next worker that asks.
+
+The coordinator publishes the same events as a RenderEngine (RenderStarted,
+FrameRenderStarted, FrameRendered, RenderFinished), so the progress bus,
+render history and CLI logging work unchanged. Workers are numbered in the
+order they first connect.
+
+Requests and responses are JSON lines. Every request carries the worker name
+and, if the coordinator has one, the shared token:
+
+    {"op": "hello"}                                   -> {"ok": true, "heartbeat": 5.0}
+    {"op": "lease"}                                   -> {"lease": id, "job": {...}, "frames": [...]}
+                                                         or {"wait": seconds} or {"done": true}
+    {"op": "heartbeat", "lease": id}                  -> {"ok": true} or {"ok": false} (lease lost: stop)
+    {"op": "frame_started", "lease": id, "frame": n}  -> {"ok": true}
+    {"op": "frame", "lease": id, "frame": n, "seconds": s} -> {"ok": true}
+    {"op": "complete", "lease": id, "status": "done" | "failed", "error": text} -> {"ok": true}
+
+Blend files and output paths are used as given, so they must resolve to the
+same shared storage on every worker.
+"""
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field, replace
+
+from blender_utils.frame_scan import compress_ranges, progressive_batches
+from blender_utils.render_engine import (CANCELED, DONE, FAILED, FrameRendered, FrameRenderStarted, RenderEngine,
+                                         RenderFinished, RenderJob, RenderStarted)
+from blender_utils.render_profiles import RenderProfile, apply_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 7878
+DEFAULT_CHUNK_SIZE = 5  # Frames per lease: small enough to balance, big enough to amortize Blender's startup
+HEARTBEAT_INTERVAL = 5.0
+LEASE_TIMEOUT = 30.0  # A lease without a heartbeat for this long expires and its frames are reassigned
+MAX_ATTEMPTS = 3  # Leases of the same frames that may fail or expire before they are given up on
+WAIT_SECONDS = 1.0  # How long workers wait before asking again when every chunk is leased out
+TOKEN_ENV = "BENDER_FARM_TOKEN"  # Shared secret, also settable through the environment
+
+
+@dataclass
+class WorkerStats:
+    name: str
+    index: int
+    address: str
+    connected_at: float
+    last_seen: float
+    frames_done: int = 0
+    frame_seconds: float = 0.0  # Sum of the render times of its frames
+    leases: int = 0
+    expired_leases: int = 0
+    failed_leases: int = 0
+    current_lease: str = None
+
+    @property
+    def avg_frame_time(self):
+        return self.frame_seconds / self.frames_done if self.frames_done else None
+
+    @property
+    def frames_per_minute(self):
+        """Frames finished per minute of wall time since the worker joined."""
+        elapsed = self.last_seen - self.connected_at
+        return self.frames_done / elapsed * 60 if elapsed > 0 else 0.0
+
+
+@dataclass
+class Lease:
+    lease_id: str
+    worker: str
+    frames: list
+    attempts: int
+    expires_at: float
+    done: set = field(default_factory=set)
+
+
+class FarmCoordinator:
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, token=None, chunk_size=None, lease_timeout=LEASE_TIMEOUT,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, max_attempts=MAX_ATTEMPTS):
+        """
+        :param host: Interface to listen on; 0.0.0.0 accepts workers from the LAN.
+        :param port: TCP port, 0 picks a free one (see .port after start).
+        :param token: Shared secret workers must send; defaults to $BENDER_FARM_TOKEN, None accepts anyone.
+        :param chunk_size: Frames per lease, defaults to the job's chunk_size or DEFAULT_CHUNK_SIZE.
+        :param lease_timeout: Seconds without a heartbeat after which a lease is reassigned.
+        :param heartbeat_interval: Seconds between worker heartbeats, told to workers when they connect.
+        :param max_attempts: Leases of the same frames that may fail or expire before they are given up on.
+        """
+        self.host = host
+        self.port = port
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.chunk_size = chunk_size
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_attempts = max_attempts
+        self.job = None
+        self.result = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.start_time = None
+        self.workers = {}  # name -> WorkerStats
+        self.failed_frames = []
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._pending = deque()  # (frames, attempts)
+        self._leases = {}  # lease id -> Lease
+        self._done = set()
+        self._job_frames = set()
+        self._released = set()  # Workers told the job is done
+        self._canceled = False
+        self._finished = threading.Event()
+        self._stop = threading.Event()
+        self._server = None
+
+    def subscribe(self, callback):
+        """Registers callback(event); returns a function that unsubscribes it."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def emit(self, event):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(f"Error in render event subscriber: {e}")
+
+    @property
+    def running(self):
+        return self.job is not None and not self._finished.is_set()
+
+    def start(self, job):
+        """Starts listening for workers and returns immediately."""
+        if self.running:
+            raise RuntimeError("A render is already running on this coordinator")
+
+        frames = job.frames()
+        chunk_size = self.chunk_size or job.chunk_size or DEFAULT_CHUNK_SIZE
+        with self._lock:
+            self.job = job
+            self.result = None
+            self.frames_done = 0
+            self.total_frames = len(frames)
+            self.start_time = time.time()
+            self.failed_frames = []
+            if job.progressive:
+                batches = progressive_batches(frames, chunk_size)
+            else:
+                batches = [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+            self._pending = deque((batch, 0) for batch in batches)
+            self._leases = {}
+            self._done = set()
+            self._job_frames = set(frames)
+            self._released = set()
+            self._canceled = False
+            self._finished.clear()
+            self._stop.clear()
+
+        if self._server is None:
+            self._server = _FarmServer((self.host, self.port), _FarmHandler, self)
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            threading.Thread(target=self._reap_leases, daemon=True).start()
+        logger.info(f"🌐 Farm coordinator listening on {self.host}:{self.port}, "
+                    f"{len(self._pending)} chunks of up to {chunk_size} frames")
+        self.emit(RenderStarted(job, self.total_frames, self.start_time))
+        if not frames:
+            self._finish()
+
+    def run(self, job):
+        self.start(job)
+        self.wait()
+        return self.result
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        """Stops handing out work; workers stop at their next heartbeat."""
+        with self._lock:
+            self._canceled = True
+            self._pending.clear()
+        self._finish()
+
+    def stop(self, grace=0.0):
+        """
+        Closes the server.
+
+        :param grace: Seconds to keep answering so that workers still alive hear the job is done and exit cleanly.
+        """
+        deadline = time.time() + grace
+        while time.time() < deadline and self._waiting_workers():
+            time.sleep(0.1)
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _waiting_workers(self):
+        """Names of workers seen recently that haven't been told the job is done."""
+        now = time.time()
+        with self._lock:
+            return [name for name, stats in self.workers.items()
+                    if name not in self._released and now - stats.last_seen < self.lease_timeout]
+
+    def worker_processes(self):
+        """Blender runs on the workers, so there is nothing to sample locally."""
+        return []
+
+    def worker_stats(self):
+        """Returns a copy of every worker's WorkerStats, in the order they joined."""
+        with self._lock:
+            return [replace(stats) for stats in sorted(self.workers.values(), key=lambda stats: stats.index)]
+
+    def handle(self, request, address):
+        """Answers one worker request. Called from the server's connection threads."""
+        if self.token and not secrets.compare_digest(str(request.get("token", "")), self.token):
+            return {"error": "Invalid token"}
+        name = request.get("worker")
+        if not name:
+            return {"error": "Missing worker name"}
+        op = request.get("op")
+        now = time.time()
+        with self._lock:
+            stats = self.workers.get(name)
+            if stats is None:
+                stats = self.workers[name] = WorkerStats(name, len(self.workers), address, now, now)
+                logger.info(f"👷 Worker {name} joined from {address}")
+            stats.last_seen = now
+
+            if op == "hello":
+                return {"ok": True, "heartbeat": self.heartbeat_interval}
+            if op == "lease":
+                return self._lease(stats, now)
+
+            lease = self._leases.get(request.get("lease"))
+            if lease is not None and lease.worker != name:
+                lease = None
+            # A lost lease (expired and reassigned, or the job canceled) tells the worker to stop Blender
+            alive = lease is not None and not self._canceled
+            if alive:
+                lease.expires_at = now + self.lease_timeout
+            events = []
+            if op == "heartbeat":
+                return {"ok": alive}
+            if op == "frame_started":
+                if alive:
+                    events = [FrameRenderStarted(self.job, stats.index, request["frame"], now)]
+            elif op == "frame":
+                if not self._finished.is_set():
+                    events = self._frame_done(stats, lease, request["frame"], request.get("seconds", 0.0))
+            elif op == "complete":
+                self._complete(stats, lease, request.get("status"), request.get("error"))
+            else:
+                return {"error": f"Unknown op {op!r}"}
+            response = {"ok": alive}
+        for event in events:
+            self.emit(event)
+        self._check_finished()
+        return response
+
+    def _lease(self, stats, now):
+        if self._finished.is_set():
+            self._released.add(stats.name)
+            return {"done": True}
+        if not self._pending:
+            return {"wait": WAIT_SECONDS}
+        frames, attempts = self._pending.popleft()
+        lease = Lease(uuid.uuid4().hex[:12], stats.name, frames, attempts + 1, now + self.lease_timeout)
+        self._leases[lease.lease_id] = lease
+        stats.leases += 1
+        stats.current_lease = lease.lease_id
+        job = self.job
+        frame_ranges = compress_ranges(frames)
+        listed = ", ".join(f"{start}-{end}" if start != end else str(start) for start, end in frame_ranges)
+        logger.info(f"📤 Leased frames {listed} to {stats.name}")
+        return {
+            "lease": lease.lease_id,
+            "frames": frame_ranges,
+            "heartbeat": self.heartbeat_interval,
+            "job": {"blend_file": job.blend_file, "scene": job.scene, "output_file": job.output_file,
+                    "file_format": job.file_format, "profile": job.profile and job.profile.to_dict()},
+        }
+
+    def _frame_done(self, stats, lease, frame, seconds):
+        """Counts a saved frame once, even if it arrives on an expired lease after being reassigned."""
+        if lease is not None:
+            lease.done.add(frame)
+        if frame in self._done or frame not in self._job_frames:
+            return []
+        self._done.add(frame)
+        self.frames_done += 1
+        stats.frames_done += 1
+        stats.frame_seconds += seconds
+        return [FrameRendered(self.job, stats.index, frame, seconds, self.frames_done, self.total_frames,
+                              time.time() - self.start_time)]
+
+    def _complete(self, stats, lease, status, error):
+        if lease is None:
+            return  # Already expired and reassigned
+        del self._leases[lease.lease_id]
+        stats.current_lease = None
+        if status != DONE and not self._canceled:
+            stats.failed_leases += 1
+            logger.warning(f"⚠️ Worker {stats.name} failed frames {lease.frames[0]}-{lease.frames[-1]}: {error}")
+        self._requeue(lease)
+
+    def _requeue(self, lease):
+        """Puts the frames of a lease that were not saved back at the front of the queue."""
+        left = [frame for frame in lease.frames if frame not in self._done]
+        if not left or self._canceled:
+            return
+        if lease.attempts >= self.max_attempts:
+            logger.error(f"Error: Giving up on frames {left[0]}-{left[-1]} after {lease.attempts} attempts")
+            self.failed_frames.extend(left)
+            return
+        self._pending.appendleft((left, lease.attempts))
+
+    def _reap_leases(self):
+        while not self._stop.wait(1.0):
+            now = time.time()
+            with self._lock:
+                expired = [lease for lease in self._leases.values() if lease.expires_at < now]
+                for lease in expired:
+                    del self._leases[lease.lease_id]
+                    stats = self.workers.get(lease.worker)
+                    if stats is not None:
+                        stats.expired_leases += 1
+                        stats.current_lease = None
+                    logger.warning(f"💀 Lease of {lease.worker} on frames {lease.frames[0]}-{lease.frames[-1]} "
+                                   f"expired, reassigning")
+                    self._requeue(lease)
+            if expired:
+                self._check_finished()
+
+    def _check_finished(self):
+        with self._lock:
+            if self._finished.is_set() or self._pending or self._leases:
+                return
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            if self._finished.is_set():
+                return
+            if self._canceled:
+                status = CANCELED
+            elif self.failed_frames:
+                status = FAILED
+            else:
+                status = DONE
+            failed = tuple(compress_ranges(sorted(self.failed_frames)))
+            self.result = RenderFinished(self.job, status, self.frames_done, self.total_frames,
+                                         time.time() - self.start_time, failed)
+        self.emit(self.result)
+        self._finished.set()
+
+
+class _FarmServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, coordinator):
+        self.coordinator = coordinator
+        super().__init__(address, handler)
+
+
+class _FarmHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        address = self.client_address[0]
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.coordinator.handle(request, address)
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": f"Bad request: {e}"}
+            try:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+class FarmConnection:
+    """One worker's connection to the coordinator, shared by its render and heartbeat threads."""
+
+    def __init__(self, host, port, name, token=None, timeout=30):
+        self.name = name
+        self.token = token
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._stream = self._socket.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def request(self, op, **fields):
+        message = dict(fields, op=op, worker=self.name)
+        if self.token:
+            message["token"] = self.token
+        with self._lock:
+            self._stream.write(json.dumps(message).encode() + b"\n")
+            self._stream.flush()
+            line = self._stream.readline()
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ConnectionError(f"Coordinator refused {op}: {response['error']}")
+        return response
+
+    def close(self):
+        for closeable in (self._stream, self._socket):
+            try:
+                closeable.close()
+            except OSError:
+                pass
+
+
+class FarmWorker:
+    def __init__(self, host, port=DEFAULT_PORT, name=None, token=None, workers=1, threads=None, persistent=False,
+                 retry_interval=5.0):
+        """
+        :param host: Coordinator host name or address.
+        :param port: Coordinator port.
+        :param name: Worker name shown in the stats, defaults to <hostname>-<pid>.
+        :param token: Shared secret, defaults to $BENDER_FARM_TOKEN.
+        :param workers: Local Blender processes per lease.
+        :param threads: Render threads per Blender process (-t).
+        :param persistent: Keep waiting for coordinators instead of exiting when the job is done or unreachable.
+        :param retry_interval: Seconds between connection attempts in persistent mode.
+        """
+        self.host = host
+        self.port = port
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.workers = workers
+        self.threads = threads
+        self.persistent = persistent
+        self.retry_interval = retry_interval
+        self.frames_rendered = 0
+        self.engine = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stops after cancelling the current lease."""
+        self._stop.set()
+        if self.engine is not None:
+            self.engine.cancel()
+
+    def run(self):
+        """Works through leases until the coordinator is done (or forever when persistent)."""
+        while not self._stop.is_set():
+            try:
+                connection = FarmConnection(self.host, self.port, self.name, self.token)
+            except OSError as e:
+                if not self.persistent:
+                    logger.error(f"Error: Cannot reach coordinator {self.host}:{self.port}: {e}")
+                    return 1
+                self._stop.wait(self.retry_interval)
+                continue
+            try:
+                heartbeat = connection.request("hello").get("heartbeat", HEARTBEAT_INTERVAL)
+                logger.info(f"🔗 {self.name} connected to {self.host}:{self.port}")
+                done = self._work(connection, heartbeat)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Lost the coordinator: {e}")
+                done = False
+            finally:
+                connection.close()
+            if not self.persistent:
+                return 0 if done else 1
+            self._stop.wait(self.retry_interval)
+        return 0
+
+    def _work(self, connection, heartbeat):
+        while not self._stop.is_set():
+            response = connection.request("lease")
+            if response.get("done"):
+                logger.info(f"🏁 {self.name}: coordinator has no more work ({self.frames_rendered} frames rendered)")
+                return True
+            if "wait" in response:
+                self._stop.wait(response["wait"])
+                continue
+            self._render_lease(connection, response, heartbeat)
+        return False
+
+    def _render_lease(self, connection, lease, heartbeat):
+        lease_id = lease["lease"]
+        frame_ranges = [tuple(frame_range) for frame_range in lease["frames"]]
+        spec = lease["job"]
+        job = RenderJob(spec["blend_file"], frame_ranges[0][0], frame_ranges[-1][1], output_file=spec["output_file"],
+                        file_format=spec["file_format"], workers=self.workers, threads=self.threads,
+                        frame_ranges=frame_ranges, scene=spec.get("scene"))
+        if spec.get("profile"):
+            job = apply_profile(job, RenderProfile.from_dict(spec["profile"]))
+
+        engine = self.engine = RenderEngine()
+        finished = threading.Event()
+
+        def withdraw():
+            if not finished.is_set():
+                logger.warning(f"⛔ Lease {lease_id} was withdrawn, stopping Blender")
+                finished.set()
+                engine.cancel()
+
+        def report(event):
+            try:
+                if isinstance(event, FrameRenderStarted):
+                    alive = connection.request("frame_started", lease=lease_id, frame=event.frame).get("ok")
+                elif isinstance(event, FrameRendered):
+                    self.frames_rendered += 1
+                    alive = connection.request("frame", lease=lease_id, frame=event.frame,
+                                               seconds=event.seconds).get("ok")
+                else:
+                    return
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Could not report to the coordinator: {e}")
+                return
+            if not alive:
+                withdraw()
+        engine.subscribe(report)
+
+        def send_heartbeats():
+            while not finished.wait(heartbeat):
+                try:
+                    alive = connection.request("heartbeat", lease=lease_id).get("ok")
+                except (OSError, ValueError):
+                    alive = False
+                if not alive:
+                    withdraw()
+                    return
+        heartbeat_thread = threading.Thread(target=send_heartbeats, daemon=True)
+        heartbeat_thread.start()
+
+        result = engine.run(job)
+        finished.set()
+        heartbeat_thread.join()
+        error = None
+        if result.status != DONE:
+            error = f"{result.status}, failed chunks {list(result.failed_chunks)}"
+        connection.request("complete", lease=lease_id, status=result.status, error=error)
@@ -0,0 +1,155 @@
+"""
+Finds which frames of a render already exist on disk.
+
+Used by resume mode: the output pattern (e.g. /renders/shot_####) is
+expanded the same way Blender does, the output folder is listed once, and
+the frames that are missing or too small to be valid are compressed into the
+fewest contiguous ranges so only those get rendered.
+
+Also orders frames coarse-to-fine for progressive renders: every 16th frame
+of the sequence first, then the frames halfway between those, and so on, so
+the whole shot can be previewed (and broken frames spotted) long before the
+render is done.
+"""
+import dataclasses
+import logging
+import os
+import statistics
+
+from blender_utils.scene_inventory import scene_blend_info
+
+logger = logging.getLogger(__name__)
+
+# File extensions Blender adds with -x 1, by image format
+FORMAT_EXTENSIONS = {
+    "OPEN_EXR": ".exr", "OPEN_EXR_MULTILAYER": ".exr", "PNG": ".png", "JPEG": ".jpg",
+    "JPEG2000": ".jp2", "TIFF": ".tif", "BMP": ".bmp", "HDR": ".hdr", "TARGA": ".tga",
+    "TARGA_RAW": ".tga", "CINEON": ".cin", "DPX": ".dpx", "WEBP": ".webp", "IRIS": ".rgb",
+}
+
+# Frames smaller than this fraction of the median existing frame are treated as truncated
+MIN_RELATIVE_SIZE = 0.1
+
+PROGRESSIVE_STEP = 16  # Frame step of the first, coarsest pass of a progressive render
+
+
+def frame_path(pattern, frame, extension=""):
+    """Expands an output pattern for one frame the way Blender does."""
+    end = pattern.rfind("#")
+    if end == -1:
+        path = f"{pattern}{frame:04d}"
+    else:
+        start = end
+        while start > 0 and pattern[start - 1] == "#":
+            start -= 1
+        width = end - start + 1
+        path = f"{pattern[:start]}{frame:0{width}d}{pattern[end + 1:]}"
+    if extension and not path.lower().endswith(extension):
+        path += extension
+    return path
+
+
+def find_rendered_frames(pattern, frames, extension="", min_size=1):
+    """Returns the subset of frames whose output file exists and has a plausible size."""
+    directory = os.path.dirname(pattern) or "."
+    try:
+        sizes = {entry.name: entry.stat().st_size for entry in os.scandir(directory) if entry.is_file()}
+    except FileNotFoundError:
+        return set()
+
+    existing = {}
+    for frame in frames:
+        size = sizes.get(os.path.basename(frame_path(pattern, frame, extension)))
+        if size is not None and size >= min_size:
+            existing[frame] = size
+
+    if len(existing) >= 3:
+        threshold = statistics.median(existing.values()) * MIN_RELATIVE_SIZE
+        existing = {frame: size for frame, size in existing.items() if size >= threshold}
+    return set(existing)
+
+
+def compress_ranges(frames):
+    """Turns a collection of frame numbers into sorted, contiguous (start, end) ranges."""
+    ranges = []
+    for frame in sorted(set(frames)):
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(frame_range) for frame_range in ranges]
+
+
+def expand_ranges(frame_ranges):
+    """Returns every frame number covered by a list of (start, end) ranges."""
+    return [frame for start, end in frame_ranges for frame in range(start, end + 1)]
+
+
+def progressive_passes(frames, coarsest=PROGRESSIVE_STEP):
+    """
+    Splits frames into coarse-to-fine passes: every coarsest-th frame counted from the
+    first one, then the frames halfway between those, and so on down to step 1.
+
+    Every frame lands in exactly one pass; passes are in frame order and empty ones are dropped.
+    """
+    frames = sorted(set(frames))
+    if not frames:
+        return []
+    origin = frames[0]
+    passes = []
+    taken = set()
+    step = max(1, coarsest)
+    while True:
+        current = [frame for frame in frames if (frame - origin) % step == 0 and frame not in taken]
+        taken.update(current)
+        if current:
+            passes.append(current)
+        if step == 1:
+            return passes
+        step //= 2
+
+
+def progressive_batches(frames, batch_size, coarsest=PROGRESSIVE_STEP):
+    """Cuts each progressive pass into batches of up to batch_size frames; a batch never spans two passes."""
+    return [frames_pass[i:i + batch_size] for frames_pass in progressive_passes(frames, coarsest)
+            for i in range(0, len(frames_pass), batch_size)]
+
+
+def output_pattern(job):
+    """Returns the output pattern a job writes to: its override or the scene's render path."""
+    if job.output_file:
+        return job.output_file
+    blend_info = scene_blend_info(job.blend_file, job.scene)
+    if not blend_info:
+        return None
+    return os.path.join(blend_info["output_path"], blend_info["render_filename"])
+
+
+def output_format(job):
+    """Returns the image format a job writes: its -F override or the scene's format."""
+    if job.file_format:
+        return job.file_format
+    blend_info = scene_blend_info(job.blend_file, job.scene)
+    return blend_info["image_format"] if blend_info else None
+
+
+def plan_resume(job, min_size=1):
+    """
+    Returns a copy of a RenderJob restricted to the frames that are still missing.
+
+    Returns None when every frame already exists, and the job unchanged when the
+    output location can't be determined.
+    """
+    pattern = output_pattern(job)
+    if not pattern:
+        logger.warning("⚠️ Could not determine the output path, rendering all frames")
+        return job
+
+    frames = job.frames()
+    extension = FORMAT_EXTENSIONS.get(output_format(job), "")
+    rendered = find_rendered_frames(pattern, frames, extension, min_size)
+    missing = [frame for frame in frames if frame not in rendered]
+    logger.info(f"🔎 Resume: {len(rendered)} of {len(frames)} frames already rendered in {os.path.dirname(pattern)}")
+    if not missing:
+        return None
+    return dataclasses.replace(job, frame_ranges=compress_ranges(missing))
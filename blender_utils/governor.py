@@ -0,0 +1,250 @@
+"""
+Keeps renders from starting or growing when the machine can't take them.
+
+Before a job starts, check_admission() compares what the render history says
+the file needs with what the machine has right now. That means the peak RAM
+of one Blender process times the number of workers, and the average frame
+size times the number of frames against the free space at the output path.
+It also looks at how busy the CPUs already are. Too little memory or CPU
+throttles the job to fewer workers; too little disk space refuses it.
+
+While the job runs, a ResourceGovernor is asked before every Blender launch.
+It holds the launch back while free RAM (minus what the running instances
+are still expected to grow by) is below the file's peak. Once the frames still
+to come, projected from the size of the first ones, won't fit on the output
+disk, it stops the render instead of launching more Blenders; running ones are
+stopped too when the disk is about to run full. Its latest reason is kept in
+status for the UI.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, replace
+
+import psutil
+
+from blender_utils.frame_scan import output_pattern
+from blender_utils.log_parser import FrameSaved
+from blender_utils.render_engine import FrameRendered, RenderFinished, RenderJob, RenderLogEvent, RenderStarted
+from blender_utils.render_history import history_profile
+
+logger = logging.getLogger(__name__)
+
+MEMORY_MARGIN = 0.15  # Extra headroom on top of the historical peak RSS
+CPU_BUSY = 0.85  # Load average per logical CPU above which other work is considered to be using the machine
+PROJECTION_FRAMES = 3  # Frames saved before their sizes are trusted for the disk projection
+DISK_RESERVE_FRAMES = 4  # Free space, in frames, below which the render is stopped
+LAUNCH_SECONDS = 5.0  # How long an admitted launch is counted at full peak before its process shows up
+NICE = 10  # Default niceness for renders, so the desktop and other services stay responsive
+
+START = "start"
+THROTTLE = "throttle"
+REFUSE = "refuse"
+
+
+def format_size(size):
+    return f"{size / 1024 ** 3:.1f} GB" if size >= 1024 ** 3 else f"{size / 1024 ** 2:.0f} MB"
+
+
+def free_space(path):
+    """Free bytes on the disk holding path (or its nearest existing parent), None if unknown."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+
+def output_dir(job):
+    """Folder a job writes its frames to, None if it can't be determined."""
+    pattern = output_pattern(job)
+    return os.path.dirname(os.path.abspath(pattern)) if pattern else None
+
+
+@dataclass
+class Admission:
+    job: RenderJob  # The job to render, with fewer workers when throttled
+    action: str  # START, THROTTLE or REFUSE
+    reason: str = None
+
+
+def check_admission(job, render_history=None, disk_path=None):
+    """
+    Decides whether a job can start on this machine now, and with how many workers.
+
+    :param render_history: RenderHistory with the file's peak RAM and frame size, if any.
+    :param disk_path: Folder the frames end up in, defaults to the job's output folder.
+    """
+    history = render_history and render_history.get(job.blend_file, job.scene, history_profile(job.profile))
+    if history is not None and history.frame_bytes:
+        disk_path = disk_path or output_dir(job)  # May read the scene settings, so only when there's a size to check
+        free = free_space(disk_path) if disk_path else None
+        needed = history.frame_bytes * job.total_frames
+        if free is not None and needed > free:
+            return Admission(job, REFUSE, f"{job.total_frames} frames need about {format_size(needed)} at "
+                                          f"{disk_path}, only {format_size(free)} free")
+
+    workers = job.workers
+    reasons = []
+    if history is not None and history.peak_rss:
+        need = history.peak_rss * (1 + MEMORY_MARGIN)
+        available = psutil.virtual_memory().available
+        fit = int(available // need)
+        if fit < workers:
+            workers = max(1, fit)
+            reasons.append(f"{format_size(available)} RAM free, one Blender peaked at {format_size(history.peak_rss)}")
+    if hasattr(psutil, "getloadavg") and workers > 1:
+        load = psutil.getloadavg()[0] / (psutil.cpu_count(logical=True) or 1)
+        if load > CPU_BUSY:
+            workers = 1
+            reasons.append(f"CPUs already {load:.0%} busy")
+    if workers < job.workers:
+        reason = f"{', '.join(reasons)}: rendering with {workers} of {job.workers} workers"
+        return Admission(replace(job, workers=workers), THROTTLE, reason)
+    return Admission(job, START)
+
+
+class ResourceGovernor:
+    def __init__(self, engine, render_history=None, disk_path=None, memory_margin=MEMORY_MARGIN):
+        """
+        :param engine: RenderEngine whose Blender launches are gated.
+        :param render_history: RenderHistory with the peak RAM of earlier renders of the file.
+        :param disk_path: Folder the frames end up in (e.g. the final folder when staging), defaults to the output folder.
+        :param memory_margin: Extra headroom on top of the historical peak.
+        """
+        self.engine = engine
+        self.render_history = render_history
+        self.disk_path = disk_path
+        self.memory_margin = memory_margin
+        self.status = None  # Why Blender is being held back right now, for the UI
+        self.stopped = None  # Why the render was stopped, if it was
+        self._job = None
+        self._peak_rss = None
+        self._saved_bytes = 0  # Total size of the frames saved so far
+        self._saved_frames = 0
+        self._frames_done = 0
+        self._admitted = {}  # worker -> time it was let through, until its process shows up
+        self._gate_lock = threading.Lock()  # One admission decision at a time
+        self._lock = threading.Lock()
+        engine.subscribe(self._on_event)
+        engine.add_gate(self._gate)
+
+    def _on_event(self, event):
+        if isinstance(event, RenderStarted):
+            job = event.job
+            history = self.render_history and self.render_history.get(job.blend_file, job.scene,
+                                                                       history_profile(job.profile))
+            with self._lock:
+                self._job = job
+                self._peak_rss = history.peak_rss if history is not None else None
+                self._saved_bytes = self._saved_frames = 0
+                self._frames_done = 0
+                self._admitted = {}
+                self.status = self.stopped = None
+        elif isinstance(event, RenderLogEvent) and isinstance(event.event, FrameSaved) and event.event.path:
+            try:
+                size = os.path.getsize(event.event.path)
+            except OSError:
+                return
+            with self._lock:
+                self._saved_bytes += size
+                self._saved_frames += 1
+        elif isinstance(event, FrameRendered):
+            with self._lock:
+                self._frames_done = event.frames_done
+            self._check_disk(event.total_frames)
+        elif isinstance(event, RenderFinished):
+            with self._lock:
+                self.status = self.stopped
+
+    def _disk_projection(self, total_frames):
+        """Returns (bytes the remaining frames need, bytes free, average frame size), or None if unknown yet."""
+        with self._lock:
+            if self._saved_frames < PROJECTION_FRAMES or self._job is None:
+                return None
+            average = self._saved_bytes / self._saved_frames
+            remaining = max(0, total_frames - self._frames_done)
+            path = self.disk_path or output_dir(self._job)
+        free = free_space(path) if path else None
+        if free is None:
+            return None
+        return remaining * average, free, average
+
+    def _check_disk(self, total_frames):
+        """Stops the render before the output disk runs full."""
+        projection = self._disk_projection(total_frames)
+        if projection is None or self.stopped:
+            return
+        needed, free, average = projection
+        if needed > free and free < average * DISK_RESERVE_FRAMES:
+            self._stop(f"Output disk full: {format_size(free)} free, the remaining frames need about "
+                       f"{format_size(needed)}")
+
+    def _stop(self, reason):
+        with self._lock:
+            if self.stopped:
+                return
+            self.stopped = self.status = reason
+        logger.error(f"❌ {reason}. Stopping the render; free some space and render again with resume")
+        self.engine.cancel()
+
+    def _gate(self, worker):
+        """Returns why another Blender process can't start right now, or None."""
+        with self._gate_lock:
+            reason = self._memory_reason(worker) or self._disk_reason()
+            with self._lock:
+                self.status = reason
+                if reason is None:
+                    self._admitted[worker] = time.monotonic()
+        return reason
+
+    def _memory_reason(self, worker):
+        peak = self._peak_rss
+        if not peak:
+            return None
+        need = peak * (1 + self.memory_margin)
+        memory = psutil.virtual_memory()
+        if need > memory.total:
+            return None  # Can never fit; holding back would only wait forever
+        # Running instances that haven't reached their peak yet will still take memory,
+        # and ones let through a moment ago may not have started at all
+        growth = 0
+        running = set()
+        for index, pid, _ in self.engine.worker_processes():
+            running.add(index)
+            try:
+                process = psutil.Process(pid)
+                rss = sum(member.memory_info().rss for member in [process] + process.children(recursive=True))
+            except psutil.Error:
+                continue
+            growth += max(0, peak - rss)
+        now = time.monotonic()
+        with self._lock:
+            launching = [index for index, admitted in self._admitted.items()
+                         if index != worker and index not in running and now - admitted < LAUNCH_SECONDS]
+        growth += peak * len(launching)
+        headroom = memory.available - growth
+        if headroom < need:
+            return (f"waiting for RAM: one Blender of this file peaked at {format_size(peak)}, "
+                    f"{format_size(max(0, headroom))} free after the running ones")
+        return None
+
+    def _disk_reason(self):
+        """Stops the render when the remaining frames won't fit; waiting wouldn't free any space."""
+        job = self._job
+        projection = self._disk_projection(job.total_frames) if job is not None else None
+        if projection is None:
+            return None
+        needed, free, _ = projection
+        if needed > free:
+            self._stop(f"Not enough disk space: the remaining frames need about {format_size(needed)}, "
+                       f"{format_size(free)} free")
+            return self.stopped
+        return None
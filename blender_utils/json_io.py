@@ -0,0 +1,41 @@
+import json
+import logging
+import os
+import tempfile
+
+from blender_utils.log import timed
+
+logger = logging.getLogger(__name__)
+
+
+@timed("json.write")
+def atomic_write_json(path, data, indent=4):
+    """Writes JSON to a temp file in the same directory and renames it over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())  # Make sure the data is on disk before the rename
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@timed("json.read")
+def read_json(path, default=None):
+    """Loads a JSON file, returning default if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Could not read {path}: {e}")
+        return default
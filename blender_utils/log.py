@@ -0,0 +1,222 @@
+"""
+Logging setup, the recent-output ring buffer and timing spans.
+
+Modules log through logging.getLogger(__name__). Entry points call
+setup_logging() once: records are handed to a QueueHandler so the thread
+that logs (a render worker reading Blender's pipes, the Tk loop) never waits
+on the console, and a QueueListener thread writes them out.
+
+Blender's own output goes to the BLENDER_OUTPUT logger at DEBUG level. It is
+kept in an in-memory ring buffer for the GUI's log window whatever the
+console level is, and only reaches the console in DEBUG mode.
+
+Timing spans cost one global check unless profiling is on (setup_logging(profile=True)
+or BENDER_PROFILE=1); then every span records its count and a latency
+histogram, dumped by dump_profile() and at exit.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+BLENDER_OUTPUT = "blender_utils.blender_output"
+RING_BUFFER_LINES = 5000
+
+# Span latency histogram: bucket i holds durations below 2**i microseconds (the last one is open-ended)
+SPAN_BUCKETS = 32
+
+_listener = None
+_ring_buffer = None
+_profiling = os.environ.get("BENDER_PROFILE") == "1"
+_spans = {}
+_spans_lock = threading.Lock()
+if _profiling:
+    atexit.register(lambda: dump_profile())
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last few thousand formatted records; readers fetch what they haven't seen yet by sequence number."""
+
+    def __init__(self, capacity=RING_BUFFER_LINES):
+        super().__init__()
+        self.lines = deque(maxlen=capacity)
+        self.sequence = 0  # Number of records ever added
+
+    def emit(self, record):
+        with self.lock:
+            self.lines.append(record.getMessage())
+            self.sequence += 1
+
+    def since(self, sequence):
+        """Returns (new sequence, lines added after sequence), limited to what is still buffered."""
+        with self.lock:
+            missed = min(self.sequence - sequence, len(self.lines))
+            return self.sequence, list(self.lines)[len(self.lines) - missed:] if missed > 0 else []
+
+
+def setup_logging(level="INFO", log_file=None, profile=None):
+    """
+    Configures console (and optionally file) logging through a background queue listener.
+
+    :param level: Console level name or number; DEBUG also echoes Blender's output.
+    :param log_file: Path of a log file that receives every record at DEBUG level.
+    :param profile: Turns timing spans on or off; None keeps the BENDER_PROFILE setting.
+    """
+    global _listener, _ring_buffer
+    if _listener is not None:
+        _listener.stop()
+
+    console = logging.StreamHandler(sys.stderr)  # stdout stays free for JSON output such as info
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        handlers.append(file_handler)
+
+    # Records below every handler's level are dropped before they are queued
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.setLevel(min(handler.level for handler in handlers))
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(queue_handler.level)
+
+    _ring_buffer = get_ring_buffer()
+    if profile is not None:
+        set_profiling(profile)
+
+
+def get_ring_buffer():
+    """Returns the buffer of recent Blender output, attaching it on first use."""
+    global _ring_buffer
+    if _ring_buffer is None:
+        _ring_buffer = RingBufferHandler()
+        output_logger = logging.getLogger(BLENDER_OUTPUT)
+        output_logger.setLevel(logging.DEBUG)
+        output_logger.addHandler(_ring_buffer)
+    return _ring_buffer
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * SPAN_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[min(SPAN_BUCKETS - 1, int(seconds * 1_000_000).bit_length())] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the percentile, in seconds."""
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(2 ** index / 1_000_000, self.max)
+        return self.max
+
+
+def set_profiling(enabled):
+    global _profiling
+    if enabled and not _profiling:
+        atexit.register(dump_profile)
+    _profiling = enabled
+
+
+def profiling_enabled():
+    return _profiling
+
+
+def record_span(name, seconds):
+    with _spans_lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = SpanStats()
+        stats.add(seconds)
+
+
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Context manager timing a block under name when profiling is on, otherwise free."""
+    return _timed(name) if _profiling else _NO_SPAN
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profiling:
+                return func(*args, **kwargs)
+            with _timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profile_report():
+    """Returns the span statistics as text: counts, mean/p50/p95/max and a histogram per span."""
+    with _spans_lock:
+        spans = {name: stats for name, stats in sorted(_spans.items())}
+    if not spans:
+        return "No timing spans recorded"
+
+    def ms(seconds):
+        return f"{seconds * 1000:.3f}"
+
+    lines = [f"{'span':<32}{'count':>8}{'mean ms':>12}{'p50 ms':>12}{'p95 ms':>12}{'max ms':>12}"]
+    for name, stats in spans.items():
+        lines.append(f"{name:<32}{stats.count:>8}{ms(stats.total / stats.count):>12}{ms(stats.percentile(0.5)):>12}"
+                     f"{ms(stats.percentile(0.95)):>12}{ms(stats.max):>12}")
+        for index, count in enumerate(stats.buckets):
+            if count:
+                bar = "#" * max(1, round(40 * count / stats.count))
+                lines.append(f"    < {2 ** index:>10} µs {count:>8} {bar}")
+    return "\n".join(lines)
+
+
+def dump_profile(file=None):
+    if _spans:
+        print(profile_report(), file=file or sys.stderr)
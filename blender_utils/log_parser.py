@@ -0,0 +1,187 @@
+"""
+Turns Blender's render log into typed events.
+
+Each line is first checked against a handful of cheap prefixes; only lines
+that can carry render information go through the precompiled patterns.
+Typical lines:
+
+    Fra:12 Mem:203.31M (Peak 204.06M) | Time:00:01.29 | Remaining:00:08.41 | Mem:59.46M, Peak:59.46M | Scene, ViewLayer | Sample 16/128
+    Fra:12 Mem:93.87M (Peak 101.04M) | Time:00:00.57 | Rendering 1 / 64 samples
+    Fra:12 Mem:120.00M (Peak 150.00M) | Time:00:03.10 | Rendered 12/135 Tiles, Sample 32/128
+    Saved: '/renders/shot_0012.exr'
+    Append frame 12  (movie formats, instead of Saved:)
+    Warning: ...  /  Error: ...
+"""
+import re
+from dataclasses import dataclass
+
+# Memory, elapsed and remaining time come first on a progress line, so one anchored match covers them
+_FRA = re.compile(r"Fra:(\d+) Mem:([\d.]+)([KMG])?(?: \(Peak ([\d.]+)([KMG])?\))?"
+                  r"(?: \| Time:([\d:.]+))?(?: \| Remaining:([\d:.]+))?")
+_SAMPLES = re.compile(r"(?:Rendered (\d+)/(\d+) Tiles, )?(?:Rendering|Sample) (\d+) ?/ ?(\d+)")
+_SAVED = re.compile(r"Saved: '(.*)'")
+_APPENDED = re.compile(r"Append frame (\d+)")
+_SAVE_TIME = re.compile(r"Time: ([\d:.]+) \(Saving: ([\d:.]+)\)")
+
+_UNIT_MB = {None: 1.0, "K": 1 / 1024, "M": 1.0, "G": 1024.0}
+
+_ERROR_PREFIXES = (
+    "Error", "ERROR", "Fatal", "EXCEPTION", "Segmentation fault", "Traceback", "Killed",
+    "CUDA error", "OptiX error", "HIP error", "Metal error", "Out of memory", "Malloc returns null",
+    "Calloc returns null", "Writing: ",  # Blender announces its crash log with 'Writing: /tmp/x.crash.txt'
+)
+_WARNING_PREFIXES = ("Warning", "WARNING", "Warn:")
+
+# Any line that doesn't start with one of these is ignored without running a regex
+_INTERESTING_PREFIXES = ("Fra:", "Saved:", " Time:", "Append frame") + _ERROR_PREFIXES + _WARNING_PREFIXES
+_NO_EVENTS = ()
+
+
+def parse_duration(text):
+    """Parses Blender's '[HH:]MM:SS.hh' durations into seconds."""
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+@dataclass(slots=True)
+class FrameStarted:
+    frame: int
+
+
+@dataclass(slots=True)
+class SampleProgress:
+    frame: int
+    sample: int
+    total_samples: int
+    tile: int = None
+    total_tiles: int = None
+    elapsed: float = None  # Seconds spent on the frame so far, as reported by Blender
+    remaining: float = None
+
+
+@dataclass(slots=True)
+class MemoryUsage:
+    frame: int
+    memory_mb: float
+    peak_mb: float
+
+
+@dataclass(slots=True)
+class FrameSaved:
+    frame: int
+    path: str  # None for frames appended to a movie file
+
+
+@dataclass(slots=True)
+class FrameTime:
+    frame: int
+    seconds: float  # Blender's own total for the frame, printed after 'Saved:'
+    saving_seconds: float
+
+
+@dataclass(slots=True)
+class LogWarning:
+    frame: int
+    message: str
+
+
+@dataclass(slots=True)
+class LogError:
+    frame: int
+    message: str
+
+
+class BlenderLogParser:
+    """
+    Stateful parser for one Blender process's output.
+
+    feed(line) returns a sequence of events (usually empty). FrameStarted is emitted
+    the first time a frame number appears; frame completion comes from the
+    'Saved:' line rather than from the frame number changing. MemoryUsage is only
+    emitted when the numbers change.
+    """
+
+    def __init__(self):
+        self.current_frame = None
+        self.saved_frames = []
+        self.peak_memory_mb = 0.0
+        self.errors = []
+        self._last_memory = None
+
+    def feed(self, line):
+        if not line.startswith(_INTERESTING_PREFIXES):
+            return _NO_EVENTS
+        if line.startswith("Fra:"):
+            return self._parse_progress(line)
+        if line.startswith("Saved:"):
+            return self._parse_saved(line)
+        if line.startswith("Append frame"):
+            return self._parse_appended(line)
+        if line.startswith(" Time:"):
+            return self._parse_save_time(line) if self.saved_frames else _NO_EVENTS
+        if line.startswith(_WARNING_PREFIXES):
+            return [LogWarning(self.current_frame, line)]
+        return self._error(line)
+
+    def _error(self, line):
+        event = LogError(self.current_frame, line)
+        self.errors.append(event)
+        return [event]
+
+    def _parse_progress(self, line):
+        match = _FRA.match(line)
+        if match is None:
+            return _NO_EVENTS
+        frame = int(match.group(1))
+        events = []
+        if frame != self.current_frame:
+            self.current_frame = frame
+            self._last_memory = None
+            events.append(FrameStarted(frame))
+
+        memory = match.group(2, 4)
+        if memory != self._last_memory:
+            # Blender repeats the same numbers on most lines, only report changes
+            self._last_memory = memory
+            memory_mb = float(memory[0]) * _UNIT_MB[match.group(3)]
+            peak_mb = float(memory[1]) * _UNIT_MB[match.group(5)] if memory[1] else memory_mb
+            if peak_mb > self.peak_memory_mb:
+                self.peak_memory_mb = peak_mb
+            events.append(MemoryUsage(frame, memory_mb, peak_mb))
+
+        # Sample counts are always the last '| ' field, so match there instead of scanning the line
+        samples = _SAMPLES.match(line, line.rfind("| ") + 2)
+        if samples:
+            tile, total_tiles, sample, total_samples = samples.groups()
+            elapsed, remaining = match.group(6, 7)
+            events.append(SampleProgress(
+                frame, int(sample), int(total_samples),
+                tile=int(tile) if tile else None,
+                total_tiles=int(total_tiles) if total_tiles else None,
+                elapsed=parse_duration(elapsed) if elapsed else None,
+                remaining=parse_duration(remaining) if remaining else None,
+            ))
+        return events
+
+    def _parse_saved(self, line):
+        match = _SAVED.match(line)
+        if match is None:
+            return _NO_EVENTS
+        self.saved_frames.append(self.current_frame)
+        return [FrameSaved(self.current_frame, match.group(1))]
+
+    def _parse_appended(self, line):
+        match = _APPENDED.match(line)
+        if match is None:
+            return _NO_EVENTS
+        frame = int(match.group(1))
+        self.saved_frames.append(frame)
+        return [FrameSaved(frame, None)]
+
+    def _parse_save_time(self, line):
+        match = _SAVE_TIME.match(line.lstrip())
+        if match is None:
+            return _NO_EVENTS
+        return [FrameTime(self.saved_frames[-1], parse_duration(match.group(1)), parse_duration(match.group(2)))]
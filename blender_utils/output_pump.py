@@ -0,0 +1,139 @@
+"""
+Drains a subprocess's stdout and stderr concurrently.
+
+Blender can block forever if one of its pipes fills up while the reader
+waits on the other, so both are read at the same time: with a selector on
+POSIX, or one reader thread per pipe where pipes can't be selected
+(Windows). Data is read in large binary chunks, split into lines, stamped
+with the time it arrived and handed to a bounded queue, one batch per read. When the consumer
+falls behind the queue fills up and the pump stops reading, which pushes
+back on Blender instead of buffering without limit.
+"""
+import os
+import queue
+import selectors
+import sys
+import threading
+import time
+from collections import namedtuple
+
+OutputLine = namedtuple("OutputLine", ["time", "stream", "text"])
+
+READ_SIZE = 64 * 1024
+_EOF = object()
+
+
+class LineSplitter:
+    """Splits a byte stream into decoded lines, only copying the partial line carried between reads."""
+
+    def __init__(self):
+        self._partial = b""
+
+    def feed(self, data):
+        lines = []
+        start = 0
+        end = data.find(b"\n")
+        if end == -1:
+            self._partial += data
+            return lines
+        if self._partial:
+            lines.append(self._decode(self._partial + data[:end]))
+            self._partial = b""
+            start = end + 1
+            end = data.find(b"\n", start)
+        while end != -1:
+            lines.append(self._decode(data[start:end]))
+            start = end + 1
+            end = data.find(b"\n", start)
+        self._partial = data[start:]
+        return lines
+
+    def flush(self):
+        """Returns the trailing unterminated line, if any."""
+        if not self._partial:
+            return []
+        line, self._partial = self._decode(self._partial), b""
+        return [line]
+
+    @staticmethod
+    def _decode(raw):
+        return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+class OutputPump:
+    def __init__(self, process, maxsize=64, read_size=READ_SIZE):
+        """
+        :param process: A Popen started with stdout=PIPE and stderr=PIPE in binary mode.
+        :param maxsize: Batches (one per read) buffered before the pump stops reading (backpressure).
+        """
+        self.process = process
+        self.read_size = read_size
+        self.batches = queue.Queue(maxsize)
+        self._streams = {}
+        if process.stdout is not None:
+            self._streams["stdout"] = process.stdout
+        if process.stderr is not None:
+            self._streams["stderr"] = process.stderr
+        self._threads = []
+
+    def start(self):
+        if sys.platform == "win32":
+            # Pipes can't be selected on Windows, fall back to one reader per stream
+            for name, stream in self._streams.items():
+                thread = threading.Thread(target=self._read_stream, args=(name, stream), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            threading.Thread(target=self._finish_when_readers_done, daemon=True).start()
+        else:
+            thread = threading.Thread(target=self._select_loop, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __iter__(self):
+        """Yields OutputLine records until both streams are closed."""
+        while True:
+            batch = self.batches.get()
+            if batch is _EOF:
+                return
+            yield from batch
+
+    def _emit(self, stream_name, texts, timestamp):
+        if texts:
+            # Blocks when the consumer lags behind
+            self.batches.put([OutputLine(timestamp, stream_name, text) for text in texts])
+
+    def _select_loop(self):
+        splitters = {}
+        with selectors.DefaultSelector() as selector:
+            for name, stream in self._streams.items():
+                selector.register(stream.fileno(), selectors.EVENT_READ, name)
+                splitters[name] = LineSplitter()
+
+            open_streams = len(self._streams)
+            while open_streams:
+                for key, _ in selector.select():
+                    name = key.data
+                    data = os.read(key.fd, self.read_size)
+                    if not data:
+                        selector.unregister(key.fd)
+                        open_streams -= 1
+                        self._emit(name, splitters[name].flush(), time.time())
+                        continue
+                    self._emit(name, splitters[name].feed(data), time.time())
+        self.batches.put(_EOF)
+
+    def _read_stream(self, name, stream):
+        splitter = LineSplitter()
+        fd = stream.fileno()
+        while True:
+            data = os.read(fd, self.read_size)
+            if not data:
+                break
+            self._emit(name, splitter.feed(data), time.time())
+        self._emit(name, splitter.flush(), time.time())
+
+    def _finish_when_readers_done(self):
+        for thread in self._threads:
+            thread.join()
+        self.batches.put(_EOF)
@@ -0,0 +1,399 @@
+"""
+Renders a frame range with several local Blender processes at once.
+
+The range is cut into chunks that sit in a shared queue; each worker thread
+takes the next chunk when its Blender process exits, so fast workers simply
+render more chunks. Every worker gets its own render thread budget (-t) and,
+optionally, its own set of CPU cores.
+
+When Blender crashes, runs out of memory or exits without saving every frame
+of its chunk, the frame it was rendering is put back into the queue on its own
+after a backoff delay, and the frames after it are requeued straight away.
+A frame that keeps failing is given up on after RetryPolicy.max_attempts and
+reported, so the rest of the sequence still renders.
+
+Frames whose saved file fails a check (see exr_verify.py) go through the same
+retry policy via reject(); hold() and release() keep the render from finishing
+while such checks are still running.
+
+Before each Blender launch an optional admit() callback may hold the worker back,
+e.g. while there isn't enough free RAM for another instance (see governor.py).
+Blender can also be started with a lower CPU and I/O priority.
+"""
+import logging
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from blender_utils.process_utils import terminate_process_tree
+from blender_utils.frame_scan import compress_ranges, expand_ranges, progressive_batches
+from blender_utils.log_parser import BlenderLogParser, FrameSaved, FrameStarted
+from blender_utils.output_pump import OutputPump
+from blender_utils.render_command import build_render_command
+from blender_utils.render_failures import CORRUPT, LAUNCH, RenderFailure, RetryPolicy, classify_failure
+
+logger = logging.getLogger(__name__)
+
+ADMIT_POLL_SECONDS = 1.0  # How often a worker held back by admit() asks again
+
+
+def split_into_chunks(frame_ranges, chunk_size):
+    """Cuts the frames of [(start, end), ...] into chunks of chunk_size frames, each a list of ranges."""
+    frames = expand_ranges(frame_ranges)
+    return [compress_ranges(frames[i:i + chunk_size]) for i in range(0, len(frames), chunk_size)]
+
+
+def split_progressive(frame_ranges, chunk_size):
+    """Like split_into_chunks, but the chunks follow the coarse-to-fine order of a progressive render."""
+    return [compress_ranges(batch) for batch in progressive_batches(expand_ranges(frame_ranges), chunk_size)]
+
+
+def default_chunk_size(total_frames, workers):
+    """Aims for about four chunks per worker so the queue can balance uneven frames."""
+    return max(1, -(-total_frames // (workers * 4)))
+
+
+def lower_priority(pid, niceness):
+    """Lowers the CPU priority of a process by niceness and its I/O priority to best effort, lowest."""
+    process = psutil.Process(pid)
+    if hasattr(psutil, "BELOW_NORMAL_PRIORITY_CLASS"):
+        process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)  # Windows has priority classes instead of niceness
+    else:
+        process.nice(min(19, process.nice() + niceness))
+    if hasattr(psutil, "IOPRIO_CLASS_BE"):
+        process.ionice(psutil.IOPRIO_CLASS_BE, 7)
+
+
+def cpu_sets(workers, cpu_count=None):
+    """Splits the logical CPUs into one contiguous, non-overlapping set per worker."""
+    cpu_count = cpu_count or psutil.cpu_count(logical=True) or 1
+    per_worker = max(1, cpu_count // workers)
+    return [list(range(i * per_worker, min((i + 1) * per_worker, cpu_count))) or [i % cpu_count]
+            for i in range(workers)]
+
+
+class ParallelRender:
+    def __init__(self, blend_file, start_frame, end_frame, workers=2, chunk_size=None,
+                 threads_per_worker=None, pin_cpus=False, output_file=None, file_format=None,
+                 frame_ranges=None, scene=None, python_expr=None, progressive=False, chunks=None, retry_policy=None,
+                 nice=None, admit=None, on_frame_started=None, on_frame_finished=None, on_frame_failed=None,
+                 on_output=None, on_log_event=None, on_finished=None):
+        """
+        :param workers: Number of Blender processes running at the same time.
+        :param chunk_size: Frames per chunk, defaults to about four chunks per worker.
+        :param threads_per_worker: Value passed to -t, defaults to an even share of the CPUs
+                                   (a single worker is left to Blender's own default).
+        :param pin_cpus: Give each worker its own set of CPU cores.
+        :param frame_ranges: [(start, end), ...] to render instead of the whole start..end range.
+        :param scene: Name of the scene to render, None for the file's active scene.
+        :param python_expr: Script Blender runs before rendering, e.g. a render profile's overrides.
+        :param progressive: Render coarse-to-fine (every 16th frame first, then every 8th, ...) instead of in order.
+        :param chunks: [[(start, end), ...], ...] to hand out in this order instead of cutting equal chunks,
+                       e.g. the cost-balanced chunks of partition.plan_chunks.
+        :param retry_policy: RetryPolicy for frames whose Blender failed, defaults to RetryPolicy().
+        :param nice: Niceness added to every Blender process (and lowest best-effort I/O priority), None to leave it.
+        :param admit: Called as (worker_index) before each Blender launch; returns None to go ahead, or the
+                      reason to wait, in which case it is asked again every ADMIT_POLL_SECONDS.
+        :param on_frame_started: Called as (worker_index, frame) from a worker thread.
+        :param on_frame_finished: Called as (worker_index, frame, seconds) from a worker thread.
+        :param on_frame_failed: Called as (worker_index, RenderFailure, frames) for every failed attempt;
+                                frames are the ones retried, or given up on if failure.retrying is False.
+        :param on_output: Called as (worker_index, OutputLine) for every line Blender prints on stdout or stderr.
+        :param on_log_event: Called as (worker_index, event) for every event the log parser produces.
+        :param on_finished: Called as (canceled) once every worker has exited.
+        """
+        self.blend_file = blend_file
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.workers = workers
+        self.frame_ranges = frame_ranges or [(start_frame, end_frame)]
+        self.scene = scene
+        self.total_frames = len(expand_ranges(self.frame_ranges))
+        self.chunk_size = chunk_size or default_chunk_size(self.total_frames, workers)
+        cpu_count = psutil.cpu_count(logical=True) or 1
+        if threads_per_worker is None and workers > 1:
+            threads_per_worker = max(1, cpu_count // workers)
+        self.threads_per_worker = threads_per_worker
+        self.cpu_count = cpu_count
+        self.cpu_sets = cpu_sets(workers, cpu_count) if pin_cpus else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.nice = nice
+        self.admit = admit
+        self.output_file = output_file
+        self.file_format = file_format
+        self.python_expr = python_expr
+        self.progressive = progressive
+        self.planned_chunks = chunks
+        self.on_frame_started = on_frame_started
+        self.on_frame_finished = on_frame_finished
+        self.on_frame_failed = on_frame_failed
+        self.on_output = on_output
+        self.on_log_event = on_log_event
+        self.on_finished = on_finished
+
+        self.chunks = queue.Queue()  # (frame ranges, attempt, threads or None)
+        self.processes = {}  # worker index -> Popen
+        self.current_frames = {}  # worker index -> frame being rendered
+        self.finished_frames = 0
+        self.failed_chunks = []  # (start, end, returncode) of frames given up on after failing every attempt
+        self.failures = []  # RenderFailure of every failed attempt, retried or not
+        self.canceled = False
+        self._lock = threading.Lock()
+        self._threads = []
+        self._outstanding = 0  # Chunks queued, rendering or waiting out a retry delay, plus holds
+        self._rejections = {}  # frame -> times its saved file was rejected
+
+    def start(self):
+        if self.planned_chunks:
+            chunks = self.planned_chunks
+        elif self.progressive:
+            chunks = split_progressive(self.frame_ranges, self.chunk_size)
+        else:
+            chunks = split_into_chunks(self.frame_ranges, self.chunk_size)
+        for chunk in chunks:
+            self._put(chunk)
+
+        order = ", coarse-to-fine" if self.progressive else ""
+        logger.info(f"🧩 Rendering {self.total_frames} frames in {self.chunks.qsize()} chunks "
+              f"on {self.workers} workers ({self.threads_per_worker or 'default'} threads each){order}")
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run_worker, args=(index,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self._wait_for_workers, daemon=True).start()
+
+    def _wait_for_workers(self):
+        for thread in self._threads:
+            thread.join()
+        if self.on_finished:
+            self.on_finished(self.canceled)
+
+    def _put(self, chunk, attempt=1, threads=None, delay=0.0):
+        with self._lock:
+            self._outstanding += 1
+        if delay:
+            timer = threading.Timer(delay, self.chunks.put, args=((chunk, attempt, threads),))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.chunks.put((chunk, attempt, threads))
+
+    def hold(self):
+        """Keeps the render from finishing until release(), e.g. while a saved frame is being checked."""
+        with self._lock:
+            self._outstanding += 1
+
+    def release(self):
+        with self._lock:
+            self._outstanding -= 1
+
+    def reject(self, index, frame, reason, kind=CORRUPT):
+        """
+        Takes back a frame whose output turned out to be unusable and renders it again if the policy allows.
+
+        Call between hold() and release(). Returns the RenderFailure, or None if the render was canceled.
+        """
+        if self.canceled:
+            return None
+        policy = self.retry_policy
+        with self._lock:
+            attempt = self._rejections[frame] = self._rejections.get(frame, 0) + 1
+            self.finished_frames -= 1
+        retrying = policy.should_retry(kind, attempt)
+        failure = RenderFailure(frame, kind, 0, reason, attempt, retrying)
+        with self._lock:
+            self.failures.append(failure)
+        if retrying:
+            delay = policy.delay(attempt + 1)
+            logger.error(f"❌ Worker {index + 1}: frame {frame} rejected, {kind} (attempt {attempt}/"
+                         f"{policy.max_attempts}): {reason}. Rendering it again in {delay:g}s")
+            self._put([(frame, frame)], attempt + 1, None, delay)
+        else:
+            logger.error(f"❌ Worker {index + 1}: frame {frame} rejected, {kind} (attempt {attempt}/"
+                         f"{policy.max_attempts}): {reason}. Giving up on it")
+            with self._lock:
+                self.failed_chunks.append((frame, frame, 0))
+        return failure
+
+    def _next_chunk(self):
+        """Returns the next queued chunk, waiting while retries are pending elsewhere; None once all are done."""
+        while not self.canceled:
+            try:
+                return self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                with self._lock:
+                    if self._outstanding == 0:
+                        return None
+        return None
+
+    def _popen(self, index, command):
+        """Starts Blender, restricted to the worker's CPU set if pinning is enabled and at lower priority if asked."""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # Set from here rather than in the child: preexec_fn can deadlock with several worker threads launching.
+        # Blender starts its render threads after loading the file, so they still inherit both
+        cpus = self.cpu_sets[index] if self.cpu_sets else None
+        if cpus:
+            try:
+                psutil.Process(process.pid).cpu_affinity(cpus)
+            except (AttributeError, psutil.Error) as e:
+                logger.warning(f"⚠️ CPU pinning is not available on {sys.platform}: {e}")
+        if self.nice:
+            try:
+                lower_priority(process.pid, self.nice)
+            except psutil.Error as e:
+                logger.warning(f"⚠️ Could not lower Blender's priority: {e}")
+        return process
+
+    def _wait_for_admission(self, index):
+        """Blocks until admit() lets the worker start Blender; False if the render was canceled meanwhile."""
+        shown = None
+        while self.admit is not None and not self.canceled:
+            reason = self.admit(index)
+            if reason is None:
+                if shown is not None:
+                    logger.info(f"▶️ Worker {index + 1}: starting Blender")
+                return True
+            if shown is None and not self.canceled:
+                logger.warning(f"⏸️ Worker {index + 1}: holding back Blender: {reason}")
+                shown = reason
+            time.sleep(ADMIT_POLL_SECONDS)
+        return not self.canceled
+
+    def _run_worker(self, index):
+        while not self.canceled:
+            item = self._next_chunk()
+            if item is None:
+                break
+            chunk, attempt, threads = item
+            try:
+                if self._wait_for_admission(index):
+                    self._render_chunk(index, chunk, attempt, threads)
+            finally:
+                with self._lock:
+                    self._outstanding -= 1
+
+    def _render_chunk(self, index, chunk, attempt, threads):
+        chunk_start, chunk_end = chunk[0][0], chunk[-1][1]
+        command = build_render_command(self.blend_file, chunk_start, chunk_end, output_file=self.output_file,
+                                       threads=threads or self.threads_per_worker, file_format=self.file_format,
+                                       frame_ranges=chunk, scene=self.scene, python_expr=self.python_expr)
+        try:
+            process = self._popen(index, command)
+        except OSError as e:
+            self._chunk_failed(index, attempt, threads, expand_ranges(chunk), None, None, [],
+                               kind=LAUNCH, message=f"Could not start {command[0]}: {e.strerror or e}")
+            return
+        with self._lock:
+            self.processes[index] = process
+
+        parser = BlenderLogParser()
+        rendering_frame = None  # Started but not saved yet
+        saved = []
+        frame_start_time = time.time()
+        for output in OutputPump(process).start():
+            if self.canceled:
+                continue  # Keep draining until the terminated process closes its pipes
+            if self.on_output:
+                self.on_output(index, output)
+            for event in parser.feed(output.text):
+                if self.on_log_event:
+                    self.on_log_event(index, event)
+                if isinstance(event, FrameStarted):
+                    rendering_frame = event.frame
+                    frame_start_time = output.time
+                    self.current_frames[index] = event.frame
+                    if self.on_frame_started:
+                        self.on_frame_started(index, event.frame)
+                elif isinstance(event, FrameSaved):
+                    self._frame_finished(index, event.frame, output.time - frame_start_time)
+                    saved.append(event.frame)
+                    rendering_frame = None
+
+        process.wait()
+        self.current_frames.pop(index, None)
+        with self._lock:
+            self.processes.pop(index, None)
+        if self.canceled:
+            return
+        if rendering_frame is not None and process.returncode == 0:
+            # Blender exited cleanly without a 'Saved:' line for the last frame
+            self._frame_finished(index, rendering_frame, time.time() - frame_start_time)
+            saved.append(rendering_frame)
+            rendering_frame = None
+
+        missing = [frame for frame in expand_ranges(chunk) if frame not in saved]
+        # Saves without a frame number (no progress line before them) still account for a frame each
+        missing = missing[saved.count(None):]
+        if missing:
+            self._chunk_failed(index, attempt, threads, missing, rendering_frame, process.returncode, parser.errors)
+        elif process.returncode != 0:
+            logger.warning(f"⚠️ Worker {index + 1}: Blender exited with code {process.returncode} after saving "
+                           f"frames {chunk_start}-{chunk_end}")
+
+    def _chunk_failed(self, index, attempt, threads, missing, rendering_frame, returncode, errors,
+                      kind=None, message=None):
+        """
+        Requeues the unsaved frames of a failed chunk; the frame Blender died on is retried alone after a delay.
+
+        kind and message override the classification from returncode and errors.
+        """
+        if kind is None:
+            kind, message = classify_failure(returncode, errors)
+        policy = self.retry_policy
+        # Blender died on a known frame: the frames after it were never tried
+        at_fault = [rendering_frame] if rendering_frame in missing else missing
+        untried = [frame for frame in missing if frame not in at_fault]
+        retrying = policy.should_retry(kind, attempt)
+        failure = RenderFailure(rendering_frame, kind, returncode, message, attempt, retrying)
+        with self._lock:
+            self.failures.append(failure)
+
+        frames = compress_ranges(at_fault)
+        label = ("frame " if len(at_fault) == 1 else "frames ") + ", ".join(
+            f"{start}-{end}" if start != end else str(start) for start, end in frames)
+        if retrying:
+            delay = policy.delay(attempt + 1)
+            retry_threads = policy.retry_threads(kind, threads or self.threads_per_worker, self.cpu_count)
+            fewer = f" with -t {retry_threads}" if retry_threads != (threads or self.threads_per_worker) else ""
+            logger.error(f"❌ Worker {index + 1}: Blender {kind} on {label} (attempt {attempt}/"
+                         f"{policy.max_attempts}): {message}. Retrying in {delay:g}s{fewer}")
+            self._put(frames, attempt + 1, retry_threads, delay)
+        else:
+            logger.error(f"❌ Worker {index + 1}: Blender {kind} on {label} (attempt {attempt}/"
+                         f"{policy.max_attempts}): {message}. Giving up on it")
+            with self._lock:
+                self.failed_chunks.extend((start, end, returncode) for start, end in frames)
+        if untried:
+            for chunk in split_into_chunks(compress_ranges(untried), self.chunk_size):
+                self._put(chunk, attempt, threads)
+        if self.on_frame_failed:
+            self.on_frame_failed(index, failure, at_fault)
+
+    def _frame_finished(self, index, frame, seconds):
+        with self._lock:
+            self.finished_frames += 1
+        logger.info(f"✅ Worker {index + 1}: frame {frame} finished in {seconds:.2f}s")
+        if self.on_frame_finished:
+            self.on_frame_finished(index, frame, seconds)
+
+    def running_processes(self):
+        """Returns [(worker_index, pid, frame being rendered or None), ...]."""
+        with self._lock:
+            processes = list(self.processes.items())
+        return [(index, process.pid, self.current_frames.get(index)) for index, process in processes]
+
+    def cancel(self):
+        """Stops handing out chunks and tears down every running Blender process tree."""
+        self.canceled = True
+        with self._lock:
+            processes = list(self.processes.values())
+        for process in processes:
+            try:
+                terminate_process_tree(process.pid)
+            except psutil.NoSuchProcess:
+                pass
@@ -0,0 +1,196 @@
+"""
+Cuts a frame range into chunks of about equal predicted render time.
+
+Splitting by frame count goes badly when a few frames are much heavier than
+the rest: the worker that gets the explosion at frames 400-450 is still busy
+long after the others are idle. With a cost per frame (the render history of
+the same file, or a quick low-sample probe render) the frames are cut into
+contiguous chunks of roughly equal cost instead. The chunks are queued most
+expensive first, so the workers, which each take the next chunk as soon as
+they are free, schedule them longest-processing-time-first. The same schedule
+gives the predicted makespan, which is compared with the real one when the
+render ends.
+"""
+import heapq
+import logging
+import math
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, replace
+
+from blender_utils.frame_scan import compress_ranges
+from blender_utils.render_engine import FrameRendered, RenderEngine
+from blender_utils.render_history import history_profile
+from blender_utils.render_profiles import RenderProfile
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_PER_WORKER = 2  # Fewer than parallel_render.default_chunk_size: balanced chunks need less slack
+PROBE_FRAMES = 16  # Frames rendered by a probe pass, spread evenly over the range
+PROBE_PROFILE = RenderProfile("probe", samples=4, resolution_percentage=25, denoise=False, persistent_data=True,
+                              file_format="PNG", color_depth="8")
+
+
+@dataclass
+class CostPlan:
+    chunks: list  # [[(start, end), ...], ...] in the order they are handed out
+    costs: list  # Predicted seconds of each chunk
+    workers: int
+    makespan: float  # Predicted wall time of the render, None if the costs are only relative
+    source: str  # "history" or "probe"
+
+    def describe(self):
+        makespan = f"{self.makespan:.1f}s" if self.makespan is not None else "unknown (relative costs)"
+        spread = f"{max(self.costs) / min(self.costs):.1f}x" if min(self.costs) else "n/a"
+        return (f"{len(self.chunks)} chunks by {self.source} cost (heaviest/lightest {spread}), "
+                f"predicted makespan {makespan}")
+
+    def report(self, elapsed):
+        """Returns a line comparing the predicted makespan with the actual one."""
+        if self.makespan is None:
+            return f"Actual makespan {elapsed:.1f}s (no prediction, the {self.source} costs were relative)"
+        error = (elapsed - self.makespan) / self.makespan * 100 if self.makespan else 0.0
+        return f"Predicted makespan {self.makespan:.1f}s, actual {elapsed:.1f}s ({error:+.0f}%)"
+
+
+def balanced_chunks(frames, costs, count):
+    """
+    Cuts frames (in order) into at most count contiguous pieces of about equal total cost.
+
+    A piece ends where the running total passes the next multiple of total / count,
+    at whichever of the two neighbouring frames lands closer to it.
+    Returns [(frames, cost), ...].
+    """
+    total = sum(costs[frame] for frame in frames)
+    count = max(1, min(count, len(frames)))
+    if not total:
+        size = -(-len(frames) // count)
+        return [(frames[i:i + size], 0.0) for i in range(0, len(frames), size)]
+    pieces = []
+    current, current_cost, running = [], 0.0, 0.0
+    for frame in frames:
+        cost = costs[frame]
+        target = total * (len(pieces) + 1) / count
+        if current and len(pieces) < count - 1 and running + cost - target > target - running:
+            pieces.append((current, current_cost))
+            current, current_cost = [], 0.0
+        current.append(frame)
+        current_cost += cost
+        running += cost
+    pieces.append((current, current_cost))
+    return pieces
+
+
+def schedule_makespan(costs, workers):
+    """Wall time of handing chunks with these costs, in order, to whichever of the workers is free first."""
+    loads = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+def plan_chunks(frames, costs, workers, source="history", calibrated=True, chunks_per_worker=CHUNKS_PER_WORKER):
+    """
+    Returns a CostPlan for rendering frames on workers, or None without costs to go by.
+
+    :param costs: {frame: seconds}; frames without a cost are assumed to cost the average.
+    :param calibrated: Whether costs are real seconds (history) or only relative (probe).
+    """
+    if not costs or not frames:
+        return None
+    average = sum(costs.values()) / len(costs)
+    costs = {frame: costs.get(frame, average) for frame in frames}
+    pieces = balanced_chunks(frames, costs, workers * chunks_per_worker)
+    pieces.sort(key=lambda piece: piece[1], reverse=True)
+    chunk_costs = [cost for _, cost in pieces]
+    makespan = schedule_makespan(chunk_costs, workers) if calibrated else None
+    return CostPlan([compress_ranges(chunk) for chunk, _ in pieces], chunk_costs, workers, makespan, source)
+
+
+def interpolate_costs(frames, measured):
+    """Fills in {frame: cost} for every frame by linear interpolation between the measured ones."""
+    known = sorted(measured)
+    if not known:
+        return {}
+    costs = {}
+    index = 0
+    for frame in frames:
+        while index < len(known) - 1 and known[index + 1] <= frame:
+            index += 1
+        left = known[index]
+        right = known[index + 1] if index + 1 < len(known) else left
+        if frame <= left or right == left:
+            costs[frame] = measured[left]
+        else:
+            weight = (frame - left) / (right - left)
+            costs[frame] = measured[left] * (1 - weight) + measured[right] * weight
+    return costs
+
+
+def probe_costs(job, probe_frames=PROBE_FRAMES, profile=PROBE_PROFILE):
+    """
+    Renders a few frames of a job spread over its range with a cheap profile and returns
+    relative {frame: cost} for all of its frames; blocks until the probe is done.
+
+    The probe renders into a temporary folder that is removed afterwards. Frames that fail are left out.
+    """
+    frames = job.frames()
+    if not frames:
+        return {}
+    step = max(1, math.ceil(len(frames) / probe_frames))
+    probed = frames[::step]
+    if probed[-1] != frames[-1]:
+        probed.append(frames[-1])
+    directory = tempfile.mkdtemp(prefix="bender_probe_")
+    probe = replace(job, output_file=os.path.join(directory, "probe_####"), file_format=profile.file_format,
+                    frame_ranges=compress_ranges(probed), chunk_size=-(-len(probed) // max(1, job.workers)),
+                    progressive=False, profile=profile)  # One Blender launch per worker
+    measured = {}
+
+    def on_event(event):
+        if isinstance(event, FrameRendered) and event.frame is not None:
+            measured[event.frame] = event.seconds
+
+    engine = RenderEngine()
+    engine.subscribe(on_event)
+    logger.info(f"🔎 Probing the cost of {len(probed)} frames with the {profile.name} profile")
+    try:
+        engine.run(probe)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return interpolate_costs(frames, measured)
+
+
+def calibrate(costs, history):
+    """Scales relative costs to the file's average render time from its history; None without one."""
+    if history is None or not history.stats.count or not costs:
+        return None
+    scale = history.stats.mean / (sum(costs.values()) / len(costs))
+    return {frame: cost * scale for frame, cost in costs.items()}
+
+
+def plan_job(job, render_history=None, probe=False):
+    """
+    Returns a copy of job with cost-balanced chunks and its CostPlan, or (job, None) when there's nothing
+    to gain: no frames, one worker, progressive order, an explicit chunk size, or no costs to go by.
+
+    Costs come from the render history of the file; with probe, files without history get a probe pass.
+    """
+    frames = job.frames()
+    if not frames or job.workers < 2 or job.progressive or job.chunk_size:
+        return job, None
+    profile = history_profile(job.profile)
+    plan = None
+    if render_history is not None:
+        costs = render_history.predictions(job.blend_file, frames, job.scene, profile)
+        plan = plan_chunks(frames, costs, job.workers, "history")
+    if plan is None and probe:
+        costs = probe_costs(job)
+        history = render_history and render_history.get(job.blend_file, job.scene, profile)
+        calibrated = calibrate(costs, history)
+        plan = plan_chunks(frames, calibrated or costs, job.workers, "probe", calibrated is not None)
+    if plan is None:
+        return job, None
+    logger.info(f"⚖️ {plan.describe()}")
+    return replace(job, chunks=plan.chunks), plan
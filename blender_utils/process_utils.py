@@ -0,0 +1,25 @@
+import psutil
+
+
+def terminate_process_tree(pid, timeout=5):
+    """Terminates a process and all of its children, force killing whatever is still alive after timeout."""
+    parent = psutil.Process(pid)
+
+    # Try to terminate all child processes first
+    children = parent.children(recursive=True)
+    for child in children:
+        try:
+            child.terminate()
+        except psutil.NoSuchProcess:
+            pass
+
+    # Try terminating main process
+    parent.terminate()
+
+    # Wait a moment, then force kill if still running
+    gone, alive = psutil.wait_procs([parent] + children, timeout=timeout)
+    for proc in alive:
+        try:
+            proc.kill()  # Force kill remaining processes
+        except psutil.NoSuchProcess:
+            pass
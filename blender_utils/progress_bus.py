@@ -0,0 +1,138 @@
+"""
+Coalesces render engine events into the latest progress state.
+
+Blender reports progress many times per frame. Instead of handing every
+event to the GUI thread, the bus folds events into one ProgressState as they
+arrive (running sums, no per-event lists) and the GUI polls snapshot() at a
+fixed rate, so the cost of drawing stays the same however chatty Blender is.
+"""
+import dataclasses
+import threading
+from dataclasses import dataclass, field
+
+from blender_utils.log_parser import MemoryUsage, SampleProgress
+from blender_utils.render_failures import REJECTIONS
+from blender_utils.render_engine import (FrameFailed, FrameRenderStarted, FrameRendered, RenderFinished,
+                                         RenderLogEvent, RenderStarted)
+
+
+@dataclass
+class ProgressState:
+    job: object = None
+    start_time: float = None
+    total_frames: int = 0
+    frames_done: int = 0
+    frames_skipped: int = 0  # Given up on after failing every attempt
+    retries: int = 0  # Failed attempts that were retried
+    frame_time_total: float = 0.0  # Sum of finished frame times, for the average
+    last_frame: int = None  # Most recently finished frame
+    last_frame_seconds: float = None
+    elapsed: float = 0.0  # Render time at the last finished frame
+    current_frame: int = None  # Most recently started frame
+    current_frame_start: float = None
+    current_frames: dict = field(default_factory=dict)  # worker index -> frame being rendered
+    parallel: int = 1  # Most frames seen rendering at once; farm jobs don't know their worker count up front
+    sample: int = None
+    total_samples: int = None
+    peak_memory_mb: float = 0.0
+    predicted_left: float = None  # History-based seconds of frame time still to render
+    predicted_done: float = 0.0  # What the history expected for the frames finished so far
+    finished: RenderFinished = None
+    version: int = 0  # Bumped on every change, lets pollers skip redundant redraws
+
+    @property
+    def avg_frame_time(self):
+        return self.frame_time_total / self.frames_done if self.frames_done else 0.0
+
+    @property
+    def frames_left(self):
+        return self.total_frames - self.frames_done - self.frames_skipped
+
+    def estimated_left(self):
+        """
+        Seconds left. With render history this is the predicted cost of the remaining
+        frames, scaled by how far off the prediction was for the frames done so far;
+        otherwise it follows the measured throughput.
+        """
+        workers = max(self.job.workers if self.job is not None else 1, self.parallel)
+        if self.predicted_left is not None:
+            correction = self.frame_time_total / self.predicted_done if self.predicted_done else 1.0
+            return max(0.0, self.predicted_left) * correction / workers
+        if not self.frames_done:
+            return None
+        if workers > 1:
+            return self.elapsed / self.frames_done * self.frames_left
+        return self.avg_frame_time * self.frames_left
+
+
+class ProgressBus:
+    """Subscribe publish() to a RenderEngine and poll snapshot() from the GUI thread."""
+
+    def __init__(self, predictions=None):
+        """
+        :param predictions: {frame: expected seconds} from the render history, used for the ETA.
+        """
+        self._lock = threading.Lock()
+        self._predictions = predictions or {}
+        self._state = ProgressState()
+
+    def publish(self, event):
+        """Folds one render engine event into the state. Safe to call from any thread."""
+        with self._lock:
+            state = self._state
+            if isinstance(event, RenderStarted):
+                self._state = ProgressState(job=event.job, start_time=event.time, total_frames=event.total_frames)
+                if self._predictions:
+                    self._state.predicted_left = sum(self._predictions.get(frame, 0.0) for frame in event.job.frames())
+            elif isinstance(event, FrameRenderStarted):
+                state.current_frame = event.frame
+                state.current_frame_start = event.time
+                state.current_frames[event.worker] = event.frame
+                state.parallel = max(state.parallel, len(state.current_frames))
+                state.sample = state.total_samples = None
+            elif isinstance(event, FrameRendered):
+                state.frames_done = event.frames_done
+                state.frame_time_total += event.seconds
+                state.last_frame = event.frame
+                state.last_frame_seconds = event.seconds
+                state.elapsed = event.elapsed
+                if state.predicted_left is not None:
+                    predicted = self._predictions.get(event.frame, event.seconds)
+                    state.predicted_left -= predicted
+                    state.predicted_done += predicted
+                if state.current_frames.get(event.worker) == event.frame:
+                    del state.current_frames[event.worker]
+            elif isinstance(event, FrameFailed):
+                if event.failure.kind in REJECTIONS:
+                    # A frame counted as done whose file was rejected afterwards; its worker has moved on
+                    state.frames_done -= len(event.frames)
+                    if state.predicted_left is not None:
+                        state.predicted_left += sum(self._predictions.get(frame, 0.0) for frame in event.frames)
+                if event.failure.retrying:
+                    state.retries += 1
+                else:
+                    state.frames_skipped += len(event.frames)
+                    if state.predicted_left is not None:
+                        state.predicted_left -= sum(self._predictions.get(frame, 0.0) for frame in event.frames)
+                if event.failure.kind not in REJECTIONS:
+                    state.current_frames.pop(event.worker, None)
+            elif isinstance(event, RenderLogEvent):
+                log_event = event.event
+                if isinstance(log_event, SampleProgress):
+                    state.sample, state.total_samples = log_event.sample, log_event.total_samples
+                elif isinstance(log_event, MemoryUsage) and log_event.peak_mb > state.peak_memory_mb:
+                    state.peak_memory_mb = log_event.peak_mb
+                else:
+                    return
+            elif isinstance(event, RenderFinished):
+                state.finished = event
+                state.frames_done = event.frames_done
+                state.elapsed = event.elapsed
+            else:
+                return  # Raw output lines don't change the progress
+            self._state.version += 1
+
+    def snapshot(self):
+        """Returns a copy of the latest state."""
+        with self._lock:
+            return dataclasses.replace(self._state, current_frames=dict(self._state.current_frames))
@@ -0,0 +1,259 @@
+"""
+A Blender process kept running in the background to answer scene queries.
+
+Starting Blender costs seconds; asking an already running one to open a file
+and report its render settings costs milliseconds, and nothing at all when
+the file is already open and unchanged. BlendQueryDaemon starts Blender with
+this file as its script, which serves newline-delimited JSON requests on a
+localhost socket:
+
+    {"token": ..., "op": "read", "file": "/abs/shot.blend"}  ->  {"blend_info": {...}} or {"error": "..."}
+    {"token": ..., "op": "ping"}                             ->  {"ok": true}
+    {"token": ..., "op": "quit"}                             ->  {"ok": true}
+
+The server exits on its own after idle_timeout seconds without requests. The
+client restarts it on the next query if it exited or crashed, and kills it if
+a request takes longer than request_timeout. Anything that answers the same
+protocol can stand in for Blender (benchmarks/fake_blender.py does).
+"""
+import json
+import logging
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+PORT_PREFIX = "BLEND_QUERY_PORT: "  # Printed by the server once it listens
+TOKEN_ENV = "BENDER_QUERY_TOKEN"  # Shared secret, passed through the environment rather than the command line
+DEFAULT_IDLE_TIMEOUT = 600
+
+
+def serve(reader, token, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Answers queries until told to quit or idle for idle_timeout seconds.
+
+    :param reader: Called with an absolute .blend path, returns its blend_info.
+    :param token: Requests carrying another token are refused.
+    :param idle_timeout: Seconds without a request after which the server exits.
+    """
+    server = socket.create_server(("127.0.0.1", 0))
+    server.settimeout(idle_timeout)
+    print(f"{PORT_PREFIX}{server.getsockname()[1]}", flush=True)
+    try:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                return
+            with connection:
+                connection.settimeout(idle_timeout)
+                if not serve_connection(connection, reader, token):
+                    return
+    finally:
+        server.close()
+
+
+def serve_connection(connection, reader, token):
+    """Handles one client's requests; returns False when the server should exit."""
+    stream = connection.makefile("rwb")
+    try:
+        for line in stream:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"error": "Malformed request"}
+                request = {}
+            if request and not secrets.compare_digest(str(request.get("token", "")), token):
+                response = {"error": "Invalid token"}
+            elif request.get("op") == "read":
+                try:
+                    response = {"blend_info": reader(request["file"])}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+            elif request.get("op") in ("ping", "quit"):
+                response = {"ok": True}
+            elif request:
+                response = {"error": f"Unknown op {request.get('op')!r}"}
+            stream.write(json.dumps(response).encode() + b"\n")
+            stream.flush()
+            if request.get("op") == "quit" and "error" not in response:
+                return False
+    except socket.timeout:
+        return False  # Idle with a client connected
+    except OSError:
+        pass  # Client went away
+    return True
+
+
+def serve_main(script_args, reader):
+    """Entry point for the script side: parses '--serve [--idle-timeout N]' and serves."""
+    idle_timeout = DEFAULT_IDLE_TIMEOUT
+    if "--idle-timeout" in script_args:
+        idle_timeout = float(script_args[script_args.index("--idle-timeout") + 1])
+    serve(reader, os.environ.get(TOKEN_ENV, ""), idle_timeout)
+    return 0
+
+
+def blender_reader():
+    """Returns a reader that opens files in the running Blender, skipping the load when the file is already open."""
+    import bpy
+    from blender_utils.blend_reader import read_scene_info
+
+    loaded = None  # (path, mtime_ns) of the open file
+
+    def read(path):
+        nonlocal loaded
+        current = (path, os.stat(path).st_mtime_ns)
+        if current != loaded:
+            loaded = None
+            bpy.ops.wm.open_mainfile(filepath=path, load_ui=False)
+            loaded = current
+        return read_scene_info()
+    return read
+
+
+class BlendQueryDaemon:
+    def __init__(self, blender_exe=None, idle_timeout=DEFAULT_IDLE_TIMEOUT, request_timeout=60, startup_timeout=60):
+        """
+        :param blender_exe: Blender (or stand-in) executable; defaults to blend_reader.BLENDER_EXE.
+        :param idle_timeout: Seconds without queries after which the Blender process exits.
+        :param request_timeout: Seconds a single query may take, including opening the file, before Blender is killed.
+        :param startup_timeout: Seconds Blender may take to start listening.
+        """
+        self.blender_exe = blender_exe
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.startup_timeout = startup_timeout
+        self.restarts = 0
+        self._token = secrets.token_hex(16)
+        self._process = None
+        self._socket = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def _command(self):
+        from blender_utils.blend_reader import BLENDER_EXE
+        return [self.blender_exe or BLENDER_EXE, "-b", "--factory-startup", "--python", os.path.abspath(__file__),
+                "--", "--serve", "--idle-timeout", str(self.idle_timeout)]
+
+    def _start(self):
+        port = None
+        ready = threading.Event()
+        env = dict(os.environ, **{TOKEN_ENV: self._token})
+        process = subprocess.Popen(self._command(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                   env=env)
+
+        def drain():
+            nonlocal port
+            for line in process.stdout:
+                if port is None and line.startswith(PORT_PREFIX):
+                    port = int(line[len(PORT_PREFIX):])
+                    ready.set()
+                else:
+                    logger.debug(f"Query daemon: {line.rstrip()}")
+            ready.set()  # Exited without ever listening
+        threading.Thread(target=drain, daemon=True).start()
+
+        if not ready.wait(self.startup_timeout) or port is None:
+            logger.error("Error: Blender query daemon did not start")
+            self._kill(process)
+            return False
+        try:
+            self._socket = socket.create_connection(("127.0.0.1", port), timeout=self.request_timeout)
+        except OSError as e:
+            logger.error(f"Error connecting to Blender query daemon: {e}")
+            self._kill(process)
+            return False
+        self._stream = self._socket.makefile("rwb")
+        self._process = process
+        logger.info(f"🧠 Blender query daemon listening on port {port} (pid {process.pid})")
+        return True
+
+    def _request(self, request):
+        self._stream.write(json.dumps(dict(request, token=self._token)).encode() + b"\n")
+        self._stream.flush()
+        line = self._stream.readline()
+        if not line:
+            raise ConnectionError("Query daemon closed the connection")
+        return json.loads(line)
+
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def read(self, blend_file):
+        """Returns the blend_info of a file, or None if Blender could not read it."""
+        with self._lock:
+            for attempt in range(2):
+                if not self.running():
+                    if self._process is not None:
+                        # Exited after its idle timeout, or crashed
+                        logger.info(f"🔄 Query daemon exited (code {self._process.returncode}), restarting...")
+                        self.restarts += 1
+                        self._close()
+                    if not self._start():
+                        return None
+                try:
+                    response = self._request({"op": "read", "file": os.path.abspath(blend_file)})
+                except socket.timeout:
+                    logger.error(f"Error: Reading {blend_file} took more than {self.request_timeout}s, "
+                                 f"killing the query daemon")
+                    self._close()
+                    return None
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Lost the query daemon ({e})")
+                    self._close()
+                    continue
+                if "error" in response:
+                    logger.warning(f"⚠️ Blender could not read {blend_file}: {response['error']}")
+                    return None
+                return response["blend_info"]
+            return None
+
+    def ping(self):
+        with self._lock:
+            if not self.running():
+                return False
+            try:
+                return self._request({"op": "ping"}).get("ok", False)
+            except (OSError, ValueError):
+                return False
+
+    def stop(self):
+        """Asks the daemon to quit, killing it if it doesn't."""
+        with self._lock:
+            if self.running():
+                try:
+                    self._request({"op": "quit"})
+                    self._process.wait(timeout=5)
+                except (OSError, ValueError, subprocess.TimeoutExpired):
+                    pass
+            self._close()
+
+    def _close(self):
+        for closeable in (self._stream, self._socket):
+            if closeable is not None:
+                try:
+                    closeable.close()
+                except OSError:
+                    pass
+        self._stream = self._socket = None
+        if self._process is not None:
+            self._kill(self._process)
+        self._process = None
+
+    @staticmethod
+    def _kill(process):
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+# If Blender is running this script, serve queries until idle
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    script_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(serve_main(script_args, blender_reader()))
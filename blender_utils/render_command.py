@@ -0,0 +1,47 @@
+from blender_utils.blend_reader import BLENDER_EXE
+
+
+def format_frame_list(frame_ranges):
+    """Formats [(start, end), ...] as Blender's -f list syntax, e.g. '1..5,8,10..12'."""
+    return ",".join(str(start) if start == end else f"{start}..{end}" for start, end in frame_ranges)
+
+
+def build_render_command(blend_file, start_frame, end_frame, output_file=None, threads=None,
+                         file_format=None, frame_ranges=None, scene=None, python_expr=None):
+    """
+    Builds the Blender command line that renders start_frame..end_frame as an animation.
+
+    If frame_ranges holds more than one (start, end) range, the frames are passed
+    as a single -f list instead, so gaps are skipped without extra Blender launches.
+    A scene name renders that scene instead of the one the file was saved with.
+    Without a file_format the scene's own output format is used. python_expr
+    (e.g. a render profile's overrides) runs after the scene is loaded and
+    before anything is rendered.
+    """
+    command = [BLENDER_EXE, "-b", blend_file]
+    if scene:
+        command.extend(["-S", scene])  # Must come after the file and before the render flags
+    if file_format:
+        command.extend(["-F", file_format])
+    command.extend(["-x", "1"])
+    if python_expr:
+        # Arguments run in order: after -F so the script's image settings aren't reset by it
+        command.extend(["--python-expr", python_expr])
+
+    if threads:
+        command.extend(["-t", str(threads)])  # Render thread budget for this process
+
+    # If an output override is given, add output path and filename
+    if output_file:
+        command.extend(["-o", output_file])
+
+    if frame_ranges and len(frame_ranges) > 1:
+        command.extend(["-f", format_frame_list(frame_ranges)])  # Render and save just these frames
+        return command
+
+    command.extend([
+        "-s", str(start_frame),
+        "-e", str(end_frame),
+    ])
+    command.append("-a")  # Append animation render flag
+    return command
@@ -0,0 +1,258 @@
+"""
+GUI-free render engine.
+
+A RenderJob describes what to render; a RenderEngine runs it and publishes
+typed events to its subscribers. Subscribers are called from worker threads,
+so GUI front ends must hand events over to their own thread (the Tk app uses
+root.after). Nothing in here imports tkinter.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from blender_utils.frame_scan import expand_ranges
+from blender_utils.log import BLENDER_OUTPUT
+from blender_utils.parallel_render import ParallelRender
+from blender_utils.render_failures import CORRUPT, RenderFailure, RetryPolicy
+from blender_utils.render_profiles import RenderProfile
+
+logger = logging.getLogger(__name__)
+output_logger = logging.getLogger(BLENDER_OUTPUT)
+
+DONE = "done"
+FAILED = "failed"
+CANCELED = "canceled"
+
+
+@dataclass
+class RenderJob:
+    blend_file: str
+    start_frame: int
+    end_frame: int
+    output_file: str = None  # Full output path override, e.g. /renders/shot_####
+    file_format: str = None  # -F override, None for the scene's own output format
+    workers: int = 1
+    threads: int = None  # Render threads per Blender process, None lets Blender decide
+    pin_cpus: bool = False
+    chunk_size: int = None
+    frame_ranges: list = None  # [(start, end), ...] subset to render, e.g. the missing frames on resume
+    scene: str = None  # Scene to render (-S), None for the one the file was saved with
+    retry: RetryPolicy = None  # How failed frames are retried, None for RetryPolicy()
+    profile: RenderProfile = None  # Setting overrides applied before rendering, see render_profiles.apply_profile
+    progressive: bool = False  # Render every 16th frame first, then every 8th, ... instead of start to end
+    chunks: list = None  # [[(start, end), ...], ...] handed out in this order instead of equal chunks, see partition.py
+    nice: int = None  # Niceness added to the Blender processes (and lowest best-effort I/O priority)
+
+    def frames(self):
+        """Returns every frame number the job renders, in order."""
+        return expand_ranges(self.frame_ranges or [(self.start_frame, self.end_frame)])
+
+    @property
+    def total_frames(self):
+        return len(self.frames())
+
+
+@dataclass(frozen=True)
+class RenderStarted:
+    job: RenderJob
+    total_frames: int
+    time: float
+
+
+@dataclass(frozen=True)
+class FrameRenderStarted:
+    job: RenderJob
+    worker: int
+    frame: int
+    time: float
+
+
+@dataclass(frozen=True)
+class FrameRendered:
+    job: RenderJob
+    worker: int
+    frame: int
+    seconds: float
+    frames_done: int
+    total_frames: int
+    elapsed: float
+
+
+@dataclass(frozen=True)
+class FrameFailed:
+    job: RenderJob
+    worker: int
+    failure: RenderFailure
+    frames: tuple  # Frames being retried, or given up on when failure.retrying is False
+
+
+@dataclass(frozen=True)
+class RenderOutput:
+    job: RenderJob
+    worker: int
+    line: str
+    stream: str  # "stdout" or "stderr"
+    time: float  # When the line was read
+
+
+@dataclass(frozen=True)
+class RenderLogEvent:
+    job: RenderJob
+    worker: int
+    event: object  # One of the blender_utils.log_parser events, e.g. SampleProgress or MemoryUsage
+
+
+@dataclass(frozen=True)
+class RenderFinished:
+    job: RenderJob
+    status: str  # DONE, FAILED or CANCELED
+    frames_done: int
+    total_frames: int
+    elapsed: float
+    failed_chunks: tuple = ()  # (start, end, returncode) of frames given up on
+    failures: tuple = ()  # RenderFailure of every attempt that was not retried
+
+
+class RenderEngine:
+    """Runs one RenderJob at a time and publishes its progress as events."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._gates = []
+        self._lock = threading.Lock()
+        self._render = None
+        self._finished = threading.Event()
+        self.job = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.start_time = None
+        self.result = None
+
+    def subscribe(self, callback):
+        """Registers callback(event); returns a function that unsubscribes it."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def add_gate(self, callback):
+        """
+        Registers callback(worker) that is asked before every Blender launch and returns None to allow it,
+        or the reason to hold the worker back for now. Returns a function that removes it.
+        """
+        self._gates.append(callback)
+        return lambda: self._gates.remove(callback)
+
+    def _admit(self, worker):
+        for gate in list(self._gates):
+            try:
+                reason = gate(worker)
+            except Exception as e:
+                logger.exception(f"Error in render gate: {e}")
+                continue
+            if reason is not None:
+                return reason
+        return None
+
+    def emit(self, event):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(f"Error in render event subscriber: {e}")
+
+    @property
+    def running(self):
+        return self._render is not None and not self._finished.is_set()
+
+    def start(self, job):
+        """Starts rendering in background threads and returns immediately."""
+        if self.running:
+            raise RuntimeError("A render is already running on this engine")
+
+        self.job = job
+        self.frames_done = 0
+        self.total_frames = job.total_frames
+        self.result = None
+        self.start_time = time.time()
+        self._finished.clear()
+
+        self._render = ParallelRender(
+            job.blend_file, job.start_frame, job.end_frame, workers=job.workers,
+            chunk_size=job.chunk_size or (self.total_frames if job.workers == 1 else None),
+            threads_per_worker=job.threads, pin_cpus=job.pin_cpus,
+            output_file=job.output_file, file_format=job.file_format, frame_ranges=job.frame_ranges, scene=job.scene,
+            python_expr=job.profile and job.profile.python_expr(), progressive=job.progressive, chunks=job.chunks,
+            retry_policy=job.retry, nice=job.nice, admit=self._admit, on_frame_started=self._on_frame_started, on_frame_finished=self._on_frame_finished,
+            on_frame_failed=self._on_frame_failed, on_output=self._on_output, on_log_event=self._on_log_event,
+            on_finished=self._on_finished
+        )
+        self.emit(RenderStarted(job, self.total_frames, self.start_time))
+        self._render.start()
+
+    def run(self, job):
+        """Renders a job and blocks until it is done. Returns the RenderFinished event."""
+        self.start(job)
+        self.wait()
+        return self.result
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def worker_processes(self):
+        """Returns [(worker, pid, frame), ...] for the Blender processes running right now."""
+        if self._render is None:
+            return []
+        return self._render.running_processes()
+
+    def cancel(self):
+        if self._render is not None:
+            self._render.cancel()
+
+    def hold(self):
+        """Keeps the running render from finishing until release(); for checks that may reject frames."""
+        self._render.hold()
+
+    def release(self):
+        self._render.release()
+
+    def reject_frame(self, worker, frame, reason, kind=CORRUPT):
+        """Takes a rendered frame back (its output is unusable) and queues it again under the job's retry policy."""
+        failure = self._render.reject(worker, frame, reason, kind)
+        if failure is None:
+            return
+        with self._lock:
+            self.frames_done -= 1
+        self.emit(FrameFailed(self.job, worker, failure, (frame,)))
+
+    def _on_frame_started(self, worker, frame):
+        self.emit(FrameRenderStarted(self.job, worker, frame, time.time()))
+
+    def _on_frame_finished(self, worker, frame, seconds):
+        with self._lock:
+            self.frames_done += 1
+            frames_done = self.frames_done
+        self.emit(FrameRendered(self.job, worker, frame, seconds, frames_done, self.total_frames,
+                                time.time() - self.start_time))
+
+    def _on_frame_failed(self, worker, failure, frames):
+        self.emit(FrameFailed(self.job, worker, failure, tuple(frames)))
+
+    def _on_output(self, worker, output):
+        output_logger.debug(output.text)
+        self.emit(RenderOutput(self.job, worker, output.text, output.stream, output.time))
+
+    def _on_log_event(self, worker, event):
+        self.emit(RenderLogEvent(self.job, worker, event))
+
+    def _on_finished(self, canceled):
+        if canceled:
+            status = CANCELED
+        elif self._render.failed_chunks or self.frames_done < self.total_frames:
+            status = FAILED  # Frames missing without a recorded failure still mean the render isn't complete
+        else:
+            status = DONE
+        self.result = RenderFinished(self.job, status, self.frames_done, self.total_frames,
+                                     time.time() - self.start_time, tuple(self._render.failed_chunks),
+                                     tuple(failure for failure in self._render.failures if not failure.retrying))
+        self.emit(self.result)
+        self._finished.set()
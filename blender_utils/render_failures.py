@@ -0,0 +1,136 @@
+"""
+Classifies why a Blender process failed and decides whether to retry.
+
+A failed Blender run is judged by its exit code (or the signal that killed
+it) together with the error lines the log parser collected, e.g.:
+
+    -11 / 'Segmentation fault' / 'Writing: /tmp/shot.crash.txt'   -> crash
+    -9  / 'Error: Out of memory' / 'Malloc returns null'           -> out_of_memory
+    'CUDA error: Illegal address in cuCtxSynchronize()'            -> gpu
+    'Error: Cannot read file "/shared/shot.blend"'                 -> file (not worth retrying)
+    exit code 0, but frames of the chunk never saved               -> incomplete
+    a saved frame whose file fails output verification             -> corrupt
+    a saved frame that can't be moved from scratch to its output   -> transfer (not worth re-rendering)
+    the Blender executable can't be started at all                 -> launch (not worth retrying)
+
+RetryPolicy says how often a frame is tried, how long to back off between
+attempts and whether retries after a crash or running out of memory should
+use fewer render threads.
+"""
+import signal
+from dataclasses import dataclass
+
+CRASH = "crash"
+OUT_OF_MEMORY = "out_of_memory"
+GPU = "gpu"
+FILE = "file"
+ERROR = "error"
+INCOMPLETE = "incomplete"
+CORRUPT = "corrupt"  # Blender reported the frame saved, but its file is missing, truncated or unreadable
+TRANSFER = "transfer"  # The frame rendered fine but could not be copied to final storage
+LAUNCH = "launch"  # Blender could not be started, e.g. a wrong BLENDER_EXE
+
+# Retrying can't fix these: every attempt would fail the same way
+NOT_RETRYABLE = (FILE, TRANSFER, LAUNCH)
+# Failures that fewer render threads (smaller per-thread buffers) may avoid
+RESOURCE_FAILURES = (CRASH, OUT_OF_MEMORY)
+# Failures of frames that had already been counted as rendered
+REJECTIONS = (CORRUPT, TRANSFER)
+
+# Checked in order against the lowercased error lines, most specific first
+_LOG_PATTERNS = (
+    (OUT_OF_MEMORY, ("out of memory", "malloc returns null", "calloc returns null", "system is out of gpu",
+                     "std::bad_alloc", "killed")),
+    (GPU, ("cuda error", "optix error", "hip error", "metal error", "oneapi error")),
+    (CRASH, ("segmentation fault", "writing: ", "fatal", "exception_access_violation", "abort")),
+    (FILE, ("cannot read file", "unable to open", "no such file", "file format is not supported",
+            "not a blend file")),
+)
+
+# Windows NTSTATUS exit codes of crashed processes
+_WINDOWS_CRASHES = {
+    0xC0000005: "access violation",
+    0xC00000FD: "stack overflow",
+    0xC0000409: "stack buffer overrun",
+    0xC0000374: "heap corruption",
+}
+_WINDOWS_OUT_OF_MEMORY = {0xC0000017: "no memory"}
+
+
+@dataclass(frozen=True)
+class RenderFailure:
+    frame: int  # Frame that was rendering when Blender failed, None if it failed before starting one
+    kind: str
+    returncode: int
+    message: str  # Signal name or last error line, for reports
+    attempt: int  # 1 for the first try
+    retrying: bool
+
+    def describe(self):
+        frame = f"frame {self.frame}" if self.frame is not None else "startup"
+        return f"{frame}: {self.kind} ({self.message})"
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3  # Tries per frame, including the first
+    backoff: float = 5.0  # Seconds before the first retry
+    backoff_factor: float = 2.0
+    max_backoff: float = 120.0
+    fewer_threads: bool = False  # Halve the render threads when retrying after a crash or running out of memory
+
+    def delay(self, attempt):
+        """Seconds to wait before the given attempt (2 for the first retry)."""
+        return min(self.max_backoff, self.backoff * self.backoff_factor ** max(0, attempt - 2))
+
+    def should_retry(self, kind, attempt):
+        """Whether a frame whose attempt number `attempt` failed with `kind` gets another try."""
+        return kind not in NOT_RETRYABLE and attempt < self.max_attempts
+
+    def retry_threads(self, kind, threads, cpu_count):
+        """Render threads for a retry: halved after resource failures if enabled, else unchanged."""
+        if not self.fewer_threads or kind not in RESOURCE_FAILURES:
+            return threads
+        return max(1, (threads or cpu_count) // 2)
+
+
+def signal_name(returncode):
+    """Returns e.g. 'SIGSEGV' for a process killed by a signal (negative return code), else None."""
+    if returncode is None or returncode >= 0:
+        return None
+    try:
+        return signal.Signals(-returncode).name
+    except ValueError:
+        return f"signal {-returncode}"
+
+
+def classify_failure(returncode, errors=()):
+    """
+    Returns (kind, message) for a Blender run.
+
+    :param returncode: Exit code, negative for a signal as reported by subprocess.
+    :param errors: LogError events (or anything with .message) the log parser collected.
+    """
+    messages = [error.message for error in errors]
+    lowered = [message.lower() for message in messages]
+    for kind, needles in _LOG_PATTERNS:
+        for message, text in zip(messages, lowered):
+            if any(needle in text for needle in needles):
+                return kind, message.strip()
+
+    name = signal_name(returncode)
+    if name in ("SIGSEGV", "SIGBUS", "SIGILL", "SIGFPE", "SIGABRT"):
+        return CRASH, name
+    if name == "SIGKILL":
+        return OUT_OF_MEMORY, "SIGKILL (most likely the kernel's out-of-memory killer)"
+    if returncode is not None and returncode > 0:
+        code = returncode & 0xFFFFFFFF
+        if code in _WINDOWS_CRASHES:
+            return CRASH, _WINDOWS_CRASHES[code]
+        if code in _WINDOWS_OUT_OF_MEMORY:
+            return OUT_OF_MEMORY, _WINDOWS_OUT_OF_MEMORY[code]
+    if messages:
+        return ERROR, messages[-1].strip()
+    if returncode == 0:
+        return INCOMPLETE, "Blender exited without saving every frame"
+    return ERROR, name or f"exit code {returncode}"
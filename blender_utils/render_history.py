@@ -0,0 +1,325 @@
+"""
+Remembers how long every frame of every .blend file took to render.
+
+Each frame keeps its last few render times in a small array-backed ring plus
+an exponentially weighted moving average; each file keeps running statistics
+(mean, EWMA and a log-bucket histogram for percentiles) that are updated in
+O(1) per frame. With that, the time left for any set of frames can be
+predicted before a render starts, from what those exact frames cost last time.
+
+The time measured from Blender's log includes loading and saving; when output
+verification later reads the render time Blender stamped into the file, the
+latest sample is amended to that figure.
+
+Each file also keeps the peak RAM of one of its Blender processes in the last
+sampled render and the average size of its saved frames, which the resource
+governor checks against free memory and disk space before rendering it again.
+"""
+import math
+import os
+import threading
+from array import array
+
+from blender_utils.json_io import atomic_write_json, read_json
+from blender_utils.log import timed
+from blender_utils.exr_verify import FrameVerified
+from blender_utils.log_parser import FrameSaved
+from blender_utils.render_engine import FrameRendered, RenderFinished, RenderLogEvent
+from blender_utils.telemetry import ResourcePeak
+
+RING_SIZE = 8  # Render times kept per frame
+EWMA_ALPHA = 0.3  # Weight of the newest sample in the moving averages
+
+# Histogram buckets grow by BUCKET_RATIO from BUCKET_MIN seconds: 64 buckets cover 10 ms to about 4.5 hours
+BUCKET_MIN = 0.01
+BUCKET_RATIO = 1.25
+BUCKET_COUNT = 64
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+
+class FrameRing:
+    """The last RING_SIZE render times of one frame and their moving average."""
+
+    __slots__ = ("times", "next", "count", "ewma")
+
+    def __init__(self, size=RING_SIZE):
+        self.times = array("f", bytes(4 * size))
+        self.next = 0
+        self.count = 0
+        self.ewma = None
+
+    def add(self, seconds, alpha=EWMA_ALPHA):
+        self.times[self.next] = seconds
+        self.next = (self.next + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+        self.ewma = seconds if self.ewma is None else alpha * seconds + (1 - alpha) * self.ewma
+
+    def replace_last(self, seconds, alpha=EWMA_ALPHA):
+        """Corrects the newest time; returns the old one, or None if the ring is empty."""
+        if not self.count:
+            return None
+        index = (self.next - 1) % len(self.times)
+        old = self.times[index]
+        self.times[index] = seconds
+        self.ewma = seconds if self.count == 1 else self.ewma + alpha * (seconds - old)
+        return old
+
+    def values(self):
+        """Returns the stored times, oldest first."""
+        size = len(self.times)
+        start = (self.next - self.count) % size
+        return [self.times[(start + i) % size] for i in range(self.count)]
+
+    def to_dict(self):
+        return {"times": [round(value, 3) for value in self.values()], "ewma": self.ewma}
+
+    @classmethod
+    def from_dict(cls, data, size=RING_SIZE):
+        ring = cls(size)
+        for seconds in data.get("times", [])[-size:]:
+            ring.add(seconds)
+        ring.ewma = data.get("ewma", ring.ewma)
+        return ring
+
+
+class RunningStats:
+    """Count, mean, EWMA, min/max and approximate percentiles, each update in O(1)."""
+
+    __slots__ = ("count", "mean", "ewma", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.ewma = None
+        self.min = None
+        self.max = None
+        self.buckets = array("I", bytes(4 * BUCKET_COUNT))
+
+    @staticmethod
+    def bucket_index(seconds):
+        if seconds <= BUCKET_MIN:
+            return 0
+        return min(BUCKET_COUNT - 1, int(math.log(seconds / BUCKET_MIN) / _LOG_RATIO) + 1)
+
+    def add(self, seconds, alpha=EWMA_ALPHA):
+        self.count += 1
+        self.mean += (seconds - self.mean) / self.count
+        self.ewma = seconds if self.ewma is None else alpha * seconds + (1 - alpha) * self.ewma
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.buckets[self.bucket_index(seconds)] += 1
+
+    def replace(self, old, seconds, alpha=EWMA_ALPHA):
+        """Swaps the newest sample old for seconds (min and max only widen)."""
+        if not self.count:
+            return
+        self.mean += (seconds - old) / self.count
+        self.ewma = seconds if self.count == 1 else self.ewma + alpha * (seconds - old)
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        old_bucket = self.bucket_index(old)
+        if self.buckets[old_bucket]:
+            self.buckets[old_bucket] -= 1
+            self.buckets[self.bucket_index(seconds)] += 1
+
+    def percentile(self, fraction):
+        """Approximate percentile (fraction in 0..1), accurate to one bucket (25%)."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                # Upper edge of the bucket, clamped to what was actually observed
+                upper = BUCKET_MIN * BUCKET_RATIO ** index
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "ewma": self.ewma, "min": self.min, "max": self.max,
+                "buckets": list(self.buckets)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.mean = data.get("mean", 0.0)
+        stats.ewma = data.get("ewma")
+        stats.min = data.get("min")
+        stats.max = data.get("max")
+        buckets = data.get("buckets", [])
+        if len(buckets) == BUCKET_COUNT:
+            stats.buckets = array("I", buckets)
+        return stats
+
+
+class BlendHistory:
+    """Render time history of one .blend file."""
+
+    def __init__(self, ring_size=RING_SIZE):
+        self.ring_size = ring_size
+        self.frames = {}  # frame number -> FrameRing
+        self.stats = RunningStats()
+        self.peak_rss = None  # Bytes, peak of one Blender process tree in the last sampled render
+        self.frame_bytes = None  # Moving average size of a saved frame
+
+    def record(self, frame, seconds):
+        """Adds a frame time; with frame None (Blender didn't say which) it only counts towards the file's stats."""
+        if frame is None:
+            self.stats.add(seconds)
+            return
+        ring = self.frames.get(frame)
+        if ring is None:
+            ring = self.frames[frame] = FrameRing(self.ring_size)
+        ring.add(seconds)
+        self.stats.add(seconds)
+
+    def amend(self, frame, seconds):
+        """Replaces the latest time recorded for frame, e.g. with the render time stamped into its file."""
+        ring = self.frames.get(frame)
+        old = ring.replace_last(seconds) if ring is not None else None
+        if old is None:
+            self.record(frame, seconds)
+        else:
+            self.stats.replace(old, seconds)
+
+    def record_size(self, size, alpha=EWMA_ALPHA):
+        self.frame_bytes = size if self.frame_bytes is None else alpha * size + (1 - alpha) * self.frame_bytes
+
+    def frame_estimate(self, frame):
+        """Expected seconds for one frame: its own average, else the file's, else None."""
+        ring = self.frames.get(frame)
+        if ring is not None:
+            return ring.ewma
+        return self.stats.ewma
+
+    def to_dict(self):
+        return {"frames": {str(frame): ring.to_dict() for frame, ring in self.frames.items()},
+                "stats": self.stats.to_dict(), "peak_rss": self.peak_rss, "frame_bytes": self.frame_bytes}
+
+    @classmethod
+    def from_dict(cls, data, ring_size=RING_SIZE):
+        history = cls(ring_size)
+        history.frames = {int(frame): FrameRing.from_dict(ring, ring_size)
+                          for frame, ring in data.get("frames", {}).items()
+                          if frame.lstrip("-").isdigit()}  # Older files may hold a "None" key
+        history.stats = RunningStats.from_dict(data.get("stats", {}))
+        history.peak_rss = data.get("peak_rss")
+        history.frame_bytes = data.get("frame_bytes")
+        return history
+
+
+def history_profile(profile):
+    """History name of a render profile: its name if it changes any settings, else None (same as the scene)."""
+    if profile is not None and profile.overrides():
+        return profile.name
+    return None
+
+
+class RenderHistory:
+    def __init__(self, path, ring_size=RING_SIZE):
+        """
+        :param path: JSON file the history is kept in.
+        :param ring_size: Render times remembered per frame.
+        """
+        self.path = path
+        self.ring_size = ring_size
+        self._lock = threading.Lock()
+        self._blends = {
+            blend: BlendHistory.from_dict(data, ring_size)
+            for blend, data in read_json(path, {}).items()
+        }
+
+    @staticmethod
+    def _key(blend_file, scene=None, profile=None):
+        """
+        Files are keyed by absolute path; scenes picked with -S and render profiles
+        that change settings (a draft costs a fraction of a final frame) get their own entry.
+        """
+        key = os.path.abspath(blend_file)
+        if scene:
+            key = f"{key}::{scene}"
+        return f"{key}@{profile}" if profile else key
+
+    def get(self, blend_file, scene=None, profile=None):
+        """Returns the BlendHistory of a file (or one of its scenes), or None if it was never rendered."""
+        return self._blends.get(self._key(blend_file, scene, profile))
+
+    def record(self, blend_file, frame, seconds, scene=None, profile=None):
+        with self._lock:
+            self._history(blend_file, scene, profile).record(frame, seconds)
+
+    def amend(self, blend_file, frame, seconds, scene=None, profile=None):
+        """Corrects the latest time of a frame (records it if the frame has none)."""
+        with self._lock:
+            self._history(blend_file, scene, profile).amend(frame, seconds)
+
+    def record_size(self, blend_file, size, scene=None, profile=None):
+        """Adds the size in bytes of a saved frame to the file's average."""
+        with self._lock:
+            self._history(blend_file, scene, profile).record_size(size)
+
+    def record_peak(self, blend_file, peak_rss, scene=None, profile=None):
+        """Remembers the peak RAM of one Blender process in the file's latest render."""
+        with self._lock:
+            self._history(blend_file, scene, profile).peak_rss = peak_rss
+
+    def _history(self, blend_file, scene, profile):
+        """Returns the BlendHistory for a key, creating it; call with the lock held."""
+        key = self._key(blend_file, scene, profile)
+        history = self._blends.get(key)
+        if history is None:
+            history = self._blends[key] = BlendHistory(self.ring_size)
+        return history
+
+    def predictions(self, blend_file, frames, scene=None, profile=None):
+        """Returns {frame: expected seconds} for the frames that can be predicted."""
+        history = self.get(blend_file, scene, profile)
+        if history is None:
+            return {}
+        with self._lock:
+            estimates = {frame: history.frame_estimate(frame) for frame in frames}
+        return {frame: seconds for frame, seconds in estimates.items() if seconds is not None}
+
+    def estimate(self, blend_file, frames, workers=1, scene=None, profile=None):
+        """
+        Predicts the wall time of rendering frames with the given number of workers.
+
+        Returns None for files without history. Frames that were never rendered
+        are assumed to cost the file's average.
+        """
+        predictions = self.predictions(blend_file, frames, scene, profile)
+        if not predictions:
+            return None
+        return sum(predictions.values()) / max(1, workers)
+
+    def attach(self, engine):
+        """Records every frame a RenderEngine finishes and saves when its render ends."""
+        def on_event(event):
+            if isinstance(event, RenderLogEvent) and isinstance(event.event, FrameSaved) and event.event.path:
+                try:
+                    size = os.path.getsize(event.event.path)
+                except OSError:
+                    return
+                self.record_size(event.job.blend_file, size, event.job.scene, history_profile(event.job.profile))
+            elif isinstance(event, FrameRendered):
+                self.record(event.job.blend_file, event.frame, event.seconds, event.job.scene,
+                            history_profile(event.job.profile))
+            elif isinstance(event, FrameVerified) and event.check.ok and event.check.render_time is not None:
+                self.amend(event.job.blend_file, event.frame, event.check.render_time, event.job.scene,
+                           history_profile(event.job.profile))
+            elif isinstance(event, RenderFinished):
+                self.save()
+            elif isinstance(event, ResourcePeak):
+                # Published by a ResourceSampler after RenderFinished, so it is saved on its own
+                self.record_peak(event.job.blend_file, event.peak_rss, event.job.scene,
+                                 history_profile(event.job.profile))
+                self.save()
+        return engine.subscribe(on_event)
+
+    @timed("render_history.save")
+    def save(self):
+        with self._lock:
+            data = {blend: history.to_dict() for blend, history in self._blends.items()}
+        atomic_write_json(self.path, data)
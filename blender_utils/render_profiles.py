@@ -0,0 +1,126 @@
+"""
+Named render profiles (draft, preview, final) that override a scene's render settings.
+
+A profile only lists the settings it changes. They are applied by a short
+script passed to Blender with --python-expr, which runs after the file is
+loaded and before the render starts, so the .blend file itself is never
+modified. Settings left as None keep whatever the scene has; the built-in
+"final" profile changes nothing at all.
+
+Profiles can be tuned per .blend file: the stored definitions live in the
+file's entry of blend_settings.json under "render_profiles". Stored fields
+replace those of the built-in profile of the same name; new names add profiles.
+"""
+from dataclasses import asdict, dataclass, fields, replace
+
+DRAFT = "draft"
+PREVIEW = "preview"
+FINAL = "final"
+
+
+@dataclass
+class RenderProfile:
+    name: str
+    samples: int = None  # Cycles samples, or EEVEE render samples
+    resolution_percentage: int = None
+    denoise: bool = None  # Cycles denoising
+    persistent_data: bool = None  # Keep the scene in memory between frames
+    threads: int = None  # Render threads per Blender process, passed as -t
+    file_format: str = None  # e.g. PNG, OPEN_EXR, OPEN_EXR_MULTILAYER, passed as -F
+    exr_codec: str = None  # e.g. ZIP, PIZ, DWAA
+    color_depth: str = None  # "8", "16" or "32" as in Blender's image settings
+
+    def overrides(self):
+        """Returns {setting: value} for the settings this profile changes."""
+        return {key: value for key, value in asdict(self).items() if key != "name" and value is not None}
+
+    def python_expr(self):
+        """Returns the script that applies the scene overrides, or None if there are none."""
+        lines = ["import bpy", "scene = bpy.context.scene", "render = scene.render"]
+        if self.resolution_percentage is not None:
+            lines.append(f"render.resolution_percentage = {int(self.resolution_percentage)}")
+        if self.persistent_data is not None:
+            lines.append(f"render.use_persistent_data = {bool(self.persistent_data)}")
+        if self.samples is not None or self.denoise is not None:
+            lines.append("if render.engine == 'CYCLES':")
+            if self.samples is not None:
+                lines.append(f"    scene.cycles.samples = {int(self.samples)}")
+            if self.denoise is not None:
+                lines.append(f"    scene.cycles.use_denoising = {bool(self.denoise)}")
+            if self.samples is not None:
+                lines.append("elif render.engine.startswith('BLENDER_EEVEE'):")
+                lines.append(f"    scene.eevee.taa_render_samples = {int(self.samples)}")
+        image = "render.image_settings"
+        if self.file_format is not None:
+            lines.append(f"{image}.file_format = {self.file_format!r}")
+        if self.color_depth is not None:
+            lines.append(f"{image}.color_depth = {str(self.color_depth)!r}")
+        if self.exr_codec is not None:
+            lines.append(f"if {image}.file_format in ('OPEN_EXR', 'OPEN_EXR_MULTILAYER'):")
+            lines.append(f"    {image}.exr_codec = {self.exr_codec!r}")
+        if len(lines) == 3:
+            return None
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+BUILTIN_PROFILES = {
+    DRAFT: RenderProfile(DRAFT, samples=16, resolution_percentage=50, denoise=True, persistent_data=True,
+                         file_format="PNG", color_depth="8"),
+    PREVIEW: RenderProfile(PREVIEW, samples=128, resolution_percentage=100, denoise=True, persistent_data=True,
+                           file_format="OPEN_EXR", exr_codec="DWAA", color_depth="16"),
+    FINAL: RenderProfile(FINAL),
+}
+
+
+def parse_value(name, text):
+    """Converts a 'name=value' command line value to the type of the profile field ('none' clears it)."""
+    if text.lower() in ("none", ""):
+        return None
+    if name in ("samples", "resolution_percentage", "threads"):
+        return int(text)
+    if name in ("denoise", "persistent_data"):
+        if text.lower() not in ("1", "0", "true", "false", "yes", "no", "on", "off"):
+            raise ValueError(f"{name} must be true or false, not {text!r}")
+        return text.lower() in ("1", "true", "yes", "on")
+    if name in ("file_format", "exr_codec"):
+        return text.upper()
+    if name == "color_depth":
+        return text
+    raise ValueError(f"Unknown profile setting {name!r}")
+
+
+def blend_profiles(settings, blend_file):
+    """Returns {name: RenderProfile} for a file: the built-in profiles with the file's stored changes applied."""
+    profiles = dict(BUILTIN_PROFILES)
+    entry = settings.get(blend_file, {}) if settings is not None else {}
+    known = {f.name for f in fields(RenderProfile)} - {"name"}
+    for name, data in entry.get("render_profiles", {}).items():
+        base = profiles.get(name, RenderProfile(name))
+        profiles[name] = replace(base, **{key: value for key, value in data.items() if key in known})
+    return profiles
+
+
+def save_blend_profile(settings, blend_file, profile):
+    """Stores a profile definition for one file, replacing the built-in profile of that name for it."""
+    stored = settings.get(blend_file, {}).get("render_profiles", {})
+    stored[profile.name] = {key: value for key, value in profile.to_dict().items() if key != "name"}
+    settings.update(blend_file, render_profiles=stored)
+
+
+def apply_profile(job, profile):
+    """Returns a copy of a RenderJob that renders with a profile; explicit job threads and format win."""
+    if profile is None:
+        return job
+    if job.file_format:
+        # The profile's image settings would be set after -F by its script and silently replace it
+        profile = replace(profile, file_format=None, color_depth=None, exr_codec=None)
+    return replace(job, profile=profile, threads=job.threads or profile.threads,
+                   file_format=job.file_format or profile.file_format)
@@ -0,0 +1,293 @@
+"""
+Persistent multi-file render queue and the scheduler that works through it.
+
+The queue is a list of QueueJob records saved to JSON after every change, so
+it survives an app restart. The scheduler starts the highest priority pending
+job as soon as a slot is free, running up to max_concurrent jobs at once.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields, replace
+
+import psutil
+
+from blender_utils.frame_scan import plan_resume
+from blender_utils.governor import REFUSE, THROTTLE, ResourceGovernor, check_admission
+from blender_utils.json_io import atomic_write_json, read_json
+from blender_utils.render_engine import FrameRendered, RenderEngine, RenderFinished, RenderJob
+from blender_utils.render_profiles import apply_profile, blend_profiles
+from blender_utils.telemetry import ResourceSampler
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+PAUSED = "paused"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELED = "canceled"
+
+
+@dataclass
+class QueueJob:
+    blend_file: str
+    start_frame: int
+    end_frame: int
+    output_file: str = None
+    workers: int = 1
+    resume: bool = False  # Skip frames already in the output folder, e.g. after a restart
+    scene: str = None  # Scene to render, None for the file's active scene
+    profile: str = None  # Name of the render profile, None for the scene's own settings
+    priority: int = 0
+    status: str = PENDING
+    frames_done: int = 0
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    added_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+
+    @property
+    def total_frames(self):
+        return self.end_frame - self.start_frame + 1
+
+    @classmethod
+    def from_user_settings(cls, blend_file, user_settings, **kwargs):
+        """Creates a job from the user_settings stored for a .blend file."""
+        output_file = None
+        if user_settings.get("override_output"):
+            output_file = os.path.join(user_settings["output_path"], user_settings["render_filename"])
+        return cls(blend_file, user_settings["start_frame"], user_settings["end_frame"],
+                   output_file=output_file, profile=user_settings.get("profile"), **kwargs)
+
+    def to_render_job(self, threads=None, settings=None):
+        """
+        :param threads: Render threads per Blender process.
+        :param settings: SettingsStore holding the file's own profile definitions, if any.
+        """
+        job = RenderJob(self.blend_file, self.start_frame, self.end_frame, output_file=self.output_file,
+                        workers=self.workers, threads=threads, scene=self.scene)
+        profile = blend_profiles(settings, self.blend_file).get(self.profile) if self.profile else None
+        return apply_profile(job, profile)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+class RenderQueue:
+    def __init__(self, path=None):
+        self.path = path
+        self.jobs = []
+        self._lock = threading.RLock()
+        self.listeners = []  # Called with no arguments after every change
+
+        if path:
+            for data in read_json(path, default={}).get("jobs", []):
+                job = QueueJob.from_dict(data)
+                if job.status == RUNNING:
+                    job.status = PENDING  # The app was closed mid-render
+                self.jobs.append(job)
+
+    def _changed(self):
+        if self.path:
+            with self._lock:
+                data = {"jobs": [asdict(job) for job in self.jobs]}
+            try:
+                atomic_write_json(self.path, data)
+            except OSError as e:
+                logger.error(f"Error saving render queue: {e}")
+        for listener in list(self.listeners):
+            listener()
+
+    def add(self, job):
+        with self._lock:
+            self.jobs.append(job)
+        self._changed()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            for job in self.jobs:
+                if job.job_id == job_id:
+                    return job
+        return None
+
+    def remove(self, job_id):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.job_id != job_id or job.status == RUNNING]
+        self._changed()
+
+    def move(self, job_id, offset):
+        """Moves a job up (negative offset) or down in the queue order."""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return
+            index = self.jobs.index(job)
+            new_index = max(0, min(len(self.jobs) - 1, index + offset))
+            self.jobs.insert(new_index, self.jobs.pop(index))
+        self._changed()
+
+    def set_priority(self, job_id, priority):
+        job = self.get(job_id)
+        if job:
+            job.priority = priority
+            self._changed()
+
+    def pause(self, job_id):
+        job = self.get(job_id)
+        if job and job.status == PENDING:
+            job.status = PAUSED
+            self._changed()
+
+    def resume(self, job_id):
+        """Puts a paused, failed or canceled job back into the pending state."""
+        job = self.get(job_id)
+        if job and job.status in (PAUSED, FAILED, CANCELED):
+            job.status = PENDING
+            self._changed()
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status != DONE]
+        self._changed()
+
+    def set_status(self, job, status, **changes):
+        with self._lock:
+            job.status = status
+            for key, value in changes.items():
+                setattr(job, key, value)
+        self._changed()
+
+    def next_job(self):
+        """Returns the highest priority pending job, earlier jobs first on ties."""
+        with self._lock:
+            pending = [job for job in self.jobs if job.status == PENDING]
+            if not pending:
+                return None
+            return max(pending, key=lambda job: (job.priority, -self.jobs.index(job)))
+
+
+class RenderScheduler:
+    def __init__(self, render_queue, max_concurrent=1, on_job_started=None, on_job_progress=None,
+                 on_job_finished=None, settings=None, render_history=None, telemetry_interval=1.0,
+                 telemetry_dir=None, nice=None):
+        """
+        :param max_concurrent: Number of queued jobs that may render at the same time.
+        :param on_job_started: Called as (job) from the scheduler thread.
+        :param on_job_progress: Called as (job, frame, seconds) whenever a frame finishes.
+        :param on_job_finished: Called as (job) once a job is done, failed or canceled.
+        :param settings: SettingsStore the jobs' render profiles are looked up in.
+        :param render_history: RenderHistory that records the frames of every queued job.
+        :param telemetry_interval: Seconds between resource samples of each job's Blender processes.
+        :param telemetry_dir: If set, each job's resource series is exported there.
+        :param nice: Niceness the jobs' Blender processes run at, None to leave it.
+        """
+        self.queue = render_queue
+        self.max_concurrent = max_concurrent
+        self.on_job_started = on_job_started
+        self.on_job_progress = on_job_progress
+        self.on_job_finished = on_job_finished
+        self.settings = settings
+        self.render_history = render_history
+        self.telemetry_interval = telemetry_interval
+        self.telemetry_dir = telemetry_dir
+        self.nice = nice
+
+        self.running = {}  # job_id -> RenderEngine
+        self.active = False
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops starting new jobs; jobs already rendering keep going."""
+        self.active = False
+        self.wake()
+
+    def wake(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def set_max_concurrent(self, max_concurrent):
+        self.max_concurrent = max(1, max_concurrent)
+        self.wake()
+
+    def _loop(self):
+        while self.active:
+            with self._wakeup:
+                job = self.queue.next_job() if len(self.running) < self.max_concurrent else None
+                if job is None:
+                    self._wakeup.wait(timeout=1.0)
+                    continue
+            self._launch(job)
+
+    def _launch(self, job):
+        # Share the machine between the jobs that may run side by side
+        cpu_count = psutil.cpu_count(logical=True) or 1
+        threads = max(1, cpu_count // (self.max_concurrent * job.workers))
+
+        def on_event(event):
+            if isinstance(event, FrameRendered):
+                job.frames_done = event.frames_done
+                if self.on_job_progress:
+                    self.on_job_progress(job, event.frame, event.seconds)
+            elif isinstance(event, RenderFinished):
+                self.running.pop(job.job_id, None)
+                self.queue.set_status(job, event.status, finished_at=time.time())
+                stopped = f": {governor.stopped}" if governor.stopped else ""
+                logger.info(f"🏁 Queue job {job.job_id} ({job.blend_file}) {event.status}{stopped}")
+                if self.on_job_finished:
+                    self.on_job_finished(job)
+                self.wake()  # Start the next job right away
+
+        render_job = job.to_render_job(threads, self.settings)
+        if job.resume:
+            render_job = plan_resume(render_job)
+            if render_job is None:
+                self.queue.set_status(job, DONE, frames_done=job.total_frames, finished_at=time.time())
+                logger.info(f"✅ Queue job {job.job_id} ({job.blend_file}) has no missing frames")
+                return
+        # Same checks as a render started directly: it must fit this machine's free RAM, CPU and disk
+        admission = check_admission(render_job, self.render_history)
+        if admission.action == REFUSE:
+            self.queue.set_status(job, FAILED, finished_at=time.time())
+            logger.error(f"❌ Queue job {job.job_id} ({job.blend_file}) not started: {admission.reason}")
+            return
+        if admission.action == THROTTLE:
+            logger.warning(f"⚠️ Queue job {job.job_id}: {admission.reason}")
+        render_job = replace(admission.job, nice=self.nice)
+
+        engine = RenderEngine()
+        engine.subscribe(on_event)
+        if self.render_history is not None:
+            self.render_history.attach(engine)
+        ResourceSampler(engine, self.telemetry_interval, self.telemetry_dir)  # Also gives the history the peak RAM
+        governor = ResourceGovernor(engine, self.render_history)
+        self.running[job.job_id] = engine
+        self.queue.set_status(job, RUNNING, frames_done=0, started_at=time.time(), finished_at=None)
+        scene = f" scene {job.scene}" if job.scene else ""
+        logger.info(f"▶️ Starting queue job {job.job_id}: {job.blend_file}{scene} ({job.start_frame}-{job.end_frame})")
+        if self.on_job_started:
+            self.on_job_started(job)
+        engine.start(render_job)
+
+    def cancel_job(self, job_id):
+        engine = self.running.get(job_id)
+        if engine:
+            engine.cancel()
+
+    def cancel_all(self):
+        self.stop()
+        for engine in list(self.running.values()):
+            engine.cancel()
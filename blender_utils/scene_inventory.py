@@ -0,0 +1,152 @@
+"""
+Every scene of a .blend file with the settings needed to render it.
+
+The inventory is read in one pass, natively when possible and otherwise by
+Blender (blend_reader.py --inventory), and is kept in the blend info cache
+next to the active scene's blend_info. Asking for another scene of the same
+file, or rendering several scenes as separate jobs, doesn't touch the file
+again until it changes.
+"""
+import dataclasses
+import logging
+import os
+from dataclasses import dataclass, field
+
+from blender_utils.blend_cache import file_key, get_default_cache
+from blender_utils.log import timed
+
+logger = logging.getLogger(__name__)
+
+# Cache keys of inventories are the file key plus this suffix, so they don't collide with blend_info entries
+CACHE_KEY_SUFFIX = ":inventory"
+
+BLEND_INFO_KEYS = ("start_frame", "end_frame", "output_path", "render_filename", "image_format", "compression",
+                   "compression_codec", "color_depth")
+
+
+@dataclass
+class SceneInfo:
+    name: str
+    start_frame: int
+    end_frame: int
+    output_path: str
+    render_filename: str
+    image_format: str
+    compression: int
+    compression_codec: str
+    color_depth: str
+    frame_step: int = 1
+    resolution_x: int = None
+    resolution_y: int = None
+    resolution_percentage: int = 100
+    engine: str = None
+    samples: int = None  # None for engines without a sample count
+    camera: str = None  # Active camera
+    cameras: list = field(default_factory=list)  # Every camera object in the scene
+    view_layers: list = field(default_factory=list)  # [{"name": ..., "use": bool}, ...]
+
+    def blend_info(self):
+        """Returns the settings in the blend_info format used by get_blend_info and the settings store."""
+        return {key: getattr(self, key) for key in BLEND_INFO_KEYS}
+
+    @property
+    def output_pattern(self):
+        return os.path.join(self.output_path, self.render_filename)
+
+    @property
+    def resolution(self):
+        """Effective output resolution (x, y) after the resolution percentage."""
+        if self.resolution_x is None or self.resolution_y is None:
+            return None
+        scale = self.resolution_percentage / 100
+        return int(self.resolution_x * scale), int(self.resolution_y * scale)
+
+    def summary(self):
+        """One line for lists: frame range, resolution, engine, samples and camera."""
+        parts = [f"{self.start_frame}-{self.end_frame}"]
+        if self.resolution:
+            parts.append("{}x{}".format(*self.resolution))
+        if self.engine:
+            parts.append(self.engine + (f" {self.samples} spp" if self.samples else ""))
+        if self.camera:
+            parts.append(f"📷 {self.camera}")
+        return f"{self.name} ({', '.join(parts)})"
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in dataclasses.fields(cls)}
+        values = {key: value for key, value in data.items() if key in known}
+        values["cameras"] = list(values.get("cameras", []))
+        values["view_layers"] = [dict(layer) for layer in values.get("view_layers", [])]
+        return cls(**values)
+
+
+@dataclass
+class BlendInventory:
+    active_scene: str
+    scenes: list  # [SceneInfo, ...] in file order
+
+    def names(self):
+        return [scene.name for scene in self.scenes]
+
+    def scene(self, name=None):
+        """Returns a scene by name (the active one for None), or None if there is no such scene."""
+        name = name or self.active_scene
+        return next((scene for scene in self.scenes if scene.name == name), None)
+
+    def to_dict(self):
+        return {"active_scene": self.active_scene, "scenes": [scene.to_dict() for scene in self.scenes]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["active_scene"], [SceneInfo.from_dict(scene) for scene in data.get("scenes", [])])
+
+
+def read_inventory_uncached(blend_file):
+    """Reads the inventory from disk as a dictionary, falling back to Blender if the file can't be decoded."""
+    from blender_utils.blend_file import BlendFileError, read_scene_inventory
+    from blender_utils.blend_reader import get_inventory_from_blender
+
+    try:
+        return read_scene_inventory(blend_file)
+    except (BlendFileError, OSError) as e:
+        logger.warning(f"⚠️ Native scene inventory failed ({e}), falling back to Blender...")
+    return get_inventory_from_blender(blend_file)
+
+
+@timed("get_scene_inventory")
+def get_scene_inventory(blend_file, use_cache=True):
+    """Returns the BlendInventory of a file, from the blend info cache when the file is unchanged, or None."""
+    if not use_cache:
+        data = read_inventory_uncached(blend_file)
+        return BlendInventory.from_dict(data) if data else None
+
+    cache = get_default_cache()
+    try:
+        key = file_key(blend_file) + CACHE_KEY_SUFFIX
+    except OSError as e:
+        logger.warning(f"⚠️ Can't read {blend_file}: {e}")
+        return None
+    data = cache.get(blend_file, key)
+    if data is None:
+        data = read_inventory_uncached(blend_file)
+        if not data:
+            return None
+        cache.put(blend_file, data, key)
+    return BlendInventory.from_dict(data)
+
+
+def scene_blend_info(blend_file, scene=None):
+    """Returns the blend_info of a named scene (the active one for None), or None."""
+    if scene is None:
+        from blender_utils.blend_reader import get_blend_info
+        return get_blend_info(blend_file)
+    inventory = get_scene_inventory(blend_file)
+    scene_info = inventory.scene(scene) if inventory else None
+    if scene_info is None:
+        logger.error(f"Error: {os.path.basename(blend_file)} has no scene named '{scene}'")
+        return None
+    return scene_info.blend_info()
@@ -0,0 +1,140 @@
+"""
+In-memory store for per-.blend settings with debounced, atomic saves.
+
+The store keeps the whole settings dictionary in memory. Changes mark it dirty
+and (re)arm a timer; the file is written from the timer thread with a temp
+file + rename, so UI callbacks never touch the disk. Entries for deleted
+files and entries that have not been used for a long time are pruned on load
+and before every write.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+
+from blender_utils.json_io import atomic_write_json, read_json
+from blender_utils.log import timed
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsStore:
+    def __init__(self, path, debounce=1.0, max_delay=5.0, max_entries=500, max_age_days=180):
+        """
+        :param path: JSON file the settings are persisted to.
+        :param debounce: Seconds of quiet after the last change before writing.
+        :param max_delay: Upper bound on how long a change can stay unsaved while edits keep coming.
+        :param max_entries: Number of .blend entries kept, least recently used are dropped first.
+        :param max_age_days: Entries not used for this long are dropped.
+        """
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.save_count = 0
+
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # Keeps snapshots hitting the disk in order
+        self._timer = None
+        self._dirty_since = None
+        self._data = read_json(path, default={})
+        if self.prune():
+            self.schedule_save()
+
+    def __contains__(self, blend_file):
+        with self._lock:
+            return blend_file in self._data
+
+    def get(self, blend_file, default=None):
+        """Returns a copy of the stored entry for a .blend file."""
+        with self._lock:
+            entry = self._data.get(blend_file)
+            return copy.deepcopy(entry) if entry is not None else default
+
+    def entries(self):
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    def update(self, blend_file, **sections):
+        """Replaces top-level sections (user_settings, blend_info, ...) of an entry and schedules a save."""
+        with self._lock:
+            entry = self._data.setdefault(blend_file, {})
+            for key, value in sections.items():
+                entry[key] = copy.deepcopy(value)
+            entry["last_used"] = time.time()
+        self.schedule_save()
+
+    def touch(self, blend_file):
+        """Marks an entry as recently used."""
+        with self._lock:
+            if blend_file in self._data:
+                self._data[blend_file]["last_used"] = time.time()
+                self.schedule_save()
+
+    def remove(self, blend_file):
+        with self._lock:
+            if self._data.pop(blend_file, None) is not None:
+                self.schedule_save()
+
+    def prune(self):
+        """Drops deleted, expired and least recently used entries. Returns the number removed."""
+        now = time.time()
+        max_age = self.max_age_days * 86400
+        with self._lock:
+            stale = []
+            for blend_file, entry in self._data.items():
+                # A missing file in an existing folder was deleted; a missing folder may just be an unmounted drive
+                deleted = not os.path.exists(blend_file) and os.path.isdir(os.path.dirname(blend_file))
+                expired = now - entry.get("last_used", now) > max_age
+                if deleted or expired:
+                    stale.append(blend_file)
+            for blend_file in stale:
+                del self._data[blend_file]
+
+            overflow = len(self._data) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self._data, key=lambda path: self._data[path].get("last_used", 0))[:overflow]
+                for blend_file in oldest:
+                    del self._data[blend_file]
+                stale.extend(oldest)
+        return len(stale)
+
+    def schedule_save(self):
+        """Arms (or re-arms) the debounce timer."""
+        with self._lock:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            if self._timer is not None:
+                if now - self._dirty_since >= self.max_delay:
+                    return  # Let the pending timer fire instead of postponing it again
+                self._timer.cancel()
+            delay = min(self.debounce, max(0.0, self._dirty_since + self.max_delay - now))
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @timed("settings.flush")
+    def flush(self):
+        """Writes pending changes to disk now."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if self._dirty_since is None:
+                    return
+                self._dirty_since = None
+                self.prune()
+                snapshot = copy.deepcopy(self._data)
+            try:
+                atomic_write_json(self.path, snapshot)
+                self.save_count += 1
+            except OSError as e:
+                logger.error(f"Error saving settings: {e}")
+
+    def close(self):
+        """Flushes pending changes; call before the application exits."""
+        self.flush()
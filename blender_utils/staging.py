@@ -0,0 +1,232 @@
+"""
+Renders to fast local scratch space and moves every finished frame to its output path.
+
+Blender writes each frame synchronously before starting the next one, so a
+slow network share as the output path stalls the render between frames.
+With a FrameStager the job renders into a scratch directory instead, and a
+small thread pool copies each saved frame to the real output folder while
+Blender goes on with the next one. Copies share a bandwidth limit, are
+written under a temporary name, read back and compared by checksum before
+they are renamed into place, and are retried with a backoff when the share
+hiccups. The scratch copy is deleted once its frame has landed. The render
+only finishes after the last frame has landed; a frame that can't be
+copied fails the job and its scratch copy is kept.
+"""
+import dataclasses
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from blender_utils.exr_verify import FrameVerified
+from blender_utils.frame_scan import output_pattern
+from blender_utils.log_parser import FrameSaved
+from blender_utils.render_engine import FrameRendered, RenderFinished, RenderJob, RenderLogEvent, RenderStarted
+from blender_utils.render_failures import TRANSFER, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+BLOCK_SIZE = 1024 * 1024
+# Copies are retried sooner and more often than renders: the share is usually back within seconds
+DEFAULT_RETRY = RetryPolicy(max_attempts=5, backoff=2.0, max_backoff=30.0)
+
+
+class RateLimiter:
+    """Token bucket shared by all transfers; consume() blocks so the total stays under bytes_per_s."""
+
+    def __init__(self, bytes_per_s):
+        self.bytes_per_s = bytes_per_s
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size):
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now) + size / self.bytes_per_s
+            wait = self._next - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+def file_checksum(path):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_verified(source, target, limiter=None):
+    """
+    Copies source to target through a temporary file and returns its checksum.
+
+    The copy is synced, read back and compared before it is renamed over target,
+    so target is either the old file or a complete, identical copy.
+    """
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    partial = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.part")
+    digest = hashlib.blake2b()
+    try:
+        with open(source, "rb") as src, open(partial, "wb") as dst:
+            for block in iter(lambda: src.read(BLOCK_SIZE), b""):
+                if limiter is not None:
+                    limiter.consume(len(block))
+                digest.update(block)
+                dst.write(block)
+            dst.flush()
+            os.fsync(dst.fileno())
+        checksum = digest.hexdigest()
+        landed = file_checksum(partial)
+        if landed != checksum:
+            raise OSError(f"Checksum mismatch after copy ({landed[:12]} != {checksum[:12]})")
+        os.replace(partial, target)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    return checksum
+
+
+@dataclass(frozen=True)
+class FrameLanded:
+    job: RenderJob
+    frame: int
+    path: str  # Final location
+    size: int
+    seconds: float
+    checksum: str
+
+
+class FrameStager:
+    def __init__(self, engine, scratch_dir, workers=DEFAULT_WORKERS, bandwidth=None, retry=None,
+                 after_verification=False):
+        """
+        :param engine: RenderEngine whose frames are moved.
+        :param scratch_dir: Fast local folder the job renders into; each job gets a subfolder.
+        :param workers: Frames copied at the same time.
+        :param bandwidth: Total copy rate limit in bytes per second, None for unlimited.
+        :param retry: RetryPolicy for failed copies, defaults to DEFAULT_RETRY.
+        :param after_verification: Move frames once a FrameVerifier passed them instead of as soon as they're saved.
+        """
+        self.engine = engine
+        self.scratch_dir = scratch_dir
+        self.limiter = RateLimiter(bandwidth) if bandwidth else None
+        self.retry = retry or DEFAULT_RETRY
+        self.after_verification = after_verification
+        self.final_dir = None
+        self.job_scratch = None
+        self.landed = 0
+        self.bytes_landed = 0
+        self._pending = {}  # scratch path -> size, queued or being copied
+        self._saved = {}  # worker -> scratch path of the frame it just saved
+        self._finished = False
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage")
+        engine.subscribe(self._on_event)
+
+    def prepare(self, job):
+        """
+        Returns a copy of job that renders into scratch space; call before starting it.
+
+        :raises ValueError: If the job's output location can't be determined.
+        """
+        pattern = output_pattern(job)
+        if not pattern:
+            raise ValueError("Could not determine the output path to stage frames to")
+        name = os.path.splitext(os.path.basename(job.blend_file))[0]
+        self.final_dir = os.path.dirname(os.path.abspath(pattern))
+        self.job_scratch = os.path.join(os.path.abspath(self.scratch_dir), f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(self.job_scratch, exist_ok=True)
+        logger.info(f"📦 Rendering to {self.job_scratch}, frames are moved to {self.final_dir}")
+        return dataclasses.replace(job, output_file=os.path.join(self.job_scratch, os.path.basename(pattern)))
+
+    def backlog(self):
+        """Returns (frames, bytes) still waiting to be copied or being copied."""
+        with self._lock:
+            return len(self._pending), sum(self._pending.values())
+
+    def _on_event(self, event):
+        if isinstance(event, RenderStarted):
+            with self._lock:
+                self._finished = False
+                self.landed = self.bytes_landed = 0
+                self._saved = {}
+        elif isinstance(event, RenderLogEvent) and isinstance(event.event, FrameSaved):
+            self._saved[event.worker] = event.event.path
+        elif isinstance(event, FrameRendered):
+            path = self._saved.pop(event.worker, None)
+            if path is not None and not self.after_verification:
+                self._submit(event.job, event.worker, event.frame, path)
+        elif isinstance(event, FrameVerified):
+            if self.after_verification and event.check.ok:
+                self._submit(event.job, event.worker, event.frame, event.check.path)
+        elif isinstance(event, RenderFinished):
+            with self._lock:
+                self._finished = True
+            self._remove_scratch()
+
+    def _submit(self, job, worker, frame, path):
+        if self.job_scratch is None or not path.startswith(self.job_scratch + os.sep):
+            return  # Not one of ours, e.g. a render that wasn't prepared
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            self._pending[path] = size
+        # Called on the thread that produced the frame, before its work is done, so the render waits for the copy
+        self.engine.hold()
+        self._pool.submit(self._transfer, job, worker, frame, path)
+
+    def _transfer(self, job, worker, frame, path):
+        target = os.path.join(self.final_dir, os.path.basename(path))
+        try:
+            attempt = 1
+            while True:
+                start = time.time()
+                try:
+                    checksum = copy_verified(path, target, self.limiter)
+                    break
+                except OSError as e:
+                    if attempt >= self.retry.max_attempts:
+                        logger.error(f"❌ Could not move frame {frame} to {target} after {attempt} attempts: {e}. "
+                                     f"The rendered frame is kept at {path}")
+                        self.engine.reject_frame(worker, frame, f"{os.path.basename(path)}: {e}", TRANSFER)
+                        return
+                    delay = self.retry.delay(attempt + 1)
+                    logger.warning(f"⚠️ Copying frame {frame} to {self.final_dir} failed (attempt {attempt}/"
+                                   f"{self.retry.max_attempts}): {e}. Retrying in {delay:g}s")
+                    time.sleep(delay)
+                    attempt += 1
+            size = os.path.getsize(target)
+            os.remove(path)
+            with self._lock:
+                self.landed += 1
+                self.bytes_landed += size
+            logger.debug(f"📦 Frame {frame} landed in {target}")
+            self.engine.emit(FrameLanded(job, frame, target, size, time.time() - start, checksum))
+        except Exception as e:
+            logger.exception(f"Error moving frame {frame}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+                done = self._finished and not self._pending
+            self.engine.release()
+            if done:
+                self._remove_scratch()
+
+    def _remove_scratch(self):
+        """Removes the job's scratch folder once nothing is left in it (failed frames keep it alive)."""
+        with self._lock:
+            if self._pending or self.job_scratch is None:
+                return
+        try:
+            os.rmdir(self.job_scratch)
+        except OSError:
+            pass
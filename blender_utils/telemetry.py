@@ -0,0 +1,190 @@
+"""
+Samples CPU, memory, threads and disk writes of the Blender process trees during a render.
+
+A background thread polls every running worker's process tree (Blender plus
+anything it spawned) at a fixed interval. Samples go into a column-oriented
+time series of typed arrays and are attributed to the frame the worker was
+rendering at the time, so peak RAM per frame is known when the job ends.
+That is the number that decides how many Blender instances fit on a node;
+it is published as a ResourcePeak event when the job ends so the render
+history can remember it for the resource governor.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+
+import psutil
+
+from blender_utils.render_engine import RenderFinished, RenderJob, RenderStarted
+
+logger = logging.getLogger(__name__)
+
+NO_FRAME = -1  # Stored in the frame column while a worker is loading the file, before its first frame
+
+COLUMNS = ("time", "worker", "frame", "cpu_percent", "rss_bytes", "threads", "write_bytes")
+
+
+@dataclass(frozen=True)
+class ResourcePeak:
+    job: RenderJob
+    peak_rss: int  # Largest RSS of one worker's Blender process tree, in bytes
+    peak_frame: int  # Frame being rendered at the time, None while loading
+
+
+class ResourceSeries:
+    """Column-oriented time series of resource samples, one typed array per column."""
+
+    def __init__(self):
+        self.time = array("d")
+        self.worker = array("h")
+        self.frame = array("i")
+        self.cpu_percent = array("f")
+        self.rss_bytes = array("Q")
+        self.threads = array("I")
+        self.write_bytes = array("Q")
+        self.frame_peaks = {}  # frame -> peak RSS in bytes, kept up to date as samples arrive
+        self.peak_rss = 0
+        self.peak_frame = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.time)
+
+    def append(self, timestamp, worker, frame, cpu_percent, rss_bytes, threads, write_bytes):
+        frame = NO_FRAME if frame is None else frame
+        with self._lock:
+            self.time.append(timestamp)
+            self.worker.append(worker)
+            self.frame.append(frame)
+            self.cpu_percent.append(cpu_percent)
+            self.rss_bytes.append(rss_bytes)
+            self.threads.append(threads)
+            self.write_bytes.append(write_bytes)
+            if frame != NO_FRAME and rss_bytes > self.frame_peaks.get(frame, 0):
+                self.frame_peaks[frame] = rss_bytes
+            if rss_bytes > self.peak_rss:
+                self.peak_rss = rss_bytes
+                self.peak_frame = None if frame == NO_FRAME else frame
+
+    def peaks_by_frame(self):
+        """Returns {frame: peak RSS in bytes}."""
+        with self._lock:
+            return dict(self.frame_peaks)
+
+    def rows(self):
+        with self._lock:
+            columns = [getattr(self, name) for name in COLUMNS]
+            return list(zip(*columns))
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in self.rows():
+                writer.writerow((f"{row[0]:.3f}", row[1], "" if row[2] == NO_FRAME else row[2],
+                                 f"{row[3]:.1f}", *row[4:]))
+
+    def to_json(self, path):
+        with self._lock:
+            data = {name: list(getattr(self, name)) for name in COLUMNS}
+            data["frame_peaks"] = {str(frame): peak for frame, peak in sorted(self.frame_peaks.items())}
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+def tree_usage(process, cache):
+    """
+    Returns (cpu_percent, rss_bytes, threads, write_bytes) summed over a process and its descendants.
+
+    cache maps pid -> psutil.Process so cpu_percent() measures since the previous sample.
+    """
+    cpu = 0.0
+    rss = threads = write_bytes = 0
+    try:
+        members = [process] + process.children(recursive=True)
+    except psutil.Error:
+        return None
+    for member in members:
+        member = cache.setdefault(member.pid, member)
+        try:
+            with member.oneshot():
+                cpu += member.cpu_percent(None)
+                rss += member.memory_info().rss
+                threads += member.num_threads()
+                try:
+                    write_bytes += member.io_counters().write_bytes
+                except (AttributeError, psutil.AccessDenied):
+                    pass  # Not available on macOS
+        except psutil.Error:
+            continue  # Exited between listing and sampling
+    return cpu, rss, threads, write_bytes
+
+
+class ResourceSampler:
+    def __init__(self, engine, interval=1.0, export_dir=None):
+        """
+        :param engine: RenderEngine whose Blender processes are sampled.
+        :param interval: Seconds between samples.
+        :param export_dir: If set, each finished job's series is written there as CSV and JSON.
+        """
+        self.engine = engine
+        self.interval = interval
+        self.export_dir = export_dir
+        self.series = ResourceSeries()
+        self._stop = threading.Event()
+        self._thread = None
+        engine.subscribe(self._on_event)
+
+    def _on_event(self, event):
+        if isinstance(event, RenderStarted):
+            self.start()
+        elif isinstance(event, RenderFinished):
+            self.stop()
+            if self.series.peak_rss:
+                self.engine.emit(ResourcePeak(event.job, self.series.peak_rss, self.series.peak_frame))
+            if self.export_dir:
+                self.export(event.job)
+
+    def start(self):
+        self.stop()
+        self.series = ResourceSeries()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        cache = {}  # pid -> psutil.Process, reused so CPU percentages are deltas
+        while not self._stop.is_set():
+            now = time.time()
+            for worker, pid, frame in self.engine.worker_processes():
+                process = cache.get(pid)
+                if process is None:
+                    try:
+                        process = cache[pid] = psutil.Process(pid)
+                    except psutil.NoSuchProcess:
+                        continue
+                usage = tree_usage(process, cache)
+                if usage is not None:
+                    self.series.append(now, worker, frame, *usage)
+            self._stop.wait(self.interval)
+
+    def export(self, job):
+        """Writes the series as <blend name>_<time>_telemetry.csv/.json and returns the CSV path."""
+        os.makedirs(self.export_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(job.blend_file))[0]
+        base = os.path.join(self.export_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_telemetry")
+        self.series.to_csv(base + ".csv")
+        self.series.to_json(base + ".json")
+        logger.info(f"📈 Resource telemetry written to {base}.csv")
+        return base + ".csv"
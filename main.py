@@ -1,25 +1,75 @@
+import logging
 import os
-import subprocess
+import tempfile
 import tkinter as tk
 from tkinter import filedialog, IntVar, StringVar, messagebox, ttk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import threading
 import time
 import psutil
-import json
-from blender_utils.blend_reader import get_blend_info
+from blender_utils.blend_batch import default_user_settings, scan_folder
+from blender_utils.blend_cache import configure_default_cache, file_key
+from blender_utils.blend_reader import get_blend_info, set_query_daemon
+from blender_utils.exr_verify import FrameVerifier
+from blender_utils.farm import DEFAULT_PORT, FarmCoordinator
+from blender_utils.frame_scan import plan_resume
+from blender_utils.governor import NICE, REFUSE, THROTTLE, ResourceGovernor, check_admission
+from blender_utils.log import get_ring_buffer, setup_logging, span
+from blender_utils.partition import plan_job
+from blender_utils.progress_bus import ProgressBus
+from blender_utils.query_daemon import BlendQueryDaemon
+from blender_utils.render_failures import RetryPolicy
+from blender_utils.render_history import RenderHistory, history_profile
+from blender_utils.render_profiles import FINAL, apply_profile, blend_profiles
+from blender_utils.render_engine import CANCELED, FAILED, RenderEngine, RenderFinished, RenderJob
+from blender_utils.render_queue import QueueJob, RenderQueue, RenderScheduler
+from blender_utils.scene_inventory import get_scene_inventory
+from blender_utils.settings_store import SettingsStore
+from blender_utils.staging import FrameStager
+from blender_utils.telemetry import ResourceSampler
+
+logger = logging.getLogger(__name__)
 
 class BlenderRenderApp:
     SETTINGS_FILE = "blend_settings.json"
+    SETTINGS_SAVE_DELAY = 1.0  # Seconds of inactivity before settings are written
+    BLEND_CACHE_FILE = "blend_info_cache.json"
+    BLEND_CACHE_SIZE = 1024  # Max number of .blend files kept in the info cache (a whole show can be scanned in)
+    BLEND_CACHE_SAVE_DELAY = 1.0  # Seconds of inactivity before the info cache is written
+    QUEUE_FILE = "render_queue.json"
+    HISTORY_FILE = "render_history.json"
+    TELEMETRY_DIR = "telemetry"  # Per-job CPU/RAM/disk time series are exported here
+    TELEMETRY_INTERVAL = 1.0  # Seconds between resource samples
+    VERIFY_WORKERS = 2  # Saved frames checked at the same time; the manifest goes next to the frames
+    SCRATCH_DIR = os.path.join(tempfile.gettempdir(), "bender_scratch")  # Fast local disk renders go to first
+    TRANSFER_WORKERS = 2  # Frames copied from scratch to the output path at the same time
+    TRANSFER_LIMIT = None  # Bytes per second for those copies, None for unlimited
+    RENDER_NICE = NICE  # Local Blender processes run at this niceness (and lowest I/O priority) to keep the UI responsive
+    PROGRESS_REFRESH_MS = 100  # Progress widgets are redrawn at most this often (10 Hz)
+    SCAN_PROCESSES = 2  # Blender instances used when a folder scan needs Blender to read files
+    QUERY_DAEMON_IDLE_TIMEOUT = 600  # Seconds the warm Blender (BENDER_QUERY_DAEMON=1) stays up without queries
+    FARM_PORT = DEFAULT_PORT  # Farm workers connect here (python -m blender_utils farm-worker this-host:7878)
+    FARM_STOP_GRACE = 10.0  # Seconds a finished farm render keeps answering so workers hear it is done
+    # Frames whose Blender crashes are retried alone, with fewer threads after a crash or running out of memory
+    RETRY_POLICY = RetryPolicy(max_attempts=3, backoff=5.0, fewer_threads=True)
 
     def __init__(self, tk_root):
         self.root = tk_root
+        self.blend_cache = configure_default_cache(self.BLEND_CACHE_FILE, self.BLEND_CACHE_SIZE,
+                                                   self.BLEND_CACHE_SAVE_DELAY)
+        self.settings = SettingsStore(self.SETTINGS_FILE, debounce=self.SETTINGS_SAVE_DELAY)
+        self.render_history = RenderHistory(self.HISTORY_FILE)
+        self.query_daemon = None
+        if os.environ.get("BENDER_QUERY_DAEMON") == "1":
+            # Started on the first read that needs Blender, then reused until idle
+            self.query_daemon = BlendQueryDaemon(idle_timeout=self.QUERY_DAEMON_IDLE_TIMEOUT)
+            set_query_daemon(self.query_daemon)
         self.rendered_frame_count = None
         self.root = root
         self.root.title("Blender Render Launcher")
         self.root.geometry("700x800")
 
-        print("Creating UI elements...")  # Debugging message
+        logger.debug("Creating UI elements...")
 
         # Drag and Drop Blender File Label
         self.root.drop_target_register(DND_FILES)
@@ -34,6 +84,12 @@ class BlenderRenderApp:
         self.scene_label = tk.Label(root, textvariable=self.scene_var, font=("Arial", 14, "bold"))
         self.scene_label.pack()
 
+        # Every scene in the file; selecting several renders each as its own job
+        self.scene_inventory = None
+        self.scene_listbox = tk.Listbox(root, selectmode="extended", height=3, width=70, exportselection=False)
+        self.scene_listbox.pack(pady=2)
+        self.scene_listbox.bind("<<ListboxSelect>>", self.on_scene_selected)
+
         self.refresh_button = tk.Button(root, text="Fetch Scene Data", command=self.refresh_scene_settings)
         self.refresh_button.config(state="disabled")
         self.refresh_button.pack(pady=5)
@@ -101,6 +157,50 @@ class BlenderRenderApp:
 
         self.select_output_button = tk.Button(root, text="Select Output Folder", command=self.select_output_folder)
         self.select_output_button.pack(pady=5)
+
+        # Parallel Rendering Options
+        parallel_frame = tk.Frame(root)
+        parallel_frame.pack(pady=5)
+
+        tk.Label(parallel_frame, text="Parallel Workers:").grid(row=0, column=0, padx=5)
+        self.workers_var = IntVar(value=1)
+        self.workers_spinbox = tk.Spinbox(parallel_frame, from_=1, to=max(1, os.cpu_count() or 1),
+                                          textvariable=self.workers_var, width=4, font=("Arial", 12))
+        self.workers_spinbox.grid(row=0, column=1, padx=5)
+
+        self.pin_cpus_var = IntVar(value=0)
+        self.pin_cpus_checkbox = tk.Checkbutton(parallel_frame, text="Pin CPUs", variable=self.pin_cpus_var)
+        self.pin_cpus_checkbox.grid(row=0, column=2, padx=5)
+
+        self.resume_var = IntVar(value=0)
+        self.resume_checkbox = tk.Checkbutton(parallel_frame, text="Resume (skip rendered frames)",
+                                              variable=self.resume_var)
+        self.resume_checkbox.grid(row=0, column=3, padx=5)
+
+        # Hand the frames out to farm workers on the LAN instead of rendering locally
+        self.farm_var = IntVar(value=0)
+        self.farm_checkbox = tk.Checkbutton(parallel_frame, text=f"Farm (port {self.FARM_PORT})",
+                                            variable=self.farm_var)
+        self.farm_checkbox.grid(row=0, column=4, padx=5)
+
+        # Render to local scratch and move each frame to the output path in the background
+        self.scratch_var = IntVar(value=0)
+        self.scratch_checkbox = tk.Checkbutton(parallel_frame, text="Local scratch", variable=self.scratch_var)
+        self.scratch_checkbox.grid(row=0, column=5, padx=5)
+
+        # Render profile (draft, preview, final, or one defined for this file) applied on top of the scene
+        tk.Label(parallel_frame, text="Profile:").grid(row=1, column=0, padx=5)
+        self.profile_var = StringVar(value=FINAL)
+        self.profile_combobox = ttk.Combobox(parallel_frame, textvariable=self.profile_var, state="readonly",
+                                             width=10, values=[FINAL])
+        self.profile_combobox.grid(row=1, column=1, padx=5)
+
+        # Render every 16th frame first, then every 8th, ... so the whole shot can be previewed early
+        self.progressive_var = IntVar(value=0)
+        self.progressive_checkbox = tk.Checkbutton(parallel_frame, text="Coarse-to-fine",
+                                                   variable=self.progressive_var)
+        self.progressive_checkbox.grid(row=1, column=2, padx=5)
+
         # Progress Percentage Label (initially hidden)
         self.progress_percentage_var = StringVar(value="")
         self.progress_percentage_label = tk.Label(root, textvariable=self.progress_percentage_var, font=("Arial", 14, "bold"))
@@ -137,6 +237,23 @@ class BlenderRenderApp:
         self.estimated_time_label = tk.Label(root, textvariable=self.estimated_time_var, font=("Arial", 12))
         self.estimated_time_label.pack()
 
+        self.peak_memory_var = StringVar(value="Peak RAM: --")
+        self.peak_memory_label = tk.Label(root, textvariable=self.peak_memory_var, font=("Arial", 12))
+        self.peak_memory_label.pack()
+
+        self.farm_status_var = StringVar(value="")
+        self.farm_status_label = tk.Label(root, textvariable=self.farm_status_var, font=("Arial", 12))
+        self.farm_status_label.pack()
+
+        self.transfer_status_var = StringVar(value="")
+        self.transfer_status_label = tk.Label(root, textvariable=self.transfer_status_var, font=("Arial", 12))
+        self.transfer_status_label.pack()
+
+        # Why the resource governor throttled the render or is holding Blender back
+        self.resource_status_var = StringVar(value="")
+        self.resource_status_label = tk.Label(root, textvariable=self.resource_status_var, font=("Arial", 12))
+        self.resource_status_label.pack()
+
         # Render Button
         self.render_button = tk.Button(root, text="Render", command=self.start_render, bg="#4CAF50", fg="black", font=("Arial", 12, "bold"), padx=10, pady=5)
         self.render_button.pack(pady=10)
@@ -146,12 +263,35 @@ class BlenderRenderApp:
         self.cancel_button.pack(pady=5)
         self.cancel_button.config(state="disabled")
 
+        # Render Queue Buttons
+        queue_frame = tk.Frame(root)
+        queue_frame.pack(pady=5)
+        self.add_to_queue_button = tk.Button(queue_frame, text="Add to Queue", command=self.add_to_queue)
+        self.add_to_queue_button.grid(row=0, column=0, padx=5)
+        self.show_queue_button = tk.Button(queue_frame, text="Render Queue...", command=self.show_render_queue)
+        self.show_queue_button.grid(row=0, column=1, padx=5)
+        self.show_log_button = tk.Button(queue_frame, text="Blender Log...", command=self.show_log)
+        self.show_log_button.grid(row=0, column=2, padx=5)
+        self.scan_folder_button = tk.Button(queue_frame, text="Scan Folder...", command=self.scan_project_folder)
+        self.scan_folder_button.grid(row=0, column=3, padx=5)
+        self.log_window = None
+
+        self.render_queue = RenderQueue(self.QUEUE_FILE)
+        self.scheduler = RenderScheduler(self.render_queue, settings=self.settings, render_history=self.render_history,
+                                         telemetry_interval=self.TELEMETRY_INTERVAL, telemetry_dir=self.TELEMETRY_DIR,
+                                         nice=self.RENDER_NICE)
+        self.queue_window = None
+
         self.blend_file_path = None
-        self.render_process = None
-        self.start_time = None
-        self.current_frame_start_time = None
-        self.frame_times = []
-        self.last_frame_number = None
+        self.render_engine = None
+        self.resource_sampler = None
+        self.frame_stager = None
+        self.frame_verifier = None
+        self.cost_plan = None
+        self.resource_governor = None
+        self.throttle_reason = None
+        self.progress_bus = None
+        self.shown_progress_version = None
 
         # self.first_detected_frame = None  # Initialize it to None
         self.rendering_active = False
@@ -165,57 +305,51 @@ class BlenderRenderApp:
         self.render_filename.trace_add("write", lambda *args: self.update_user_settings())
         self.output_path.trace_add("write", lambda *args: self.update_user_settings())
         self.override_output.trace_add("write", lambda *args: self.update_user_settings())
+        self.profile_var.trace_add("write", lambda *args: self.update_user_settings())
 
         self.toggle_output_options()
-        print("UI initialized successfully!")
-
-    def load_settings(self):
-        """Loads the settings JSON file."""
-        if os.path.exists(self.SETTINGS_FILE):
-            with open(self.SETTINGS_FILE, "r") as f:
-                return json.load(f)
-        return {}
-
-    def save_settings(self, settings):
-        """Saves settings to the JSON file safely."""
-        try:
-            with open(self.SETTINGS_FILE, "w", encoding="utf-8", newline="") as f:
-                json.dump(settings, f, indent=4)
-                f.flush()  # Ensure all data is written before closing
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-
-    @staticmethod
-    def get_blend_last_modified(file_path):
-        """Returns the last modified timestamp of a .blend file."""
-        return os.path.getmtime(file_path) if os.path.exists(file_path) else None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        logger.debug("UI initialized successfully!")
+
+    def on_close(self):
+        """Writes pending settings before the window closes."""
+        self.scheduler.stop()
+        self.settings.close()
+        self.blend_cache.close()
+        if self.query_daemon is not None:
+            self.query_daemon.stop()
+        self.root.destroy()
 
     def drop_file(self, event):
         file_path = event.data.strip('{}')  # Handle macOS paths
-        print(f"Dropped file path: {file_path}")
+        logger.info(f"Dropped file path: {file_path}")
 
         if not file_path.endswith(".blend"):
             messagebox.showerror("Error", "Please drop a valid .blend file")
             return
 
+        try:
+            current_key = file_key(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read {os.path.basename(file_path)}: {e}")
+            return
         self.blend_file_path = file_path
-        settings = self.load_settings()
-        last_modified = self.get_blend_last_modified(file_path)
         changed_emoji = "✅"  # Default value in case it’s used before assignment
 
         # If the file was previously loaded, restore user settings
-        if file_path in settings:
-            prev_settings = settings[file_path]
+        if file_path in self.settings:
+            prev_settings = self.settings.get(file_path)
+            self.settings.touch(file_path)
             user_settings = prev_settings.get("user_settings", {})
 
-            # check if the .blend file has changed since last time
-            file_changed = prev_settings["last_modified"] != last_modified
+            # check if the .blend file has changed since last time (size, mtime or content)
+            file_changed = prev_settings.get("file_key") != current_key
             changed_emoji = "⚠️" if file_changed else "✅"
-            print(f"{changed_emoji} Blend file has changed: {file_changed}")
+            logger.info(f"{changed_emoji} Blend file has changed: {file_changed}")
 
             # First, check if user settings exist and apply them
             if user_settings:
-                print("🔄 Loading user settings from JSON file...")
+                logger.info("🔄 Loading user settings from JSON file...")
                 self.start_frame_var.set(user_settings["start_frame"])
                 self.end_frame_var.set(user_settings["end_frame"])
                 self.output_path.set(user_settings["output_path"])
@@ -229,46 +363,29 @@ class BlenderRenderApp:
 
                 self.toggle_output_options()
 
-            elif "blend_info" in prev_settings:
-                print("ℹ️ No user settings found, loading from .blend file...")
-                self.start_frame_var.set(prev_settings["blend_info"]["start_frame"])
-                self.end_frame_var.set(prev_settings["blend_info"]["end_frame"])
-                self.output_path.set(prev_settings["blend_info"]["output_path"])
-                self.render_filename.set(prev_settings["blend_info"]["render_filename"])
-
             else:
-                print(f"⚠️ Warning: No previous settings found for {file_path}. Using defaults.")
+                # Served from the blend info cache unless the file changed
+                logger.info("ℹ️ No user settings found, loading from .blend file...")
                 blend_info = get_blend_info(file_path)
                 if blend_info:
-                    self.start_frame_var.set(blend_info["start_frame"])
-                    self.end_frame_var.set(blend_info["end_frame"])
-                    self.output_path.set(os.path.dirname(blend_info["output_path"]))
-                    self.render_filename.set(os.path.basename(blend_info["output_path"]))
+                    self.apply_blend_info(blend_info)
+                    self.settings.update(file_path, blend_info=blend_info, file_key=current_key)
                 self.frame_toggle.set_state("Scene")
                 self.filename_toggle.set_state("Scene")
                 self.output_toggle.set_state("Scene")
         else:
-            print("🆕 First time loading this .blend file, extracting info from Blender...")
+            logger.info("🆕 First time loading this .blend file, extracting scene info...")
             blend_info = get_blend_info(file_path)
             if blend_info:
-                self.start_frame_var.set(blend_info["start_frame"])
-                self.end_frame_var.set(blend_info["end_frame"])
-                self.output_path.set(os.path.dirname(blend_info["output_path"]))
-                self.render_filename.set(os.path.basename(blend_info["output_path"]))
+                self.apply_blend_info(blend_info)
 
                 # Save both file and user settings
-                settings[file_path] = {
-                    "blend_info": blend_info,
-                    "user_settings": {
-                        "start_frame": blend_info["start_frame"],
-                        "end_frame": blend_info["end_frame"],
-                        "output_path": os.path.dirname(blend_info["output_path"]),
-                        "render_filename": os.path.basename(blend_info["output_path"]),
-                        "override_output": False
-                    },
-                    "last_modified": last_modified
-                }
-                self.save_settings(settings)
+                self.settings.update(
+                    file_path,
+                    blend_info=blend_info,
+                    user_settings=default_user_settings(blend_info),
+                    file_key=current_key
+                )
             self.frame_toggle.set_state("Scene")
             self.filename_toggle.set_state("Scene")
             self.output_toggle.set_state("Scene")
@@ -277,8 +394,35 @@ class BlenderRenderApp:
         display_path = self.shorten_path(file_path, max_length=50)
         self.file_label.config(text=f"{display_path}", fg="green")
         self.refresh_button.config(state="normal")
+        self.load_profiles(file_path, self.settings.get(file_path, {}).get("user_settings", {}).get("profile", FINAL))
+        self.load_scene_list(file_path)
         self.root.after(10, lambda: self.update_ui(file_path, changed_emoji))
 
+    def load_scene_list(self, file_path):
+        """Lists the file's scenes, with the active scene selected."""
+        self.scene_inventory = get_scene_inventory(file_path)
+        self.scene_listbox.delete(0, "end")
+        if not self.scene_inventory:
+            return
+        for index, scene in enumerate(self.scene_inventory.scenes):
+            self.scene_listbox.insert("end", scene.summary())
+            if scene.name == self.scene_inventory.active_scene:
+                self.scene_listbox.selection_set(index)
+        self.scene_listbox.config(height=min(6, max(1, len(self.scene_inventory.scenes))))
+
+    def selected_scenes(self):
+        """Returns the SceneInfo of every selected scene."""
+        if not self.scene_inventory:
+            return []
+        return [self.scene_inventory.scenes[index] for index in self.scene_listbox.curselection()]
+
+    def on_scene_selected(self, event=None):
+        """Shows the frame range of a single selected scene while the frame range follows the scene."""
+        scenes = self.selected_scenes()
+        if len(scenes) == 1 and self.frame_toggle.current_state == 0:
+            self.start_frame_var.set(scenes[0].start_frame)
+            self.end_frame_var.set(scenes[0].end_frame)
+
     @staticmethod
     def shorten_path(path, max_length=50):
         """Shortens a long file path for UI display."""
@@ -286,7 +430,7 @@ class BlenderRenderApp:
             start_chars = 15  # Number of characters to keep at the start
             end_chars = max_length - start_chars - 3  # Remaining characters for the end
             new_path = f"{path[:start_chars]}...{path[-end_chars:]}"
-            print(new_path)
+            logger.debug(new_path)
             return new_path
         return path
 
@@ -301,6 +445,13 @@ class BlenderRenderApp:
             self.start_frame_var.set(blend_info["start_frame"])
             self.end_frame_var.set(blend_info["end_frame"])
 
+    def apply_blend_info(self, blend_info):
+        """Fills the frame range and output fields from extracted scene settings."""
+        self.start_frame_var.set(blend_info["start_frame"])
+        self.end_frame_var.set(blend_info["end_frame"])
+        self.output_path.set(blend_info["output_path"])
+        self.render_filename.set(blend_info["render_filename"])
+
     def toggle_output_options(self):
         """Enable or disable output path and filename entry based on checkbox state."""
         if self.override_output.get():
@@ -330,20 +481,27 @@ class BlenderRenderApp:
             self.filename_toggle.canvas.itemconfig(self.filename_toggle.circle, fill="", outline="")  # Gray out button
             self.output_toggle.canvas.itemconfig(self.output_toggle.circle, fill="", outline="")  # Gray out button
 
+    @staticmethod
+    def get_int(var, default=1):
+        """Reads an IntVar, returning default while the entry is empty."""
+        try:
+            return var.get()
+        except tk.TclError:
+            return default
+
     def update_user_settings(self):
-        """Saves the user's modified settings to the JSON file."""
+        """Stores the user's modified settings; the settings store writes them to disk later."""
         if not self.blend_file_path:
             return
 
-        settings = self.load_settings()
-
-        if self.blend_file_path in settings:
-            settings[self.blend_file_path]["user_settings"] = {
-                "start_frame": self.start_frame_var.get() if self.start_frame_var.get() != "" else 1,  # Default to 1 if empty
-                "end_frame": self.end_frame_var.get() if self.end_frame_var.get() != "" else 1,  # Default to 1 if empty
+        if self.blend_file_path in self.settings:
+            user_settings = {
+                "start_frame": self.get_int(self.start_frame_var),  # Default to 1 if empty
+                "end_frame": self.get_int(self.end_frame_var),  # Default to 1 if empty
                 "output_path": self.output_path.get(),
                 "render_filename": self.render_filename.get(),
                 "override_output": bool(self.override_output.get()),
+                "profile": self.profile_var.get(),
                 # Save toggle button states
                 "toggle_states": {
                     "frame": self.frame_toggle.states[self.frame_toggle.current_state][1],  # Scene, User, or Default
@@ -351,14 +509,36 @@ class BlenderRenderApp:
                     "output": self.output_toggle.states[self.output_toggle.current_state][1]
                 }
             }
-            self.save_settings(settings)
-            print(f"✅ Updated user settings for {self.blend_file_path}")
+            self.settings.update(self.blend_file_path, user_settings=user_settings)
+        if not self.rendering_active:
+            self.show_predicted_time()
+
+    def load_profiles(self, file_path, selected):
+        """Fills the profile list with the built-in profiles and the ones stored for this file."""
+        names = list(blend_profiles(self.settings, file_path))
+        self.profile_combobox.config(values=names)
+        self.profile_var.set(selected if selected in names else FINAL)
+
+    def selected_profile(self):
+        return blend_profiles(self.settings, self.blend_file_path).get(self.profile_var.get())
+
+    def show_predicted_time(self):
+        """Shows how long the selected frame range took on earlier renders, before Render is pressed."""
+        start_frame, end_frame = self.get_int(self.start_frame_var), self.get_int(self.end_frame_var)
+        frames = range(start_frame, end_frame + 1)
+        predicted = self.render_history.estimate(self.blend_file_path, frames, workers=self.get_int(self.workers_var),
+                                                 profile=history_profile(self.selected_profile()))
+        if predicted is None:
+            self.estimated_time_var.set("Estimated Time Left: --:--:--")
+        else:
+            self.estimated_time_var.set(f"Estimated Render Time: {self.format_eta(predicted)} "
+                                        f"for {len(frames)} Frames (from history)")
 
     def update_ui(self, file_path, changed_emoji):
         """ Updates the UI after a file is dropped """
         display_path = self.shorten_path(os.path.basename(file_path), max_length=50)
         label_text = f"{display_path}"
-        print(f"Updating label: {label_text}")  # Debugging output
+        logger.debug(f"Updating label: {label_text}")
         short_path = self.shorten_path(self.output_path.get())
         self.output_label.config(text=f"{short_path}")
         self.file_label.config(text=label_text, fg="green")
@@ -376,9 +556,53 @@ class BlenderRenderApp:
             messagebox.showerror("Error", "Please drag and drop a .blend file")
             return
 
+        scenes = self.selected_scenes()
+        if len(scenes) > 1:
+            # One job per scene, run through the queue
+            self.add_to_queue()
+            self.scheduler.start()
+            return
+        scene = scenes[0].name if scenes else None
+
         start_frame = self.start_frame_var.get()
         end_frame = self.end_frame_var.get()
-        total_frames = end_frame - start_frame + 1
+
+        # If override output path is enabled, add output path and filename
+        output_file = None
+        if self.override_output.get():
+            output_file = os.path.join(self.output_path.get(), self.render_filename.get())  # Construct full path
+
+        farm = bool(self.farm_var.get())
+        blend_file = self.blend_file_path
+        if farm:
+            # Workers open the paths as given, so they have to be absolute (and on shared storage)
+            blend_file = os.path.abspath(blend_file)
+            output_file = output_file and os.path.abspath(output_file)
+        job = RenderJob(blend_file, start_frame, end_frame, output_file=output_file,
+                        workers=self.get_int(self.workers_var), pin_cpus=bool(self.pin_cpus_var.get()), scene=scene,
+                        progressive=bool(self.progressive_var.get()), retry=self.RETRY_POLICY,
+                        nice=None if farm else self.RENDER_NICE)
+        job = apply_profile(job, self.selected_profile())
+
+        if self.resume_var.get():
+            job = plan_resume(job)
+            if job is None:
+                messagebox.showinfo("Nothing to Render", "All frames in this range are already rendered.")
+                return
+        # Local renders must fit this machine's free RAM, CPU and disk, and parallel ones cut their chunks
+        # by the cost of each frame last time; the farm leases its own
+        self.cost_plan = None
+        self.throttle_reason = None
+        if not farm:
+            admission = check_admission(job, self.render_history)
+            if admission.action == REFUSE:
+                messagebox.showerror("Not Enough Resources", f"The render was not started: {admission.reason}")
+                return
+            if admission.action == THROTTLE:
+                self.throttle_reason = admission.reason
+            job = admission.job
+            job, self.cost_plan = plan_job(job, self.render_history)
+        total_frames = job.total_frames
 
         # Disable the render button and change its text
         self.render_button.config(state="disabled", text="🚀Rendering...")
@@ -390,160 +614,308 @@ class BlenderRenderApp:
         self.elapsed_time_var.set("Elapsed Time: 00:00:00")
         self.current_frame_time_var.set("Current Frame Time: 0.00s")
         self.avg_time_per_frame_var.set("Avg Time per Frame: Calculating...")
-        self.estimated_time_var.set("Estimated Time Left: Calculating...")
+        predictions = self.render_history.predictions(job.blend_file, job.frames(), job.scene,
+                                                      history_profile(job.profile))
+        if not predictions:
+            self.estimated_time_var.set("Estimated Time Left: Calculating...")
 
-        # Reset tracking variables
-        self.start_time = time.time()
-        self.frame_times = []  # Store frame render times
-        self.current_frame_start_time = time.time()
-        self.last_frame_number = None  # Track last processed frame
         self.rendered_frame_count = 0  # Track number of frames actually rendered
+        self.cancel_button.config(state="normal")
 
-        command = [
-            "/Applications/Blender.app/Contents/MacOS/Blender",
-            "-b", self.blend_file_path,
-            "-F", "OPEN_EXR_MULTILAYER",
-            "-x", "1",
-            "-s", str(start_frame),
-            "-e", str(end_frame),
-        ]
+        # The engine renders in background threads; the progress bus keeps only the latest state
+        # and the UI polls it at a fixed rate instead of reacting to every event
+        if farm:
+            # Same events as a local engine; the server closes once workers have heard the render is over
+            self.render_engine = FarmCoordinator(port=self.FARM_PORT)
+            self.render_engine.subscribe(self.stop_farm_when_finished(self.render_engine))
+            self.farm_status_var.set(f"🌐 Waiting for farm workers on port {self.FARM_PORT}...")
+        else:
+            self.render_engine = RenderEngine()
+            self.farm_status_var.set("")
+        self.progress_bus = ProgressBus(predictions)
+        self.shown_progress_version = None
+        self.render_engine.subscribe(self.progress_bus.publish)
+        self.render_history.attach(self.render_engine)
+        self.resource_sampler = ResourceSampler(self.render_engine, self.TELEMETRY_INTERVAL, self.TELEMETRY_DIR)
+        self.frame_stager = None
+        self.frame_verifier = None
+        self.resource_governor = None
+        self.transfer_status_var.set("")
+        self.resource_status_var.set(f"⚠️ {self.throttle_reason}" if self.throttle_reason else "")
+        if not farm:
+            manifest_dir = None
+            if self.scratch_var.get():
+                self.frame_stager = FrameStager(self.render_engine, self.SCRATCH_DIR, self.TRANSFER_WORKERS,
+                                                self.TRANSFER_LIMIT, after_verification=True)
+                try:
+                    job = self.frame_stager.prepare(job)
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    self.render_button.config(state="normal", text="Render")
+                    self.cancel_button.config(state="disabled")
+                    return
+                manifest_dir = self.frame_stager.final_dir  # The scratch folder is removed once empty
+            # Farm workers report frames from other machines; only local renders are checked
+            self.frame_verifier = FrameVerifier(self.render_engine, manifest_dir, workers=self.VERIFY_WORKERS)
+            self.resource_governor = ResourceGovernor(self.render_engine, self.render_history,
+                                                      self.frame_stager and self.frame_stager.final_dir)
+        self.peak_memory_var.set("Peak RAM: --")
+        try:
+            self.render_engine.start(job)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not start the farm coordinator: {e}")
+            self.render_button.config(state="normal", text="Render")
+            self.cancel_button.config(state="disabled")
+            self.farm_status_var.set("")
+            return
 
-        # If override output path is enabled, add output path and filename
-        if self.override_output.get():
-            output_file = os.path.join(self.output_path.get(), self.render_filename.get())  # Construct full path
-            command.extend(["-o", output_file])  # Append output path
+        self.rendering_active = True  # Set flag before starting the refresh loop
+        self.refresh_progress(self.progress_bus)
+
+    def refresh_progress(self, progress_bus):
+        """Redraws the progress widgets from the latest render state. Reschedules itself while rendering."""
+        if not self.rendering_active or progress_bus is not self.progress_bus:
+            return  # Canceled, or a loop left over from an earlier render
+
+        with span("ui.refresh"):
+            state = progress_bus.snapshot()
+            if state.version != self.shown_progress_version:
+                self.shown_progress_version = state.version
+                if state.finished:
+                    self.show_render_finished(state)
+                    return
+                self.show_frame_progress(state)
+
+            self.show_peak_memory(state)
+            if isinstance(self.render_engine, FarmCoordinator):
+                self.show_farm_status(state)
+            if self.frame_stager is not None:
+                self.show_transfer_status()
+            if self.resource_governor is not None:
+                self.show_resource_status()
+
+            # Clocks tick on every refresh, even when Blender is quiet
+            now = time.time()
+            elapsed_str = time.strftime("%H:%M:%S", time.gmtime(int(now - state.start_time)))
+            self.elapsed_time_var.set(f"Elapsed Time: {elapsed_str}")
+            if state.current_frame_start and (now - state.current_frame_start) > 0.1:
+                self.current_frame_time_var.set(f"Current Frame Time: {now - state.current_frame_start:.2f}s")
 
-        command.append("-a")  # Append animation render flag
+        self.root.after(self.PROGRESS_REFRESH_MS, self.refresh_progress, progress_bus)
 
-        self.cancel_button.config(state="normal")
+    def show_peak_memory(self, state):
+        """Shows the sampled peak RAM of the Blender process trees, overall and for the last finished frame."""
+        series = self.resource_sampler.series
+        if not series.peak_rss:
+            return
+        text = f"Peak RAM: {series.peak_rss / 1024 ** 3:.2f} GB"
+        if series.peak_frame is not None:
+            text += f" (frame {series.peak_frame})"
+        last_peak = series.frame_peaks.get(state.last_frame)
+        if last_peak:
+            text += f" | Last Frame: {last_peak / 1024 ** 3:.2f} GB"
+        self.peak_memory_var.set(text)
+
+    def stop_farm_when_finished(self, coordinator):
+        """Returns a subscriber that closes the coordinator's server in the background once its render is over."""
+        def on_event(event):
+            if isinstance(event, RenderFinished):
+                threading.Thread(target=coordinator.stop, kwargs={"grace": self.FARM_STOP_GRACE}, daemon=True).start()
+        return on_event
+
+    def show_farm_status(self, state):
+        """Shows how many farm workers joined, the farm's overall throughput and each worker's share."""
+        workers = self.render_engine.worker_stats()
+        if not workers:
+            return
+        elapsed = time.time() - state.start_time
+        throughput = state.frames_done / elapsed * 60 if elapsed > 0 else 0.0
+        shares = ", ".join(f"{stats.name}: {stats.frames_done}" for stats in workers)
+        self.farm_status_var.set(f"🌐 {len(workers)} farm workers, {throughput:.1f} frames/min ({shares})")
+
+    def show_transfer_status(self):
+        """Shows how many rendered frames are still on their way from scratch to the output path."""
+        stager = self.frame_stager
+        frames, size = stager.backlog()
+        text = f"📦 {stager.landed} frames moved to {self.shorten_path(stager.final_dir)}"
+        if frames:
+            text += f", {frames} waiting ({size / 1024 ** 2:.1f} MB)"
+        self.transfer_status_var.set(text)
+
+    def show_resource_status(self):
+        """Shows why Blender is being held back right now, else why the render was throttled, if it was."""
+        status = self.resource_governor.status
+        if status:
+            self.resource_status_var.set(f"⏸️ {status[0].upper()}{status[1:]}")
+        else:
+            self.resource_status_var.set(f"⚠️ {self.throttle_reason}" if self.throttle_reason else "")
 
-        self.rendering_active = True  # Set flag before starting timer
-        self.update_elapsed_time()  # Start updating elapsed time
-
-        def run_render():
-            self.render_process = subprocess.Popen(
-                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-            self.rendering_active = True  # Allow updates while rendering
-            rendering_frame = None
-            frame_time = 0
-            for line in self.render_process.stdout:
-                if not self.rendering_active:  # Stop updating if rendering was canceled
-                    break
-                print(line.strip())  # Debugging output
-
-                # Detect frame progress from Blender's output
-
-                if "Fra:" in line:
-                    try:
-                        frame_number = int(line.split("Fra:")[1].split()[0])  # Extract actual Fra number
-
-                        # If this is not the first time we see FRA, and it is a new frame:
-                        if rendering_frame is not None and rendering_frame != frame_number:
-                            now = time.time()
-                            frame_time = now - self.current_frame_start_time
-                            if frame_time > 0:  # Ensure only positive times are added
-                                self.frame_times.append(frame_time)
-                            print(f"✅ Frame {rendering_frame} finished in {frame_time:.2f}s")
-
-                        # Only update when a new frame is detected
-                        if rendering_frame is None or rendering_frame != frame_number:
-                            self.current_frame_start_time = time.time()  # Reset time for the new frame
-                            rendering_frame = frame_number
-
-                        # Update UI with new frame number
-                        now = time.time()
-                        elapsed_time = int(now - self.start_time)
-                        elapsed_str = time.strftime("%H:%M:%S", time.gmtime(elapsed_time))
-
-                        avg_time = sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0
-                        if avg_time > 60:
-                            avg_time_str = time.strftime("%M:%S", time.gmtime(avg_time))
-                        else:
-                            avg_time_str = f"{avg_time:.2f}s"
-                        estimated_left = avg_time * (end_frame - frame_number)
-                        total_seconds = int(estimated_left)
-                        days = total_seconds // 86400
-                        hours = (total_seconds % 86400) // 3600
-                        minutes = (total_seconds % 3600) // 60
-                        seconds = total_seconds % 60
-                        if days > 0:
-                            estimated_left_str = f"{days} days {hours} hours {minutes} minutes"
-                        else:
-                            estimated_left_str = f"{hours} hours {minutes} minutes {seconds} seconds"
-
-                        # Update progress percentage
-                        progress_percentage = int(((frame_number - start_frame) / total_frames) * 100)
-                        # Update UI
-                        relative_frame = frame_number - start_frame + 1
-                        absolute_frame_display = f" ({relative_frame:03d}/{total_frames:03d})" if start_frame > 1 else ""
-                        self.root.after(10, lambda: [
-                            self.frame_progress_var.set(f"Frame Rendered: {frame_number}/{end_frame}{absolute_frame_display}"),
-                            self.elapsed_time_var.set(f"Elapsed Time: {elapsed_str}"),
-                            self.current_frame_time_var.set(f"Current Frame Time: {frame_time:.2f}s"),
-                            self.avg_time_per_frame_var.set(f"Avg Time per Frame: {avg_time_str}s"),
-                            self.estimated_time_var.set(f"Estimated Time Left: {estimated_left_str} for {end_frame - frame_number} Frames"),
-                            self.overall_progress.config(value=frame_number - start_frame),
-                            self.progress_percentage_var.set(f"{progress_percentage}% Complete")
-                        ])
-                        self.rendered_frame_count += 1
-
-                    except Exception as e:
-                        print(f"Error parsing frame number: {e}")
-
-            if rendering_frame is not None:
-                now = time.time()
-                frame_time = now - self.current_frame_start_time
-                if frame_time > 0:
-                    self.frame_times.append(frame_time)
-                print(f"✅ Final Frame {rendering_frame} finished in {frame_time:.2f}s")
-
-            # Stop the timer and update the final UI display
-            self.rendering_active = False  # Stop elapsed time updates
-
-            total_elapsed_time = int(time.time() - self.start_time)
-            total_elapsed_str = time.strftime("%H:%M:%S", time.gmtime(total_elapsed_time))
-
-            avg_time = sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0
-            avg_time_str = f"{avg_time:.2f}s" if avg_time < 60 else time.strftime("%M:%S", time.gmtime(avg_time))
-
-            self.root.after(10, lambda: [
-                self.frame_progress_var.set(f"✅ All Frames Rendered: {self.rendered_frame_count}/{total_frames}"),
-                self.elapsed_time_var.set(f"Total Render Time: {total_elapsed_str}"),
-                self.avg_time_per_frame_var.set(f"Avg Time per Frame: {avg_time_str}"),
-                self.current_frame_time_var.set("Current Frame Time: --.--"),
-                self.estimated_time_var.set("Estimated Time Left: 00:00:00"),
-                self.progress_percentage_var.set("✅ 100% Complete"),
-                self.overall_progress.config(value=total_frames)
-            ])
-
-            # When the render finishes, disable cancel button, reset render button, and clear progress percentage
-            self.root.after(10, lambda: self.cancel_button.config(state="disabled"))
-            self.root.after(10, lambda: self.render_button.config(state="normal", text="Render"))
-            self.root.after(10, lambda: self.progress_percentage_var.set(""))
-
-        # Run the render process in a separate thread to prevent UI freezing
-        threading.Thread(target=run_render, daemon=True).start()
-
-    def update_elapsed_time(self):
-        """ Updates elapsed time and current frame time every second. Stops if rendering is canceled. """
-        if self.rendering_active:  # Ensure updates only happen if rendering is active
-            now = time.time()
-            elapsed_time = int(now - self.start_time)
-            elapsed_str = time.strftime("%H:%M:%S", time.gmtime(elapsed_time))
+    @staticmethod
+    def format_eta(seconds):
+        total_seconds = int(seconds)
+        days = total_seconds // 86400
+        hours = (total_seconds % 86400) // 3600
+        minutes = (total_seconds % 3600) // 60
+        seconds = total_seconds % 60
+        if days > 0:
+            return f"{days} days {hours} hours {minutes} minutes"
+        return f"{hours} hours {minutes} minutes {seconds} seconds"
 
-            if self.current_frame_start_time and (now - self.current_frame_start_time) > 0.1:
-                current_frame_time = now - self.current_frame_start_time
-                frame_time_str = f"{current_frame_time:.2f}s"
-            else:
-                frame_time_str = self.current_frame_time_var.get().replace("Current Frame Time: ", "")
+    @staticmethod
+    def format_frame_time(seconds):
+        return f"{seconds:.2f}s" if seconds < 60 else time.strftime("%M:%S", time.gmtime(seconds))
+
+    def show_frame_progress(self, state):
+        job = state.job
+        start_frame, end_frame, total_frames = job.start_frame, job.end_frame, state.total_frames
+        done = state.frames_done
+        self.rendered_frame_count = done
+
+        text = None
+        if job.progressive:
+            # Frames arrive out of order, so only the count means anything
+            text = f"Frames Rendered: {done}/{total_frames} (coarse-to-fine)"
+        elif job.workers > 1 or state.parallel > 1:
+            workers = max(job.workers, state.parallel)
+            text = f"Frames Rendered: {done}/{total_frames} ({workers} workers)"
+        elif state.current_frame is not None:
+            relative_frame = state.current_frame - start_frame + 1
+            absolute_frame_display = f" ({relative_frame:03d}/{total_frames:03d})" if start_frame > 1 else ""
+            text = f"Frame Rendered: {state.current_frame}/{end_frame}{absolute_frame_display}"
+        if text and (state.retries or state.frames_skipped):
+            text += f" ⚠️ {state.retries} retried, {state.frames_skipped} skipped"
+        if text:
+            self.frame_progress_var.set(text)
+
+        if state.total_samples:
+            self.progress["maximum"] = state.total_samples
+            self.progress["value"] = state.sample
+        else:
+            self.progress["value"] = 0
 
-            # Update UI elements
-            self.elapsed_time_var.set(f"Elapsed Time: {elapsed_str}")
-            self.current_frame_time_var.set(f"Current Frame Time: {frame_time_str}")
+        estimated_left = state.estimated_left()
+        if estimated_left is not None:
+            self.estimated_time_var.set(f"Estimated Time Left: {self.format_eta(estimated_left)} "
+                                        f"for {state.frames_left} Frames")
+        if not done:
+            return
+        self.avg_time_per_frame_var.set(f"Avg Time per Frame: {self.format_frame_time(state.avg_frame_time)}")
+        self.overall_progress.config(value=done)
+        self.progress_percentage_var.set(f"{int(done / total_frames * 100)}% Complete")
+
+    def show_render_finished(self, state):
+        event = state.finished
+        self.rendering_active = False
+        governor = self.resource_governor
+        if event.status == CANCELED and governor is not None and governor.stopped:
+            # Stopped by the governor, not the user, so the UI hasn't been reset
+            self.frame_progress_var.set(f"❌ Render Stopped: {event.frames_done}/{state.total_frames} Frames Rendered")
+            self.resource_status_var.set(f"❌ {governor.stopped}")
+            self.cancel_button.config(state="disabled")
+            self.render_button.config(state="normal", text="Render")
+            self.progress_percentage_var.set("")
+            messagebox.showerror("Render Stopped", f"{governor.stopped}.\nFree some space and render again with "
+                                                   f"Resume to pick up where it stopped.")
+            return
+        if event.status == CANCELED:
+            return  # cancel_render already reset the UI
+
+        total_frames = state.total_frames
+        total_elapsed_str = time.strftime("%H:%M:%S", time.gmtime(int(event.elapsed)))
+        if event.status == FAILED:
+            text = f"❌ Render Failed: {event.frames_done}/{total_frames} Frames Rendered"
+            if event.failed_chunks:
+                ranges = ", ".join(f"{start}-{end}" if start != end else str(start)
+                                   for start, end, _ in event.failed_chunks)
+                text += f"\nSkipped frames: {ranges}"
+            if event.failures:
+                kinds = sorted({failure.kind for failure in event.failures})
+                text += f" ({', '.join(kinds)})"
+            self.frame_progress_var.set(text)
+        else:
+            self.frame_progress_var.set(f"✅ All Frames Rendered: {event.frames_done}/{total_frames}")
+            self.overall_progress.config(value=total_frames)
+        self.elapsed_time_var.set(f"Total Render Time: {total_elapsed_str}")
+        self.avg_time_per_frame_var.set(f"Avg Time per Frame: {self.format_frame_time(state.avg_frame_time)}")
+        self.current_frame_time_var.set("Current Frame Time: --.--")
+        self.estimated_time_var.set("Estimated Time Left: 00:00:00")
+        if self.cost_plan is not None:
+            report = self.cost_plan.report(event.elapsed)
+            logger.info(f"📐 {report}")
+            self.estimated_time_var.set(report)
+        if self.frame_stager is not None:
+            self.show_transfer_status()
+
+        # When the render finishes, disable cancel button, reset render button, and clear progress percentage
+        self.cancel_button.config(state="disabled")
+        self.render_button.config(state="normal", text="Render")
+        self.progress_percentage_var.set("")
 
-            # Ensure the function is scheduled again if rendering is still active
-            self.root.after(1000, self.update_elapsed_time)
+    def add_to_queue(self):
+        """Queues the loaded .blend with its stored frame range and output override, one job per selected scene."""
+        if not self.blend_file_path:
+            messagebox.showerror("Error", "Please drag and drop a .blend file")
+            return
+
+        self.update_user_settings()
+        user_settings = self.settings.get(self.blend_file_path, {}).get("user_settings")
+        if not user_settings:
+            messagebox.showerror("Error", "No settings stored for this .blend file yet")
+            return
+
+        scenes = self.selected_scenes()
+        for scene in scenes or [None]:
+            job = QueueJob.from_user_settings(self.blend_file_path, user_settings, workers=self.get_int(self.workers_var),
+                                              resume=bool(self.resume_var.get()), scene=scene and scene.name)
+            if len(scenes) > 1:
+                # Each scene renders its own frame range, and an output override gets a folder per scene
+                job.start_frame, job.end_frame = scene.start_frame, scene.end_frame
+                if job.output_file:
+                    job.output_file = os.path.join(user_settings["output_path"], scene.name,
+                                                   user_settings["render_filename"])
+            self.render_queue.add(job)
+            logger.info(f"➕ Queued {os.path.basename(self.blend_file_path)}"
+                        f"{f' scene {job.scene}' if job.scene else ''} frames {job.start_frame}-{job.end_frame}")
+        self.show_render_queue()
+
+    def show_log(self):
+        if self.log_window is None or not self.log_window.winfo_exists():
+            self.log_window = LogWindow(self.root, get_ring_buffer())
+        self.log_window.lift()
+
+    def scan_project_folder(self):
+        """Reads the scene settings of every .blend file in a folder in the background."""
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        self.scan_folder_button.config(state="disabled")
+
+        def run():
+            try:
+                report = scan_folder(directory, cache=self.blend_cache, settings=self.settings,
+                                     processes=self.SCAN_PROCESSES)
+            except OSError as e:
+                logger.error(f"Error scanning {directory}: {e}")
+                report = None
+            self.root.after(0, lambda: self.show_scan_report(directory, report))
+        threading.Thread(target=run, daemon=True).start()
+
+    def show_scan_report(self, directory, report):
+        self.scan_folder_button.config(state="normal")
+        if report is None:
+            messagebox.showerror("Error", f"Could not scan {directory}")
+            return
+        message = (f"{len(report.results)} .blend files found\n\n{report.cached} already cached\n"
+                   f"{report.native} read directly\n{report.blender} read by Blender")
+        if report.failed:
+            message += f"\n\n{len(report.failed)} could not be read:\n" + "\n".join(
+                os.path.basename(path) for path in report.failed[:10])
+        messagebox.showinfo("Folder Scanned", message)
+
+    def show_render_queue(self):
+        if self.queue_window is None or not self.queue_window.winfo_exists():
+            self.queue_window = RenderQueueWindow(self.root, self.render_queue, self.scheduler)
+        self.queue_window.lift()
 
     def update_progress(self, frame_text, progress_percent):
         """ Updates frame progress text and progress bar """
@@ -552,26 +924,10 @@ class BlenderRenderApp:
         self.root.update()
 
     def cancel_render(self):
-        """Stops the Blender rendering process and resets UI."""
-        if self.render_process:
+        """Stops the Blender rendering process(es) and resets UI."""
+        if self.render_engine and self.render_engine.running:
             try:
-                # Get parent process
-                parent = psutil.Process(self.render_process.pid)
-
-                # Try to terminate all child processes first
-                for child in parent.children(recursive=True):
-                    child.terminate()
-
-                # Try terminating main process
-                parent.terminate()
-
-                # Wait a moment, then force kill if still running
-                gone, alive = psutil.wait_procs([parent], timeout=5)
-                if alive:
-                    for proc in alive:
-                        proc.kill()  # Force kill remaining processes
-
-                self.render_process = None  # Reset process reference
+                self.render_engine.cancel()  # Tears down every Blender process of the job
 
                 # Stop timers from updating but keep the last recorded values
                 self.rendering_active = False  # This will prevent further UI updates
@@ -588,9 +944,9 @@ class BlenderRenderApp:
                 messagebox.showinfo("Render Canceled", "Rendering has been stopped.")
 
             except psutil.NoSuchProcess:
-                print("Error: Process not found. It may have already stopped.")
+                logger.error("Error: Process not found. It may have already stopped.")
             except Exception as e:
-                print(f"Error while stopping render: {e}")
+                logger.error(f"Error while stopping render: {e}")
 
     def select_output_folder(self):
         initial_dir = self.output_path.get() if os.path.exists(self.output_path.get()) else os.path.expanduser("~")
@@ -617,20 +973,23 @@ class BlenderRenderApp:
         if not self.blend_file_path:
             return
 
-        print("🔄 Refreshing scene settings from Blender...")
+        logger.info("🔄 Refreshing scene settings...")
         blend_info = get_blend_info(self.blend_file_path)
 
+        try:
+            current_key = blend_info and file_key(self.blend_file_path)
+        except OSError as e:
+            logger.error(f"Error reading {self.blend_file_path}: {e}")  # Moved or deleted since it was read
+            blend_info = None
         if blend_info:
-            settings = self.load_settings()
-            settings[self.blend_file_path]["blend_info"] = blend_info
-            settings[self.blend_file_path]["last_modified"] = self.get_blend_last_modified(self.blend_file_path)
+            self.settings.update(self.blend_file_path, blend_info=blend_info, file_key=current_key)
 
             self.scene_var.set(f"✅ Scene")
-            self.save_settings(settings)
-            print("✅ Scene settings updated in JSON.")
+            logger.info("✅ Scene settings updated.")
 
             # Refresh the UI to show new scene settings
             self.apply_scene_settings()
+            self.load_scene_list(self.blend_file_path)
 
 
     def toggle_setting(self, setting):
@@ -638,10 +997,10 @@ class BlenderRenderApp:
         if not self.blend_file_path:
             return
 
-        settings = self.load_settings()
-        if self.blend_file_path in settings:
-            blend_info = settings[self.blend_file_path]["blend_info"]
-            user_settings = settings[self.blend_file_path]["user_settings"]
+        file_settings = self.settings.get(self.blend_file_path)
+        if file_settings:
+            blend_info = file_settings["blend_info"]
+            user_settings = file_settings["user_settings"]
 
             if setting == "frame":
                 is_using_scene = self.toggle_frame_button["text"] == "🎬 Scene"
@@ -657,23 +1016,17 @@ class BlenderRenderApp:
                     self.toggle_frame_button.config(text="🎬 Scene")
 
             # Save the toggle state
-            self.save_settings(settings)
+            self.update_user_settings()
 
     def apply_scene_settings(self):
         """Applies the scene settings to the UI (without affecting user settings)."""
         if not self.blend_file_path:
             return
 
-        settings = self.load_settings()
-        if self.blend_file_path in settings and "blend_info" in settings[self.blend_file_path]:
-            blend_info = settings[self.blend_file_path]["blend_info"]
-
-            self.start_frame_var.set(blend_info["start_frame"])
-            self.end_frame_var.set(blend_info["end_frame"])
-            self.output_path.set(blend_info["output_path"])
-            self.render_filename.set(blend_info["render_filename"])
-
-            print("🎬 Applied scene settings to the UI.")
+        file_settings = self.settings.get(self.blend_file_path, {})
+        if "blend_info" in file_settings:
+            self.apply_blend_info(file_settings["blend_info"])
+            logger.info("🎬 Applied scene settings to the UI.")
 
     def toggle_frame_range_data(self):
         """Toggles the frame range setting from scene to user and allows deselection."""
@@ -694,6 +1047,134 @@ class BlenderRenderApp:
             self.filename_toggle_button.config(text="🎬")
 
 
+class RenderQueueWindow(tk.Toplevel):
+    def __init__(self, parent, render_queue, scheduler):
+        """
+        Window listing queued render jobs with controls to reorder, pause and run them.
+
+        :param render_queue: The RenderQueue to display.
+        :param scheduler: The RenderScheduler working through the queue.
+        """
+        super().__init__(parent)
+        self.title("Render Queue")
+        self.geometry("760x400")
+        self.render_queue = render_queue
+        self.scheduler = scheduler
+
+        columns = ("file", "frames", "priority", "status", "progress")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+        for column, width in zip(columns, (300, 100, 70, 90, 100)):
+            self.tree.heading(column, text=column.capitalize())
+            self.tree.column(column, width=width, anchor="w" if column == "file" else "center")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        controls = tk.Frame(self)
+        controls.pack(pady=5)
+        buttons = [
+            ("▲ Up", lambda job_id: self.render_queue.move(job_id, -1)),
+            ("▼ Down", lambda job_id: self.render_queue.move(job_id, 1)),
+            ("Priority +", lambda job_id: self.change_priority(job_id, 1)),
+            ("Priority −", lambda job_id: self.change_priority(job_id, -1)),
+            ("Pause", self.render_queue.pause),
+            ("Resume", self.render_queue.resume),
+            ("Cancel", self.scheduler.cancel_job),
+            ("Remove", self.render_queue.remove),
+        ]
+        for column, (text, action) in enumerate(buttons):
+            tk.Button(controls, text=text, command=lambda action=action: self.on_selected(action)).grid(row=0, column=column, padx=2)
+
+        run_controls = tk.Frame(self)
+        run_controls.pack(pady=5)
+        tk.Label(run_controls, text="Concurrent Jobs:").grid(row=0, column=0, padx=5)
+        self.concurrency_var = IntVar(value=self.scheduler.max_concurrent)
+        tk.Spinbox(run_controls, from_=1, to=16, width=4, textvariable=self.concurrency_var,
+                   command=lambda: self.scheduler.set_max_concurrent(self.concurrency_var.get())).grid(row=0, column=1, padx=5)
+        tk.Button(run_controls, text="Start Queue", command=self.scheduler.start, bg="#4CAF50").grid(row=0, column=2, padx=5)
+        tk.Button(run_controls, text="Stop Queue", command=self.scheduler.stop).grid(row=0, column=3, padx=5)
+        tk.Button(run_controls, text="Clear Done", command=self.render_queue.clear_finished).grid(row=0, column=4, padx=5)
+
+        # Queue changes arrive from scheduler threads, so hop onto the Tk thread
+        self.listener = lambda: self.after(0, self.refresh)
+        self.render_queue.listeners.append(self.listener)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh_loop()
+
+    def on_selected(self, action):
+        selection = self.tree.selection()
+        if selection:
+            action(selection[0])
+
+    def change_priority(self, job_id, delta):
+        job = self.render_queue.get(job_id)
+        if job:
+            self.render_queue.set_priority(job_id, job.priority + delta)
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        selection = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        for job in self.render_queue.jobs:
+            self.tree.insert("", "end", iid=job.job_id, values=(
+                os.path.basename(job.blend_file) + (f" [{job.scene}]" if job.scene else ""),
+                f"{job.start_frame}-{job.end_frame}",
+                job.priority,
+                job.status,
+                f"{job.frames_done}/{job.total_frames}",
+            ))
+        if selection and self.tree.exists(selection[0]):
+            self.tree.selection_set(selection[0])
+
+    def refresh_loop(self):
+        """Keeps frame counts of running jobs current."""
+        if not self.winfo_exists():
+            return
+        self.refresh()
+        self.after(1000, self.refresh_loop)
+
+    def close(self):
+        self.render_queue.listeners.remove(self.listener)
+        self.destroy()
+
+
+class LogWindow(tk.Toplevel):
+    REFRESH_MS = 250
+
+    def __init__(self, parent, ring_buffer):
+        """
+        Window tailing Blender's recent output from the in-memory log ring buffer.
+
+        :param ring_buffer: The RingBufferHandler collecting Blender's output.
+        """
+        super().__init__(parent)
+        self.title("Blender Log")
+        self.geometry("900x400")
+        self.ring_buffer = ring_buffer
+        self.sequence = max(0, ring_buffer.sequence - ring_buffer.lines.maxlen)
+
+        self.text = tk.Text(self, wrap="none", font=("Courier", 11))
+        scrollbar = tk.Scrollbar(self, command=self.text.yview)
+        self.text.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.text.pack(fill="both", expand=True)
+        self.refresh_loop()
+
+    def refresh_loop(self):
+        """Appends lines logged since the last refresh, keeping the widget as long as the buffer."""
+        if not self.winfo_exists():
+            return
+        self.sequence, lines = self.ring_buffer.since(self.sequence)
+        if lines:
+            at_bottom = self.text.yview()[1] >= 0.999
+            self.text.insert("end", "\n".join(lines) + "\n")
+            excess = int(self.text.index("end-1c").split(".")[0]) - 1 - self.ring_buffer.lines.maxlen
+            if excess > 0:
+                self.text.delete("1.0", f"{excess + 1}.0")
+            if at_bottom:
+                self.text.see("end")
+        self.after(self.REFRESH_MS, self.refresh_loop)
+
+
 class ToggleButton:
     def __init__(self, parent, on_toggle=None):
         """
@@ -730,7 +1211,7 @@ class ToggleButton:
 
         emoji, name = self.states[self.current_state]  # Extract new emoji + name
         self.canvas.itemconfig(self.text, text=emoji)  # Update displayed emoji
-        print(f"Loading {emoji} {name} settings")  # Print full message
+        logger.info(f"Loading {emoji} {name} settings")
 
         if self.on_toggle:
             self.on_toggle()  # ✅ Trigger save when toggled
@@ -746,11 +1227,12 @@ class ToggleButton:
             self.current_state = state_map[state_name]
             emoji, _ = self.states[self.current_state]
             self.canvas.itemconfig(self.text, text=emoji)  # Update button text
-            print(f"Button set to {emoji} {state_name} externally")
+            logger.debug(f"Button set to {emoji} {state_name} externally")
         else:
-            print(f"⚠️ Invalid state: {state_name}. Must be 'Scene', 'User', or 'Default'.")
+            logger.warning(f"⚠️ Invalid state: {state_name}. Must be 'Scene', 'User', or 'Default'.")
 
 if __name__ == "__main__":
+    setup_logging(os.environ.get("BENDER_LOG_LEVEL", "INFO"))
     root = TkinterDnD.Tk()
     app = BlenderRenderApp(root)
     root.mainloop()
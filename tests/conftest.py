@@ -0,0 +1,31 @@
+"""
+Shared fixtures. Blender is replaced by benchmarks/fake_blender.py; BLENDER_EXE has to be set
+before blender_utils is imported, since blend_reader reads it at import time.
+"""
+import os
+
+import pytest
+
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                            "fake_blender.py")
+os.environ["BLENDER_EXE"] = FAKE_BLENDER
+
+from benchmarks.blend_fixtures import write_blend_fixture  # noqa: E402
+
+
+@pytest.fixture
+def fake_blender(monkeypatch, tmp_path):
+    """Fast fake Blender that writes its output files; crash counters stay inside tmp_path."""
+    for name in list(os.environ):
+        if name.startswith("FAKE_BLENDER_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("FAKE_BLENDER_FRAME_SECONDS", "0.01")
+    monkeypatch.setenv("FAKE_BLENDER_WRITE_OUTPUT", "1")
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    return monkeypatch
+
+
+@pytest.fixture
+def blend_file(tmp_path):
+    """A synthetic .blend with one scene, frames 1-12, writing multilayer EXRs."""
+    return write_blend_fixture(str(tmp_path / "shot.blend"), scenes=[{"name": "Shot", "r.sfra": 1, "r.efra": 12}])
@@ -0,0 +1,67 @@
+import os
+
+from blender_utils.frame_scan import (compress_ranges, expand_ranges, find_rendered_frames, frame_path, plan_resume,
+                                      progressive_passes)
+from blender_utils.render_engine import RenderJob
+
+
+def test_compress_ranges():
+    assert compress_ranges([]) == []
+    assert compress_ranges([5]) == [(5, 5)]
+    assert compress_ranges([3, 1, 2, 2, 7, 9, 8, 12]) == [(1, 3), (7, 9), (12, 12)]
+    assert compress_ranges([-2, -1, 0, 1]) == [(-2, 1)]
+
+
+def test_expand_ranges_round_trips():
+    frames = [1, 2, 3, 10, 20, 21]
+    assert expand_ranges(compress_ranges(frames)) == frames
+    assert expand_ranges([(5, 4)]) == []
+
+
+def test_frame_path_follows_blenders_padding():
+    assert frame_path("/r/shot_####", 12) == "/r/shot_0012"
+    assert frame_path("/r/shot_##_v1", 7, ".png") == "/r/shot_07_v1.png"
+    assert frame_path("/r/shot_", 3, ".exr") == "/r/shot_0003.exr"
+    assert frame_path("/r/shot_####.exr", 3, ".exr") == "/r/shot_0003.exr"
+
+
+def test_progressive_passes_render_every_frame_once():
+    frames = list(range(1, 41))
+    passes = progressive_passes(frames)
+    assert passes[0] == [1, 17, 33]
+    assert sorted(frame for frames_pass in passes for frame in frames_pass) == frames
+    assert progressive_passes([]) == []
+
+
+def write_frames(directory, frames, size=100):
+    os.makedirs(directory, exist_ok=True)
+    for frame in frames:
+        with open(frame_path(os.path.join(directory, "shot_####"), frame, ".png"), "wb") as f:
+            f.write(b"\0" * size)
+
+
+def test_find_rendered_frames_skips_truncated_files(tmp_path):
+    write_frames(tmp_path, [1, 2, 3, 4])
+    write_frames(tmp_path, [5], size=2)
+    assert find_rendered_frames(str(tmp_path / "shot_####"), range(1, 7), ".png") == {1, 2, 3, 4}
+    assert find_rendered_frames(str(tmp_path / "missing" / "shot_####"), range(1, 3)) == set()
+
+
+def test_plan_resume_renders_only_the_missing_frames(tmp_path):
+    write_frames(tmp_path, [1, 2, 3, 7, 10])
+    job = RenderJob("shot.blend", 1, 10, output_file=str(tmp_path / "shot_####"), file_format="PNG")
+    resumed = plan_resume(job)
+    assert resumed.frame_ranges == [(4, 6), (8, 9)]
+    assert resumed.frames() == [4, 5, 6, 8, 9]
+
+
+def test_plan_resume_returns_none_when_everything_exists(tmp_path):
+    write_frames(tmp_path, range(1, 6))
+    job = RenderJob("shot.blend", 1, 5, output_file=str(tmp_path / "shot_####"), file_format="PNG")
+    assert plan_resume(job) is None
+
+
+def test_plan_resume_looks_for_the_extension_of_the_format(tmp_path):
+    write_frames(tmp_path, range(1, 6))  # .png files don't count for an EXR render
+    job = RenderJob("shot.blend", 1, 5, output_file=str(tmp_path / "shot_####"), file_format="OPEN_EXR")
+    assert plan_resume(job).frames() == [1, 2, 3, 4, 5]
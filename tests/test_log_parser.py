@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from blender_utils.log_parser import (BlenderLogParser, FrameSaved, FrameStarted, FrameTime, LogError, LogWarning,
+                                      MemoryUsage, SampleProgress, parse_duration)
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "logs")
+
+
+def feed(parser, *lines):
+    return [event for line in lines for event in parser.feed(line)]
+
+
+@pytest.mark.parametrize("text, seconds", [("00:01.29", 1.29), ("01:00:02.50", 3602.5), ("12.5", 12.5)])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == pytest.approx(seconds)
+
+
+def test_cycles_progress_line():
+    events = feed(BlenderLogParser(), "Fra:12 Mem:203.31M (Peak 204.06M) | Time:00:01.29 | Remaining:00:08.41 | "
+                                      "Mem:59.46M, Peak:59.46M | Scene, ViewLayer | Sample 16/128")
+    assert events[0] == FrameStarted(12)
+    assert events[1] == MemoryUsage(12, 203.31, 204.06)
+    assert events[2] == SampleProgress(12, 16, 128, elapsed=1.29, remaining=8.41)
+
+
+def test_tiled_and_eevee_progress_lines():
+    parser = BlenderLogParser()
+    tiled = feed(parser, "Fra:3 Mem:1.2G (Peak 1.5G) | Time:00:03.10 | Rendered 12/135 Tiles, Sample 32/128")
+    assert tiled[1] == MemoryUsage(3, pytest.approx(1228.8), pytest.approx(1536.0))
+    assert tiled[2].tile == 12 and tiled[2].total_tiles == 135 and tiled[2].sample == 32
+    eevee = feed(parser, "Fra:4 Mem:93.87M (Peak 101.04M) | Time:00:00.57 | Rendering 1 / 64 samples")
+    assert eevee[-1] == SampleProgress(4, 1, 64, elapsed=0.57)
+
+
+def test_memory_is_reported_only_when_it_changes():
+    parser = BlenderLogParser()
+    line = "Fra:1 Mem:10.00M (Peak 20.00M) | Time:00:00.10 | Scene, ViewLayer | Initializing"
+    assert any(isinstance(event, MemoryUsage) for event in parser.feed(line))
+    assert not parser.feed(line)
+    assert parser.peak_memory_mb == 20.0
+
+
+def test_saved_time_and_appended_frames():
+    parser = BlenderLogParser()
+    events = feed(parser, "Fra:7 Mem:1.00M | Time:00:00.10 | Sample 1/1", "Saved: '/renders/shot_0007.exr'",
+                  " Time: 00:02.50 (Saving: 00:00.25)", "Append frame 8")
+    assert FrameSaved(7, "/renders/shot_0007.exr") in events
+    assert FrameTime(7, 2.5, 0.25) in events
+    assert FrameSaved(8, None) in events
+    assert parser.saved_frames == [7, 8]
+
+
+def test_a_time_line_before_any_saved_frame_is_ignored():
+    assert not BlenderLogParser().feed(" Time: 00:02.50 (Saving: 00:00.25)")
+
+
+def test_errors_and_warnings_carry_the_current_frame():
+    parser = BlenderLogParser()
+    events = feed(parser, "Fra:5 Mem:1.00M | Time:00:00.10 | Sample 1/1", "Warning: Unable to open 'dust.png'",
+                  "Segmentation fault", "Writing: /tmp/shot.crash.txt", "Read blend: \"/shot.blend\"")
+    assert LogWarning(5, "Warning: Unable to open 'dust.png'") in events
+    assert [error.message for error in parser.errors] == ["Segmentation fault", "Writing: /tmp/shot.crash.txt"]
+    assert all(isinstance(error, LogError) and error.frame == 5 for error in parser.errors)
+
+
+@pytest.mark.parametrize("name, first_frame", [("cycles_sample", 101), ("eevee_sample", None)])
+def test_recorded_logs(name, first_frame):
+    parser = BlenderLogParser()
+    with open(os.path.join(LOG_DIR, f"{name}.log"), encoding="utf-8") as f:
+        events = [event for line in f.read().splitlines() for event in parser.feed(line)]
+    started = [event.frame for event in events if isinstance(event, FrameStarted)]
+    saved = [event.frame for event in events if isinstance(event, FrameSaved)]
+    assert started and saved == started
+    if first_frame is not None:
+        assert started[0] == first_frame
@@ -0,0 +1,56 @@
+from blender_utils.partition import balanced_chunks, plan_chunks, plan_job, probe_costs, schedule_makespan
+from blender_utils.frame_scan import expand_ranges
+from blender_utils.render_engine import RenderJob
+
+
+def test_balanced_chunks_splits_by_cost_not_count():
+    frames = list(range(1, 101))
+    costs = {frame: 10.0 if 41 <= frame <= 50 else 1.0 for frame in frames}
+    pieces = balanced_chunks(frames, costs, 4)
+    assert [frame for chunk, _ in pieces for frame in chunk] == frames
+    totals = [cost for _, cost in pieces]
+    assert sum(totals) == sum(costs.values())
+    # The heavy stretch gets chunks of its own instead of a quarter of the frames each
+    assert max(totals) < 1.5 * sum(totals) / len(totals)
+    assert min(len(chunk) for chunk, _ in pieces) < 25
+
+
+def test_balanced_chunks_edge_cases():
+    assert balanced_chunks([7], {7: 3.0}, 4) == [([7], 3.0)]
+    # Zero costs fall back to an even split by count
+    pieces = balanced_chunks(list(range(10)), dict.fromkeys(range(10), 0.0), 3)
+    assert [len(chunk) for chunk, _ in pieces] == [4, 4, 2]
+    assert len(balanced_chunks(list(range(3)), dict.fromkeys(range(3), 1.0), 10)) == 3
+
+
+def test_schedule_makespan_assigns_to_the_first_free_worker():
+    assert schedule_makespan([4, 3, 2, 1], 2) == 5
+    assert schedule_makespan([5], 4) == 5
+    assert schedule_makespan([], 2) == 0
+
+
+def test_plan_chunks_covers_every_frame_heaviest_first():
+    frames = list(range(1, 61))
+    costs = {frame: 5.0 if frame > 50 else 1.0 for frame in frames}
+    plan = plan_chunks(frames, costs, workers=3)
+    assert sorted(expand_ranges([r for chunk in plan.chunks for r in chunk])) == frames
+    assert plan.costs == sorted(plan.costs, reverse=True)
+    assert plan.makespan == schedule_makespan(plan.costs, 3)
+
+
+def test_plan_chunks_fills_in_missing_costs_and_keeps_relative_costs_uncalibrated():
+    plan = plan_chunks(list(range(1, 11)), {1: 2.0, 10: 4.0}, workers=2, source="probe", calibrated=False)
+    assert sum(plan.costs) == 30.0  # Eight frames at the average of 3.0
+    assert plan.makespan is None
+    assert plan_chunks([1, 2], {}, workers=2) is None
+
+
+def test_plan_job_without_frames_does_nothing():
+    job = RenderJob("shot.blend", 5, 4, workers=2)
+    assert probe_costs(job) == {}
+    assert plan_job(job, probe=True) == (job, None)
+
+
+def test_plan_job_skips_single_worker_and_explicit_chunks():
+    assert plan_job(RenderJob("shot.blend", 1, 10, workers=1))[1] is None
+    assert plan_job(RenderJob("shot.blend", 1, 10, workers=2, chunk_size=2))[1] is None
@@ -0,0 +1,157 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from blender_utils import blend_cache
+from blender_utils.blend_cache import BlendInfoCache, file_key
+from blender_utils.blend_reader import get_blend_info
+from blender_utils.render_history import RenderHistory
+from blender_utils.scene_inventory import get_scene_inventory
+from blender_utils.settings_store import SettingsStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def stored_entries(path):
+    with open(path) as f:
+        return list(json.load(f)["entries"].values())
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh process-wide blend info cache, so tests don't share entries."""
+    monkeypatch.setattr(blend_cache, "_default_cache", BlendInfoCache())
+    return blend_cache.get_default_cache()
+
+
+def test_file_key_changes_with_the_contents(tmp_path):
+    path = tmp_path / "a.blend"
+    path.write_bytes(b"x" * 100)
+    key = file_key(str(path))
+    assert file_key(str(path)) == key
+    path.write_bytes(b"y" * 101)
+    assert file_key(str(path)) != key
+
+
+def test_cache_saves_on_every_change_without_debounce(tmp_path):
+    blend = tmp_path / "a.blend"
+    blend.write_bytes(b"x" * 100)
+    path = str(tmp_path / "cache.json")
+    cache = BlendInfoCache(path)
+    cache.put(str(blend), {"start_frame": 1})
+    assert stored_entries(path) == [{"start_frame": 1}]
+
+
+def test_cache_debounce_writes_once_after_a_burst(tmp_path):
+    blend = tmp_path / "a.blend"
+    blend.write_bytes(b"x" * 100)
+    path = str(tmp_path / "cache.json")
+    cache = BlendInfoCache(path, debounce=0.2)
+    for frame in range(20):
+        cache.put(str(blend), {"start_frame": frame})
+    assert not os.path.exists(path)  # Nothing written on the calling thread
+    time.sleep(0.5)
+    assert stored_entries(path) == [{"start_frame": 19}]
+    assert BlendInfoCache(path).get(str(blend)) == {"start_frame": 19}
+
+
+def test_cache_close_flushes_pending_changes(tmp_path):
+    blend = tmp_path / "a.blend"
+    blend.write_bytes(b"x" * 100)
+    path = str(tmp_path / "cache.json")
+    cache = BlendInfoCache(path, debounce=60)
+    cache.put(str(blend), {"start_frame": 5})
+    cache.close()
+    assert stored_entries(path) == [{"start_frame": 5}]
+
+
+def test_cache_evicts_the_least_recently_used(tmp_path):
+    cache = BlendInfoCache(max_entries=2)
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.blend"
+        path.write_bytes(name.encode() * 10)
+        paths.append(str(path))
+    cache.put(paths[0], {"name": "a"})
+    cache.put(paths[1], {"name": "b"})
+    cache.get(paths[0])
+    cache.put(paths[2], {"name": "c"})
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) == {"name": "a"}
+    assert cache.evictions == 1
+
+
+def test_missing_file_returns_none_instead_of_raising(tmp_path, cache):
+    missing = str(tmp_path / "missing.blend")
+    assert cache.get_or_load(missing, lambda path: pytest.fail("loader called")) is None
+    assert get_blend_info(missing) is None
+    assert get_scene_inventory(missing) is None
+
+
+def test_cli_info_on_a_missing_file_fails_cleanly(tmp_path):
+    result = subprocess.run([sys.executable, "-m", "blender_utils", "info", str(tmp_path / "missing.blend")],
+                            capture_output=True, text=True, cwd=tmp_path, env={**os.environ, "PYTHONPATH": ROOT})
+    assert result.returncode == 1
+    assert "Traceback" not in result.stderr
+    assert result.stdout == ""
+
+
+def test_blend_info_is_read_natively_and_cached(blend_file, cache):
+    blend_info = get_blend_info(blend_file)
+    assert (blend_info["start_frame"], blend_info["end_frame"]) == (1, 12)
+    assert get_blend_info(blend_file) == blend_info
+    assert cache.hits == 1
+
+
+def test_settings_store_debounces_and_flushes(tmp_path):
+    blend = tmp_path / "a.blend"
+    blend.write_bytes(b"x")
+    path = str(tmp_path / "settings.json")
+    store = SettingsStore(path, debounce=0.2)
+    for frame in range(10):
+        store.update(str(blend), user_settings={"start_frame": frame})
+    assert not os.path.exists(path)
+    time.sleep(0.5)
+    assert store.save_count == 1
+    with open(path) as f:
+        assert json.load(f)[str(blend)]["user_settings"] == {"start_frame": 9}
+
+    store.update(str(blend), user_settings={"start_frame": 42})
+    store.close()
+    assert store.save_count == 2
+    assert SettingsStore(path).get(str(blend))["user_settings"] == {"start_frame": 42}
+
+
+def test_settings_store_max_delay_bounds_a_stream_of_changes(tmp_path):
+    blend = tmp_path / "a.blend"
+    blend.write_bytes(b"x")
+    store = SettingsStore(str(tmp_path / "settings.json"), debounce=0.2, max_delay=0.4)
+    store.update(str(blend), user_settings={})
+    deadline = time.monotonic() + 0.8
+    while time.monotonic() < deadline:
+        store.touch(str(blend))  # Each change comes before the debounce runs out
+        time.sleep(0.05)
+    assert store.save_count >= 1
+    store.close()
+
+
+def test_settings_store_prunes_deleted_files(tmp_path):
+    path = str(tmp_path / "settings.json")
+    with open(path, "w") as f:
+        json.dump({str(tmp_path / "gone.blend"): {"last_used": time.time()}}, f)
+    assert SettingsStore(path, debounce=60).entries() == {}
+
+
+def test_render_history_survives_a_frame_without_number(tmp_path):
+    path = str(tmp_path / "history.json")
+    history = RenderHistory(path)
+    history.record("shot.blend", None, 2.0)
+    history.record("shot.blend", 3, 1.0)
+    history.save()
+    loaded = RenderHistory(path).get("shot.blend")
+    assert list(loaded.frames) == [3]
+    assert loaded.stats.count == 2
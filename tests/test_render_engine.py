@@ -0,0 +1,88 @@
+import os
+
+from blender_utils import render_command
+from blender_utils.frame_scan import plan_resume
+from blender_utils.render_command import build_render_command
+from blender_utils.render_engine import DONE, FAILED, FrameFailed, RenderEngine, RenderJob
+from blender_utils.render_failures import CRASH, LAUNCH, RetryPolicy
+from blender_utils.render_profiles import BUILTIN_PROFILES, DRAFT, FINAL, PREVIEW, RenderProfile, apply_profile
+
+FAST_RETRY = RetryPolicy(max_attempts=2, backoff=0.01)
+
+
+def output_files(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_explicit_format_wins_over_the_profile():
+    job = apply_profile(RenderJob("shot.blend", 1, 2, file_format="OPEN_EXR"), BUILTIN_PROFILES[DRAFT])
+    assert job.file_format == "OPEN_EXR"
+    script = job.profile.python_expr()
+    assert "resolution_percentage = 50" in script
+    assert "file_format" not in script and "color_depth" not in script
+
+
+def test_profile_format_applies_without_explicit_format():
+    job = apply_profile(RenderJob("shot.blend", 1, 2, threads=4), BUILTIN_PROFILES[PREVIEW])
+    assert job.file_format == "OPEN_EXR"
+    assert job.threads == 4
+    assert "exr_codec = 'DWAA'" in job.profile.python_expr()
+    assert apply_profile(job, None) is job
+    assert BUILTIN_PROFILES[FINAL].python_expr() is None
+    assert RenderProfile("x", samples=8).python_expr().count("samples = 8") == 2
+
+
+def test_render_writes_every_frame(fake_blender, blend_file, tmp_path):
+    output = str(tmp_path / "out" / "shot_####")
+    result = RenderEngine().run(RenderJob(blend_file, 1, 6, output_file=output, file_format="PNG", workers=2))
+    assert (result.status, result.frames_done, result.total_frames) == (DONE, 6, 6)
+    assert output_files(tmp_path / "out") == [f"shot_{frame:04d}.png" for frame in range(1, 7)]
+
+
+def test_profile_render_keeps_the_requested_format(fake_blender, blend_file, tmp_path):
+    output = str(tmp_path / "out" / "shot_####")
+    job = apply_profile(RenderJob(blend_file, 1, 4, output_file=output, file_format="OPEN_EXR"),
+                        BUILTIN_PROFILES[DRAFT])
+    assert RenderEngine().run(job).status == DONE
+    assert output_files(tmp_path / "out") == [f"shot_{frame:04d}.exr" for frame in range(1, 5)]
+    assert plan_resume(job) is None  # Resume finds the frames it asked for
+
+
+def test_profile_script_comes_after_the_format_flag():
+    job = apply_profile(RenderJob("shot.blend", 1, 2), BUILTIN_PROFILES[DRAFT])
+    command = build_render_command(job.blend_file, 1, 2, file_format=job.file_format,
+                                   python_expr=job.profile.python_expr())
+    assert command[command.index("-F") + 1] == "PNG"
+    assert command.index("--python-expr") > command.index("-F")
+
+
+def test_crashed_frame_is_retried(fake_blender, blend_file, tmp_path):
+    fake_blender.setenv("FAKE_BLENDER_CRASH_FRAME", "3")
+    fake_blender.setenv("FAKE_BLENDER_CRASH_TIMES", "1")
+    job = RenderJob(blend_file, 1, 5, output_file=str(tmp_path / "out" / "shot_####"), file_format="PNG",
+                    retry=FAST_RETRY)
+    engine = RenderEngine()
+    failed = []
+    engine.subscribe(lambda event: isinstance(event, FrameFailed) and failed.append(event.failure))
+    result = engine.run(job)
+    assert (result.status, result.frames_done) == (DONE, 5)
+    assert [(failure.frame, failure.kind, failure.retrying) for failure in failed] == [(3, CRASH, True)]
+    assert result.failures == ()  # Only failures that weren't retried are reported at the end
+
+
+def test_frame_that_keeps_crashing_is_given_up_on(fake_blender, blend_file, tmp_path):
+    fake_blender.setenv("FAKE_BLENDER_CRASH_FRAME", "3")
+    job = RenderJob(blend_file, 1, 5, output_file=str(tmp_path / "out" / "shot_####"), file_format="PNG",
+                    retry=FAST_RETRY)
+    result = RenderEngine().run(job)
+    assert (result.status, result.frames_done) == (FAILED, 4)
+    assert [(start, end) for start, end, _ in result.failed_chunks] == [(3, 3)]
+
+
+def test_missing_blender_fails_the_render(fake_blender, blend_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(render_command, "BLENDER_EXE", str(tmp_path / "no_blender"))
+    job = RenderJob(blend_file, 1, 4, output_file=str(tmp_path / "out" / "shot_####"), workers=2, retry=FAST_RETRY)
+    result = RenderEngine().run(job)
+    assert (result.status, result.frames_done) == (FAILED, 0)
+    assert {failure.kind for failure in result.failures} == {LAUNCH}
+    assert all(not failure.retrying for failure in result.failures)
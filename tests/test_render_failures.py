@@ -0,0 +1,62 @@
+import signal
+
+import pytest
+
+from blender_utils.log_parser import LogError
+from blender_utils.render_failures import (CRASH, ERROR, FILE, GPU, INCOMPLETE, LAUNCH, OUT_OF_MEMORY, TRANSFER,
+                                           RetryPolicy, classify_failure, signal_name)
+
+
+def errors(*lines):
+    return [LogError(1, line) for line in lines]
+
+
+@pytest.mark.parametrize("returncode, lines, kind", [
+    (-signal.SIGSEGV, ["Segmentation fault", "Writing: /tmp/shot.crash.txt"], CRASH),
+    (-signal.SIGSEGV, [], CRASH),
+    (-signal.SIGKILL, [], OUT_OF_MEMORY),
+    (-signal.SIGKILL, ["Error: System is out of GPU and shared host memory"], OUT_OF_MEMORY),
+    (1, ["CUDA error: Illegal address in cuCtxSynchronize()"], GPU),
+    (1, ['Error: Cannot read file "/shared/shot.blend": No such file or directory'], FILE),
+    (1, ["Error: Python script failed"], ERROR),
+    (0xC0000005, [], CRASH),
+    (0, [], INCOMPLETE),
+    (3, [], ERROR),
+])
+def test_classify_failure(returncode, lines, kind):
+    assert classify_failure(returncode, errors(*lines))[0] == kind
+
+
+def test_classify_failure_prefers_memory_over_the_crash_it_causes():
+    kind, message = classify_failure(-signal.SIGSEGV, errors("Segmentation fault", "Error: Out of memory in CUDA"))
+    assert kind == OUT_OF_MEMORY
+    assert message == "Error: Out of memory in CUDA"
+
+
+def test_signal_name():
+    assert signal_name(-signal.SIGSEGV) == "SIGSEGV"
+    assert signal_name(0) is None
+    assert signal_name(None) is None
+
+
+def test_retry_policy_backs_off_exponentially_up_to_a_cap():
+    policy = RetryPolicy(backoff=5.0, backoff_factor=2.0, max_backoff=12.0)
+    assert [policy.delay(attempt) for attempt in (2, 3, 4)] == [5.0, 10.0, 12.0]
+
+
+def test_retry_policy_gives_up_after_max_attempts_and_on_permanent_failures():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(CRASH, 1)
+    assert policy.should_retry(CRASH, 2)
+    assert not policy.should_retry(CRASH, 3)
+    for kind in (FILE, TRANSFER, LAUNCH):
+        assert not policy.should_retry(kind, 1)
+
+
+def test_retry_policy_halves_threads_only_after_resource_failures():
+    policy = RetryPolicy(fewer_threads=True)
+    assert policy.retry_threads(CRASH, 8, 16) == 4
+    assert policy.retry_threads(OUT_OF_MEMORY, None, 16) == 8
+    assert policy.retry_threads(OUT_OF_MEMORY, 1, 16) == 1
+    assert policy.retry_threads(GPU, 8, 16) == 8
+    assert RetryPolicy().retry_threads(CRASH, 8, 16) == 8